@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.data.binance_api import binance_api
+from src.data.store import kline_store
 from src.indicators.boll import BOLL
 from src.indicators.kdj import KDJ
 
@@ -24,11 +24,11 @@ def main():
     try:
         # 获取历史数据
         print("获取历史数据...")
-        btc_4h = binance_api.get_klines('BTCUSDT', '4h', 100)
-        btc_1h = binance_api.get_klines('BTCUSDT', '1h', 200)
-        doge_1h = binance_api.get_klines('DOGEUSDT', '1h', 200)
-        doge_15m = binance_api.get_klines('DOGEUSDT', '15m', 500)
-        doge_1m = binance_api.get_klines('DOGEUSDT', '1m', 1000)
+        btc_4h = kline_store.load_recent('BTCUSDT', '4h', 100)
+        btc_1h = kline_store.load_recent('BTCUSDT', '1h', 200)
+        doge_1h = kline_store.load_recent('DOGEUSDT', '1h', 200)
+        doge_15m = kline_store.load_recent('DOGEUSDT', '15m', 500)
+        doge_1m = kline_store.load_recent('DOGEUSDT', '1m', 1000)
 
         if any(df.empty for df in [btc_4h, btc_1h, doge_1h, doge_15m, doge_1m]):
             print("数据获取失败")
@@ -28,20 +28,20 @@ def main():
     days_since = (current_date - start_date).days
 
     print(f"回测期间: 9月12日至今 ({days_since}天)")
-    print(f"数据获取策略: 获取最大可用历史数据")
+    print(f"数据获取策略: 分页获取9月12日至今的完整历史数据")
 
     try:
-        # 获取最大历史数据（1000条限制）
+        # 分页获取完整历史数据（不受单次1000条限制）
         print("\n获取历史数据...")
 
         print("获取BTC数据...")
-        btc_4h = binance_api.get_klines('BTCUSDT', '4h', 1000)
-        btc_1h = binance_api.get_klines('BTCUSDT', '1h', 1000)
+        btc_4h = binance_api.get_klines_range('BTCUSDT', '4h', start_date)
+        btc_1h = binance_api.get_klines_range('BTCUSDT', '1h', start_date)
 
         print("获取DOGE数据...")
-        doge_1h = binance_api.get_klines('DOGEUSDT', '1h', 1000)
-        doge_15m = binance_api.get_klines('DOGEUSDT', '15m', 1000)
-        doge_1m = binance_api.get_klines('DOGEUSDT', '1m', 1000)
+        doge_1h = binance_api.get_klines_range('DOGEUSDT', '1h', start_date)
+        doge_15m = binance_api.get_klines_range('DOGEUSDT', '15m', start_date)
+        doge_1m = binance_api.get_klines_range('DOGEUSDT', '1m', start_date)
 
         if any(df.empty for df in [btc_4h, btc_1h, doge_1h, doge_15m, doge_1m]):
             print("数据获取失败")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+K线解码性能对比
+对1000根K线的接口响应，比较原来的 DataFrame + pd.to_numeric 转换与直接解码为数组的耗时
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.data import kline_decoder
+from src.data.kline_decoder import decode_klines, decode_klines_frame
+
+
+def make_payload(count: int, seed: int = 0) -> bytes:
+    """生成与 /api/v3/klines 格式相同的响应原文"""
+    rng = np.random.default_rng(seed)
+    start = 1725148800000
+    close = 0.1 + np.cumsum(rng.normal(0, 0.0005, count)) + 0.1
+    rows = []
+    for n in range(count):
+        open_time = start + n * 60_000
+        rows.append([open_time, f"{close[n - 1] if n else close[0]:.8f}", f"{close[n] + 0.001:.8f}",
+                     f"{close[n] - 0.001:.8f}", f"{close[n]:.8f}", f"{rng.random() * 1e6:.8f}",
+                     open_time + 59_999, f"{rng.random() * 1e5:.8f}", int(rng.integers(100, 5000)),
+                     f"{rng.random() * 5e5:.8f}", f"{rng.random() * 5e4:.8f}", "0"])
+    return json.dumps(rows, separators=(',', ':')).encode()
+
+
+def legacy_frame(data) -> pd.DataFrame:
+    """原来的转换：12列字符串DataFrame，逐列 pd.to_numeric，再转换时间并丢弃多余列"""
+    df = pd.DataFrame(data, columns=[
+        'open_time', 'open', 'high', 'low', 'close', 'volume',
+        'close_time', 'quote_volume', 'count', 'taker_buy_volume',
+        'taker_buy_quote_volume', 'ignore'
+    ])
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df[['open', 'high', 'low', 'close', 'volume']]
+
+
+def measure(func, repeat: int) -> float:
+    """每次调用的平均耗时（毫秒）"""
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='K线解码性能对比')
+    parser.add_argument('--bars', type=int, default=1000, help='每次响应的K线根数')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    payload = make_payload(args.bars)
+    buffers = (np.empty(args.bars, dtype=np.int64), np.empty((args.bars, 5)))
+    orjson = kline_decoder.orjson
+
+    cases = [
+        ('原转换 (json + pd.to_numeric)', lambda: legacy_frame(json.loads(payload))),
+        ('DataFrame (json + 数组解码)', lambda: decode_klines_frame(json.loads(payload))),
+        ('数组 (json)', lambda: decode_klines(json.loads(payload))),
+    ]
+    if orjson is not None:
+        cases += [
+            ('DataFrame (orjson + 数组解码)', lambda: decode_klines_frame(orjson.loads(payload))),
+            ('数组 (orjson)', lambda: decode_klines(orjson.loads(payload))),
+            ('数组 (orjson, 预分配)', lambda: decode_klines(orjson.loads(payload), out=buffers)),
+        ]
+    else:
+        print("未安装 orjson，只测试标准库 json")
+
+    print(f"{args.bars}根K线，响应{len(payload) / 1024:.0f}KB，每项{args.repeat}次")
+    baseline = None
+    for name, func in cases:
+        elapsed = measure(func, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:<32} {elapsed:7.3f} ms  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -172,8 +172,9 @@ def test_real_time_vs_web():
 
     try:
         # 获取实时数据
-        btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
-        doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+        tickers = binance_api.get_24hr_tickers(['BTCUSDT', 'DOGEUSDT'])
+        btc_ticker = tickers['BTCUSDT']
+        doge_ticker = tickers['DOGEUSDT']
 
         current_time = datetime.now()
 
@@ -12,9 +12,10 @@ from datetime import datetime, timedelta
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.data.binance_api import binance_api
+from src.data.store import kline_store
 from src.indicators.boll import BOLL
 from src.indicators.kdj import KDJ
+from src.strategy.rules import doge_rules
 
 def check_btc_conditions(btc_1h_data, btc_4h_data, kdj, current_time):
     """检查BTC条件"""
@@ -104,69 +105,20 @@ def check_doge_signals(doge_1h_data, doge_15m_data, doge_1m_data, boll, kdj, cur
         kdj_15m_val = kdj_15m_doge.get('KDJ_MAX', 100)
         kdj_1m_val = kdj_1m_doge.get('KDJ_MAX', 100)
 
-        # 买入信号1
-        signal1_conditions = {
-            '1h_boll_dn': boll_1h_touch == 'DN',
-            '1h_kdj_10': kdj_1h_val < 10,
-            '15m_boll_dn': boll_15m_touch == 'DN',
-            '15m_kdj_20': kdj_15m_val < 20,
-            '1m_kdj_20': kdj_1m_val < 20
+        # 买入信号1-3（与实时监控同一套规则，阈值来自配置）
+        inputs = {
+            '1h': {'touch': boll_1h_touch, 'kdj': kdj_1h_val},
+            '15m': {'touch': boll_15m_touch, 'kdj': kdj_15m_val},
+            '1m': {'kdj': kdj_1m_val}
         }
-
-        if all(signal1_conditions.values()):
-            signals.append({
-                'type': 'BUY',
-                'signal_id': 1,
-                'price': doge_price,
-                'conditions': signal1_conditions,
-                'indicators': {
-                    '1h_boll': boll_1h_touch,
-                    '15m_boll': boll_15m_touch,
-                    '1h_kdj': kdj_1h_val,
-                    '15m_kdj': kdj_15m_val,
-                    '1m_kdj': kdj_1m_val
-                }
-            })
-
-        # 买入信号2
-        signal2_conditions = {
-            '1h_boll_mb': boll_1h_touch == 'MB',
-            '1h_kdj_15': kdj_1h_val < 15,
-            '15m_boll_dn': boll_15m_touch == 'DN',
-            '15m_kdj_20': kdj_15m_val < 20,
-            '1m_kdj_20': kdj_1m_val < 20
-        }
-
-        if all(signal2_conditions.values()):
-            signals.append({
-                'type': 'BUY',
-                'signal_id': 2,
-                'price': doge_price,
-                'conditions': signal2_conditions,
-                'indicators': {
-                    '1h_boll': boll_1h_touch,
-                    '15m_boll': boll_15m_touch,
-                    '1h_kdj': kdj_1h_val,
-                    '15m_kdj': kdj_15m_val,
-                    '1m_kdj': kdj_1m_val
-                }
-            })
-
-        # 买入信号3
-        signal3_conditions = {
-            '1h_boll_mb': boll_1h_touch == 'MB',
-            '1h_kdj_15': kdj_1h_val < 15,
-            '15m_boll_mb': boll_15m_touch == 'MB',
-            '15m_kdj_20': kdj_15m_val < 20,
-            '1m_kdj_20': kdj_1m_val < 20
-        }
-
-        if all(signal3_conditions.values()):
+        for signal in doge_rules.triggered(inputs):
+            if signal['type'] != 'buy':
+                continue
             signals.append({
                 'type': 'BUY',
-                'signal_id': 3,
+                'signal_id': signal['signal_id'],
                 'price': doge_price,
-                'conditions': signal3_conditions,
+                'conditions': signal['conditions'],
                 'indicators': {
                     '1h_boll': boll_1h_touch,
                     '15m_boll': boll_15m_touch,
@@ -197,11 +149,11 @@ def main():
     try:
         # 获取历史数据
         print("获取历史数据...")
-        btc_4h = binance_api.get_klines('BTCUSDT', '4h', 100)
-        btc_1h = binance_api.get_klines('BTCUSDT', '1h', 200)
-        doge_1h = binance_api.get_klines('DOGEUSDT', '1h', 200)
-        doge_15m = binance_api.get_klines('DOGEUSDT', '15m', 500)
-        doge_1m = binance_api.get_klines('DOGEUSDT', '1m', 1000)
+        btc_4h = kline_store.load_recent('BTCUSDT', '4h', 100)
+        btc_1h = kline_store.load_recent('BTCUSDT', '1h', 200)
+        doge_1h = kline_store.load_recent('DOGEUSDT', '1h', 200)
+        doge_15m = kline_store.load_recent('DOGEUSDT', '15m', 500)
+        doge_1m = kline_store.load_recent('DOGEUSDT', '1m', 1000)
 
         if any(df.empty for df in [btc_4h, btc_1h, doge_1h, doge_15m, doge_1m]):
             print("数据获取失败")
@@ -30,8 +30,9 @@ def show_calculation_details():
         print("\n[1] 基础价格数据:")
         print("-" * 50)
 
-        btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
-        doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+        tickers = binance_api.get_24hr_tickers(['BTCUSDT', 'DOGEUSDT'])
+        btc_ticker = tickers['BTCUSDT']
+        doge_ticker = tickers['DOGEUSDT']
 
         if btc_ticker and doge_ticker:
             btc_price = float(btc_ticker['lastPrice'])
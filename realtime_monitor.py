@@ -29,8 +29,9 @@ def realtime_price_monitor():
             current_time = datetime.now().strftime('%H:%M:%S')
 
             # 获取价格
-            btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
-            doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+            tickers = binance_api.get_24hr_tickers(['BTCUSDT', 'DOGEUSDT'])
+            btc_ticker = tickers['BTCUSDT']
+            doge_ticker = tickers['DOGEUSDT']
 
             if btc_ticker and doge_ticker:
                 btc_price = float(btc_ticker['lastPrice'])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+多交易对扫描
+以BTC为市场过滤条件，把DOGE的BOLL/KDJ规则应用到成交额最高的USDT交易对，
+每根1分钟K线收盘时对所有交易对扫描一次并输出信号和扫描耗时
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data.binance_api import binance_api
+from src.strategy.scanner import MultiSymbolScanner
+from src.utils.config import config
+
+
+def print_result(result):
+    latency = result['latency']
+    timestamp = datetime.fromtimestamp(result['time'] / 1000).strftime('%H:%M:%S')
+    print(f"[{timestamp}] BTC条件{'满足' if result['btc_valid'] else '不满足'}  "
+          f"{latency['ready']}/{latency['symbols']}个交易对  "
+          f"计算{latency['compute_ms']:.1f}ms  收盘后{latency['lag_ms']:.0f}ms")
+    for signal in result['signals']:
+        action = '买入' if signal['type'] == 'buy' else '卖出'
+        print(f"  🚨 {signal['symbol']:<14} {action}信号{signal['signal_id']}  价格{signal['price']:.6g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多交易对规则扫描')
+    parser.add_argument('--top', type=int, default=config.get('scanner.top', 100), help='按成交额选取的交易对数')
+    parser.add_argument('--symbols', nargs='*', help='指定交易对（默认按成交额选取）')
+    parser.add_argument('--once', action='store_true', help='只用REST数据扫描一次')
+    args = parser.parse_args()
+
+    symbols = args.symbols or binance_api.get_top_symbols('USDT', args.top)
+    if not symbols:
+        print("❌ 获取交易对列表失败")
+        return
+
+    scanner = MultiSymbolScanner(symbols)
+    print(f"扫描{len(symbols)}个交易对，规则时间框架{scanner.rules.timeframes}，指标窗口{scanner.window}根K线")
+
+    if args.once:
+        started = time.perf_counter()
+        scanner.bootstrap()
+        print(f"初始化用时{time.perf_counter() - started:.1f}秒")
+        print_result(scanner.scan())
+        return
+
+    scanner.on_scan(print_result)
+    scanner.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scanner.stop()
+        summary = scanner.latency_summary()
+        print(f"\n共扫描{summary['scans']}次")
+        for name, label in (('compute_ms', '计算耗时'), ('lag_ms', '收盘后延迟')):
+            if summary[name]:
+                print(f"{label}: p50 {summary[name]['p50']:.1f}ms  p95 {summary[name]['p95']:.1f}ms  "
+                      f"最大 {summary[name]['max']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,9 @@ def simple_monitor():
 
             try:
                 # 获取价格
-                btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
-                doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+                tickers = binance_api.get_24hr_tickers(['BTCUSDT', 'DOGEUSDT'])
+                btc_ticker = tickers['BTCUSDT']
+                doge_ticker = tickers['DOGEUSDT']
 
                 if btc_ticker and doge_ticker:
                     btc_price = float(btc_ticker['lastPrice'])
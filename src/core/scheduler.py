@@ -0,0 +1,168 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..data.binance_api import INTERVAL_MS
+from ..data.live_kline_book import live_kline_book, LiveKlineBook
+from ..indicators.modes import CONFIRMED, REALTIME
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 定时模式下收盘后等待的时间，确保REST已返回收盘的K线
+_CLOSE_DELAY_MS = 1000
+
+# 定时模式下预警的最小间隔（秒），避免冷却时间为0时空转
+_MIN_CLOCK_COOLDOWN = 1.0
+
+
+class SignalScheduler:
+    """
+    事件驱动的信号调度器
+
+    - 确认：任一订阅的K线收盘（x=true）时触发一次
+    - 预警：形成中的K线有推送时按冷却时间节流触发
+
+    事件来自实时K线簿；K线簿未运行时按K线收盘时刻定时触发，不做空轮询。
+    回调在独立的工作线程中执行，同一批到达的收盘事件合并为一次确认。
+    """
+
+    def __init__(self, kline_requests: Iterable[Tuple[str, str]],
+                 realtime_cooldown: float = None,
+                 realtime_symbols: Optional[Iterable[str]] = None,
+                 book: LiveKlineBook = None):
+        """
+        Args:
+            kline_requests: 订阅的 (交易对, 时间间隔) 列表
+            realtime_cooldown: 两次预警之间的最小间隔（秒）
+            realtime_symbols: 触发预警的交易对，默认全部
+            book: 实时K线簿，默认使用全局实例
+        """
+        self.kline_requests = tuple(dict.fromkeys(kline_requests))
+        if realtime_cooldown is None:
+            realtime_cooldown = config.get('monitoring.realtime_cooldown', 10)
+        self.realtime_cooldown = realtime_cooldown
+        self.realtime_symbols = set(realtime_symbols) if realtime_symbols is not None else None
+        self.book = book or live_kline_book
+
+        self._callbacks: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {CONFIRMED: [], REALTIME: []}
+        self._events: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._last_realtime = 0.0
+        self._threads: List[threading.Thread] = []
+
+    def on_confirmed(self, callback: Callable[[Dict[str, Any]], None]):
+        """注册K线收盘时的回调，参数为 {'type', 'closed': [(交易对, 时间间隔), ...]}"""
+        self._callbacks[CONFIRMED].append(callback)
+
+    def on_realtime(self, callback: Callable[[Dict[str, Any]], None]):
+        """注册预警回调，参数为 {'type', 'symbol', 'interval'}"""
+        self._callbacks[REALTIME].append(callback)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self):
+        """启动调度（非阻塞）"""
+        self._stop.clear()
+        if self.book.running:
+            self.book.add_listener(self.notify)
+            logger.info("信号调度：由实时K线数据流驱动")
+        else:
+            self._start_thread(self._clock_loop, 'signal-clock')
+            logger.info("信号调度：按K线收盘时刻定时触发")
+        self._start_thread(self._worker_loop, 'signal-worker')
+
+    def stop(self):
+        """停止调度"""
+        self._stop.set()
+        self.book.remove_listener(self.notify)
+        self._events.put(None)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=5)
+        self._threads = []
+
+    def run_forever(self):
+        """启动调度并阻塞到 stop() 被调用"""
+        self.start()
+        while not self._stop.wait(1.0):
+            pass
+
+    def _start_thread(self, target: Callable, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def notify(self, symbol: str, interval: str, kline: Dict[str, Any]):
+        """实时K线簿的监听回调：收盘事件排队确认，形成中事件节流后排队预警"""
+        if (symbol, interval) not in self.kline_requests:
+            return
+
+        if kline.get('x'):
+            self._events.put({'type': CONFIRMED, 'symbol': symbol, 'interval': interval})
+            return
+
+        if self.realtime_symbols is not None and symbol not in self.realtime_symbols:
+            return
+        now = time.time()
+        if now - self._last_realtime >= self.realtime_cooldown:
+            self._last_realtime = now
+            self._events.put({'type': REALTIME, 'symbol': symbol, 'interval': interval})
+
+    def _clock_loop(self):
+        """无数据流时：在最小周期的K线收盘时刻确认，其间按冷却时间预警"""
+        intervals = {interval for _, interval in self.kline_requests if interval in INTERVAL_MS}
+        if not intervals:
+            return
+        step_ms = min(INTERVAL_MS[interval] for interval in intervals)
+
+        while not self._stop.is_set():
+            now_ms = int(time.time() * 1000)
+            next_close = (now_ms // step_ms + 1) * step_ms
+            cooldown = max(self.realtime_cooldown, _MIN_CLOCK_COOLDOWN)
+            next_realtime = int((self._last_realtime + cooldown) * 1000)
+
+            if next_realtime < next_close:
+                if self._stop.wait(max(next_realtime - now_ms, 0) / 1000):
+                    return
+                self._last_realtime = time.time()
+                self._events.put({'type': REALTIME, 'symbol': None, 'interval': None})
+                continue
+
+            if self._stop.wait((next_close + _CLOSE_DELAY_MS - now_ms) / 1000):
+                return
+            for symbol, interval in self.kline_requests:
+                if interval in INTERVAL_MS and next_close % INTERVAL_MS[interval] == 0:
+                    self._events.put({'type': CONFIRMED, 'symbol': symbol, 'interval': interval})
+
+    def _worker_loop(self):
+        """执行回调：同一批收盘事件合并为一次确认，确认优先于预警"""
+        while not self._stop.is_set():
+            event = self._events.get()
+            if event is None:
+                return
+
+            batch = [event]
+            while True:
+                try:
+                    event = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    return
+                batch.append(event)
+
+            closed = [(item['symbol'], item['interval']) for item in batch if item['type'] == CONFIRMED]
+            if closed:
+                self._dispatch(CONFIRMED, {'type': CONFIRMED, 'closed': closed})
+            else:
+                self._dispatch(REALTIME, batch[-1])
+
+    def _dispatch(self, kind: str, event: Dict[str, Any]):
+        for callback in self._callbacks[kind]:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"信号调度回调失败: {str(e)}")
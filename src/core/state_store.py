@@ -0,0 +1,138 @@
+import copy
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# 增量中表示“无变化”的标记
+_UNCHANGED = object()
+
+
+@dataclass(frozen=True)
+class StateVersion:
+    """一个已发布的状态版本，发布后不再修改"""
+    version: int
+    data: Any
+    payload: str          # data 的JSON编码，发布时只序列化一次
+    published_at: float   # 发布时间（time.time()）
+    delta: Optional[Dict[str, Any]] = None  # 相对上一版本的增量，见 diff_state()
+
+
+_EMPTY = StateVersion(version=0, data=None, payload='null', published_at=0.0)
+
+
+def _diff(old: Any, new: Any, path: List[str], removed: List[List[str]]) -> Any:
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {}
+        for key, value in new.items():
+            if key not in old:
+                changed[key] = value
+                continue
+            child = _diff(old[key], value, path + [key], removed)
+            if child is not _UNCHANGED:
+                changed[key] = child
+        removed.extend(path + [key] for key in old if key not in new)
+        return changed if changed else _UNCHANGED
+    return _UNCHANGED if old == new else new
+
+
+def diff_state(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    计算两个嵌套字典之间的增量
+
+    字典逐键递归比较，其它值（含列表）整体比较、整体替换。
+
+    Returns:
+        {'changed': 只含变化字段的嵌套字典, 'removed': 被删除字段的路径列表}
+    """
+    removed: List[List[str]] = []
+    changed = _diff(old or {}, new, [], removed)
+    return {'changed': {} if changed is _UNCHANGED else changed, 'removed': removed}
+
+
+def apply_delta(state: Optional[Dict[str, Any]], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """把 diff_state() 的增量合并到状态上，返回新的状态（与前端合并逻辑一致）"""
+    result = copy.deepcopy(state or {})
+
+    def merge(target: Dict[str, Any], changed: Dict[str, Any]):
+        for key, value in changed.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                merge(target[key], value)
+            else:
+                target[key] = copy.deepcopy(value)
+
+    merge(result, delta.get('changed', {}))
+    for path in delta.get('removed', []):
+        parent = result
+        for key in path[:-1]:
+            parent = parent.get(key, {})
+        parent.pop(path[-1], None)
+    return result
+
+
+def encode(data: Any) -> str:
+    """JSON编码，无法直接序列化的值（如numpy标量、时间戳）转为字符串"""
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+
+def _json_default(value: Any):
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class StateStore:
+    """
+    版本化的计算状态存储
+
+    由单一生产者发布，任意多个HTTP/WebSocket消费者读取最新版本；
+    读取只取引用，不做计算也不触发上游请求，耗时与消费者数量无关。
+    另外保存生产者顺带得到的状态信息（如API连接状态），供状态接口直接读取。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._current = _EMPTY
+        self._status: Dict[str, Any] = {}
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    def latest(self) -> StateVersion:
+        """最新版本，尚未发布时 version 为0"""
+        return self._current
+
+    def publish(self, data: Any) -> StateVersion:
+        """发布新版本并唤醒等待的消费者；与上一版本都是字典时同时计算增量"""
+        payload = encode(data)
+        with self._cond:
+            previous = self._current
+            delta = None
+            if previous.version and isinstance(previous.data, dict) and isinstance(data, dict):
+                # 经JSON往返，增量中的值与全量payload一致（如numpy标量已转换）
+                delta = json.loads(encode(diff_state(previous.data, data)))
+            self._current = StateVersion(previous.version + 1, data, payload, time.time(), delta)
+            self._cond.notify_all()
+            return self._current
+
+    def wait_for(self, version: int, timeout: Optional[float] = None) -> StateVersion:
+        """
+        等待版本号达到 version
+
+        Returns:
+            最新版本；超时时可能仍低于 version
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._current.version >= version, timeout)
+            return self._current
+
+    def set_status(self, **fields):
+        """更新状态信息"""
+        with self._cond:
+            self._status = {**self._status, **fields, 'updated_at': time.time()}
+
+    def status(self) -> Dict[str, Any]:
+        """状态信息的副本"""
+        return dict(self._status)
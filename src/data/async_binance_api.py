@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Tuple
+
+import pandas as pd
+
+from .binance_api import binance_api, BinanceAPI
+from ..utils.config import config
+from ..utils.logger import logger
+
+
+class AsyncBinanceAPI:
+    """
+    Binance REST API 异步封装
+
+    在有界线程池中并发执行同步 BinanceAPI 的请求，复用其带连接池的
+    keep-alive 会话和K线缓存；返回值与同步接口完全相同。
+    一次检查所需的所有K线和ticker同时发出，总耗时约为一次往返时间。
+    """
+
+    def __init__(self, api: BinanceAPI = None, max_concurrency: int = None):
+        self.api = api or binance_api
+        self.max_concurrency = max_concurrency or config.get_api_config().get('max_concurrency', 8)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix='binance-async')
+
+    def __enter__(self) -> 'AsyncBinanceAPI':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, func, *args) -> Any:
+        # 在调用方的上下文中执行，请求优先级随之传入线程池
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args))
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+        """异步获取K线数据，失败时返回空DataFrame"""
+        return await self._run(self.api.get_klines, symbol, interval, limit)
+
+    async def get_24hr_ticker(self, symbol: str) -> Dict[str, Any]:
+        """异步获取24小时价格统计，失败时返回空字典"""
+        return await self._run(self.api.get_24hr_ticker, symbol)
+
+    async def gather_klines(self, requests: Iterable[Tuple[str, str]],
+                            limit: int = 500) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        并发获取多个 (交易对, 时间间隔) 的K线
+
+        Args:
+            requests: (交易对, 时间间隔) 列表，重复项只请求一次
+            limit: 每个时间框架的K线数量
+
+        Returns:
+            {(交易对, 时间间隔): DataFrame}
+        """
+        keys = list(dict.fromkeys(requests))
+        frames = await asyncio.gather(*(self.get_klines(symbol, interval, limit)
+                                        for symbol, interval in keys))
+        return dict(zip(keys, frames))
+
+    async def gather_tickers(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        获取多个交易对的24小时统计（合并为一次批量请求）
+
+        Returns:
+            {交易对: 24小时统计数据}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        return await self._run(self.api.get_24hr_tickers, symbols)
+
+    async def gather(self, kline_requests: Iterable[Tuple[str, str]], ticker_symbols: Iterable[str],
+                     limit: int = 500) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], pd.DataFrame]]:
+        """同时获取所有ticker和K线，返回 (tickers, klines)"""
+        return tuple(await asyncio.gather(self.gather_tickers(ticker_symbols),
+                                          self.gather_klines(kline_requests, limit)))
+
+    def fetch_all(self, kline_requests: Iterable[Tuple[str, str]], ticker_symbols: Iterable[str],
+                  limit: int = 500) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], pd.DataFrame]]:
+        """
+        同步调用入口：并发获取所有ticker和K线
+
+        Returns:
+            (tickers, klines)
+        """
+        coroutine = self.gather(kline_requests, ticker_symbols, limit)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        # 当前线程已有运行中的事件循环，换到独立线程执行
+        logger.debug("当前线程已有事件循环，在独立线程中并发获取行情")
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+# 全局异步API实例
+async_binance_api = AsyncBinanceAPI()
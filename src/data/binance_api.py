@@ -1,29 +1,211 @@
+import json
 import requests
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Hashable, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
+from .kline_decoder import decode_klines, decode_klines_frame, loads
+from .rate_limiter import (PRIORITY_BACKFILL, PRIORITY_BULK, WeightGovernor, request_priority,
+                           request_weight, weight_governor)
 from ..utils.config import config
 from ..utils.logger import logger
 
+# 各K线周期的毫秒数（不含按自然月计算的 1M）
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+# 单次K线请求的最大数量
+MAX_KLINE_LIMIT = 1000
+
+
+def to_millis(value: Union[datetime, int]) -> int:
+    """datetime（无时区时按UTC处理）或毫秒时间戳转换为毫秒时间戳"""
+    if isinstance(value, datetime):
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize('UTC')
+        return int(timestamp.value // 1_000_000)
+    return int(value)
+
+
+class KlineCache:
+    """
+    K线缓存
+
+    以 (交易对, 时间间隔, 数量) 为键保存K线DataFrame。已收盘的K线不会再变化，
+    只需刷新最后一根形成中的K线；按最近最少使用（LRU）顺序在超出字节预算时淘汰。
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[Dict[str, Any]]:
+        """读取缓存条目并标记为最近使用"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, str, int], df: pd.DataFrame, expires_at: float):
+        """写入缓存条目，超出字节预算时淘汰最久未使用的条目"""
+        nbytes = int(df.memory_usage(index=True).sum())
+        entry = {'df': df, 'expires_at': expires_at, 'nbytes': nbytes}
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous['nbytes']
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['nbytes']
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """当前缓存占用的字节数"""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    相同键的并发调用合并为一次
+
+    第一个调用方执行函数，执行期间到达的相同键调用等待并得到同一个结果（或同一个异常）；
+    执行结束后不保留结果，之后的调用重新执行。
+    """
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls: Dict[Hashable, 'SingleFlight._Call'] = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # 合并掉的调用次数
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
 
 class BinanceAPI:
     """Binance REST API 封装类"""
 
-    def __init__(self):
+    def __init__(self, base_url: str = None, timeout: float = None, governor: WeightGovernor = None):
         api_config = config.get_api_config()
-        self.base_url = api_config.get('base_url', 'https://api.binance.com')
-        self.timeout = api_config.get('timeout', 10)
+        self.base_url = base_url or api_config.get('base_url', 'https://api.binance.com')
+        self.timeout = timeout or api_config.get('timeout', 10)
         self.session = requests.Session()
 
+        # keep-alive连接池，大小覆盖分页下载和异步客户端的并发数
+        pool_size = max(api_config.get('max_workers', 4), api_config.get('max_concurrency', 8))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # K线缓存：形成中的K线最多每 forming_ttl 秒刷新一次
+        cache_config = api_config.get('kline_cache', {})
+        self.kline_cache = None
+        if cache_config.get('enabled', True):
+            self.kline_cache = KlineCache(cache_config.get('max_bytes', 16 * 1024 * 1024))
+        self.forming_ttl = cache_config.get('forming_ttl', 1.0)
+
+        # 24小时统计的缓存时间（秒），同一次检查内共用一次响应
+        self.ticker_ttl = api_config.get('ticker_ttl', 1.0)
+        self._ticker_memo: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._ticker_lock = threading.Lock()
+
+        # 历史K线分页下载的并发数
+        self.max_workers = api_config.get('max_workers', 4)
+
+        # 请求权重控制，默认与其他实例共用（服务器按IP统计）
+        self.governor = governor or weight_governor
+
+        # 相同请求的并发调用共用一次响应（多个线程同时检查同一组K线和ticker）
+        self._inflight = SingleFlight()
+
     def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """发送API请求"""
+        """
+        发送API请求
+
+        相同 (endpoint, params) 的并发调用只发出一次请求，共用解析后的响应，
+        调用方不应修改返回的对象。
+        """
+        key = (endpoint, json.dumps(params or {}, sort_keys=True))
+        return self._inflight.do(key, lambda: self._send_request(endpoint, params))
+
+    def _send_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """发送一次请求（先取得请求权重，响应后同步服务器报告的已用权重）"""
         url = f"{self.base_url}{endpoint}"
         try:
+            self.governor.acquire(request_weight(endpoint, params))
             response = self.session.get(url, params=params, timeout=self.timeout)
+            self.governor.observe(response.status_code, response.headers)
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
         except requests.exceptions.RequestException as e:
             logger.error(f"API请求失败: {endpoint}, 错误: {str(e)}")
             raise
@@ -33,7 +215,10 @@ class BinanceAPI:
 
     def get_klines(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
         """
-        获取K线数据
+        获取K线数据（带缓存）
+
+        首次请求获取完整的 limit 根K线；之后只用 startTime=最后一根K线开盘时间
+        拉取形成中的K线及新产生的K线，与缓存中已收盘的K线合并。
 
         Args:
             symbol: 交易对，如 'BTCUSDT'
@@ -43,41 +228,144 @@ class BinanceAPI:
         Returns:
             包含OHLCV数据的DataFrame
         """
-        params = {
-            'symbol': symbol,
-            'interval': interval,
-            'limit': min(limit, 1000)
-        }
+        limit = min(limit, MAX_KLINE_LIMIT)
+        key = (symbol, interval, limit)
+        entry = None
+        if self.kline_cache is not None and interval in INTERVAL_MS:
+            entry = self.kline_cache.get(key)
 
         try:
-            data = self._make_request('/api/v3/klines', params)
+            if entry is None:
+                df = self._fetch_klines(symbol, interval, limit)
+            elif time.time() < entry['expires_at']:
+                return entry['df'].copy()
+            else:
+                df = self._refresh_klines(symbol, interval, limit, entry['df'])
+
+            if self.kline_cache is not None and interval in INTERVAL_MS and not df.empty:
+                self.kline_cache.put(key, df, self._forming_expiry(df, interval))
+
+            logger.debug(f"获取{symbol} {interval}数据: {len(df)}条记录")
+            return df.copy()
+
+        except Exception as e:
+            logger.error(f"获取K线数据失败: {symbol} {interval}, 错误: {str(e)}")
+            # 返回缓存数据（如果有）
+            if entry is not None:
+                return entry['df'].copy()
+            return pd.DataFrame()
 
-            # 转换为DataFrame
-            df = pd.DataFrame(data, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'count', 'taker_buy_volume',
-                'taker_buy_quote_volume', 'ignore'
-            ])
+    def get_klines_range(self, symbol: str, interval: str,
+                         start: Union[datetime, int], end: Union[datetime, int] = None) -> pd.DataFrame:
+        """
+        分页获取任意时间范围的历史K线（不受单次1000根的限制）
 
-            # 数据类型转换
-            numeric_columns = ['open', 'high', 'low', 'close', 'volume']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        按每页1000根切分 [start, end]，用有界线程池并发请求，
+        合并为按时间排序、去重后的连续DataFrame。
 
-            # 时间转换
-            df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+        Args:
+            symbol: 交易对
+            interval: 时间间隔
+            start: 开始时间（datetime按UTC处理，或毫秒时间戳）
+            end: 结束时间，默认当前时间
 
-            # 只保留需要的列
-            df = df[['open', 'high', 'low', 'close', 'volume']]
+        Returns:
+            包含OHLCV数据的DataFrame，任一页失败时返回空DataFrame
+        """
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"不支持的K线周期: {interval}")
+
+        start_ms = to_millis(start)
+        end_ms = to_millis(end) if end is not None else int(time.time() * 1000)
+        page_ms = INTERVAL_MS[interval] * MAX_KLINE_LIMIT
+        pages = [(page_start, min(page_start + page_ms - 1, end_ms))
+                 for page_start in range(start_ms, end_ms + 1, page_ms)]
+        if not pages:
+            return pd.DataFrame()
 
-            logger.debug(f"获取{symbol} {interval}数据: {len(df)}条记录")
+        def fetch_page(page: Tuple[int, int]) -> pd.DataFrame:
+            # 历史下载排在实时检查之后
+            with request_priority(PRIORITY_BACKFILL):
+                return self._fetch_klines(symbol, interval, MAX_KLINE_LIMIT,
+                                          start_time=page[0], end_time=page[1])
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+                frames = list(executor.map(fetch_page, pages))
+
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames:
+                return pd.DataFrame()
+
+            df = pd.concat(frames)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+
+            logger.debug(f"分页获取{symbol} {interval}数据: {len(pages)}页, {len(df)}条记录")
             return df
 
         except Exception as e:
-            logger.error(f"获取K线数据失败: {symbol} {interval}, 错误: {str(e)}")
+            logger.error(f"分页获取K线数据失败: {symbol} {interval}, 错误: {str(e)}")
             return pd.DataFrame()
 
+    def _fetch_klines(self, symbol: str, interval: str, limit: int,
+                      start_time: int = None, end_time: int = None) -> pd.DataFrame:
+        """请求 /api/v3/klines 并转换为DataFrame"""
+        return decode_klines_frame(self._request_klines(symbol, interval, limit, start_time, end_time))
+
+    def _request_klines(self, symbol: str, interval: str, limit: int,
+                        start_time: int = None, end_time: int = None) -> List[List[Any]]:
+        """请求 /api/v3/klines，返回解析后的行列表"""
+        params = {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit
+        }
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+
+        return self._make_request('/api/v3/klines', params)
+
+    def get_kline_arrays(self, symbol: str, interval: str, limit: int = 500,
+                         start_time: int = None, end_time: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取K线并直接返回数组（不构造DataFrame，不经过K线缓存）
+
+        Returns:
+            (open_time: 开盘时间毫秒 int64, values: 开高低收量 float64 N×5)，失败时为空数组
+        """
+        try:
+            return decode_klines(self._request_klines(symbol, interval, min(limit, MAX_KLINE_LIMIT),
+                                                      start_time, end_time))
+        except Exception as e:
+            logger.error(f"获取K线数据失败: {symbol} {interval}, 错误: {str(e)}")
+            return decode_klines([])
+
+    def _refresh_klines(self, symbol: str, interval: str, limit: int, cached: pd.DataFrame) -> pd.DataFrame:
+        """只拉取缓存中最后一根K线及其之后的K线，与已收盘部分合并"""
+        interval_ms = INTERVAL_MS[interval]
+        last_open = int(cached.index[-1].value // 1_000_000)
+        now_ms = int(time.time() * 1000)
+
+        # 自上次获取以来新增的K线数量（含形成中的一根），超过limit时直接全量获取
+        pending = (now_ms - last_open) // interval_ms + 1
+        if pending >= limit:
+            return self._fetch_klines(symbol, interval, limit)
+
+        fresh = self._fetch_klines(symbol, interval, int(pending) + 1, start_time=last_open)
+        if fresh.empty:
+            return cached
+
+        closed = cached[cached.index < fresh.index[0]]
+        return pd.concat([closed, fresh]).iloc[-limit:]
+
+    def _forming_expiry(self, df: pd.DataFrame, interval: str) -> float:
+        """缓存过期时间：形成中K线的刷新间隔，且不晚于该K线的收盘时间"""
+        last_open = df.index[-1].value // 1_000_000
+        candle_end = (last_open + INTERVAL_MS[interval]) / 1000
+        return min(time.time() + self.forming_ttl, candle_end)
+
     def get_24hr_ticker(self, symbol: str) -> Dict[str, Any]:
         """
         获取24小时价格统计
@@ -88,25 +376,87 @@ class BinanceAPI:
         Returns:
             24小时统计数据
         """
-        params = {'symbol': symbol}
+        return self.get_24hr_tickers([symbol]).get(symbol, {})
+
+    def get_24hr_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取24小时价格统计（一次 symbols=[...] 请求）
+
+        解析后的结果按 ticker_ttl 缓存，同一次检查中的所有调用方共用一次响应。
+
+        Args:
+            symbols: 交易对列表
 
+        Returns:
+            {交易对: 24小时统计数据}，获取失败的交易对对应空字典
+        """
+        symbols = list(dict.fromkeys(symbols))
+        now = time.time()
+        result = {}
+        with self._ticker_lock:
+            for symbol in symbols:
+                memo = self._ticker_memo.get(symbol)
+                if memo is not None and now < memo[0]:
+                    result[symbol] = dict(memo[1])
+
+        missing = [symbol for symbol in symbols if symbol not in result]
+        if not missing:
+            return result
+
+        params = {'symbols': json.dumps(missing, separators=(',', ':'))}
         try:
             data = self._make_request('/api/v3/ticker/24hr', params)
+            if isinstance(data, dict):
+                data = [data]
+
+            expires_at = time.time() + self.ticker_ttl
+            with self._ticker_lock:
+                for item in data:
+                    ticker = self._parse_ticker(item)
+                    self._ticker_memo[ticker.get('symbol')] = (expires_at, ticker)
+                    result[ticker.get('symbol')] = dict(ticker)
+
+        except Exception as e:
+            logger.error(f"获取24小时统计失败: {','.join(missing)}, 错误: {str(e)}")
 
-            # 转换数值类型
-            numeric_fields = ['priceChange', 'priceChangePercent', 'weightedAvgPrice',
-                            'prevClosePrice', 'lastPrice', 'bidPrice', 'askPrice',
-                            'openPrice', 'highPrice', 'lowPrice', 'volume', 'count']
+        return {symbol: result.get(symbol, {}) for symbol in symbols}
 
-            for field in numeric_fields:
-                if field in data:
-                    data[field] = float(data[field])
+    @staticmethod
+    def _parse_ticker(data: Dict[str, Any]) -> Dict[str, Any]:
+        """转换24小时统计中的数值字段（返回新字典，响应对象可能被并发调用共用）"""
+        data = dict(data)
+        numeric_fields = ['priceChange', 'priceChangePercent', 'weightedAvgPrice',
+                        'prevClosePrice', 'lastPrice', 'bidPrice', 'askPrice',
+                        'openPrice', 'highPrice', 'lowPrice', 'volume', 'count']
 
-            return data
+        for field in numeric_fields:
+            if field in data:
+                data[field] = float(data[field])
+
+        return data
+
+    def get_top_symbols(self, quote: str = 'USDT', limit: int = 100) -> List[str]:
+        """
+        按24小时成交额排序的交易对（一次全量 ticker/24hr 请求）
+
+        Args:
+            quote: 计价币种
+            limit: 返回数量
+
+        Returns:
+            交易对列表，获取失败时为空列表
+        """
+        try:
+            with request_priority(PRIORITY_BULK):
+                data = self._make_request('/api/v3/ticker/24hr')
+            pairs = [(item['symbol'], float(item.get('quoteVolume', 0))) for item in data
+                     if item['symbol'].endswith(quote) and float(item.get('lastPrice', 0)) > 0]
+            pairs.sort(key=lambda pair: pair[1], reverse=True)
+            return [symbol for symbol, _ in pairs[:limit]]
 
         except Exception as e:
-            logger.error(f"获取24小时统计失败: {symbol}, 错误: {str(e)}")
-            return {}
+            logger.error(f"获取交易对列表失败: {str(e)}")
+            return []
 
     def calculate_24h_stats(self, symbol: str) -> Dict[str, float]:
         """
@@ -118,29 +468,38 @@ class BinanceAPI:
         """
         try:
             ticker = self.get_24hr_ticker(symbol)
-            if not ticker:
-                return {'volatility': 0.0, 'change_percent': 0.0}
+            return self.stats_from_ticker(ticker)
 
-            high_price = ticker.get('highPrice', 0)
-            low_price = ticker.get('lowPrice', 0)
-            open_price = ticker.get('openPrice', 0)
+        except Exception as e:
+            logger.error(f"计算24小时统计失败: {symbol}, 错误: {str(e)}")
+            return {'volatility': 0.0, 'change_percent': 0.0}
 
-            # 计算24小时振幅 = (最高价 - 最低价) / 最低价
-            volatility = 0.0
-            if low_price > 0:
-                volatility = (high_price - low_price) / low_price
+    @staticmethod
+    def stats_from_ticker(ticker: Dict[str, Any]) -> Dict[str, float]:
+        """
+        由已获取的24小时统计数据计算振幅和涨幅
 
-            # 涨幅百分比
-            change_percent = ticker.get('priceChangePercent', 0.0) / 100.0
+        Returns:
+            {'volatility': 振幅, 'change_percent': 涨幅百分比}
+        """
+        if not ticker:
+            return {'volatility': 0.0, 'change_percent': 0.0}
 
-            return {
-                'volatility': volatility,
-                'change_percent': change_percent
-            }
+        high_price = ticker.get('highPrice', 0)
+        low_price = ticker.get('lowPrice', 0)
 
-        except Exception as e:
-            logger.error(f"计算24小时统计失败: {symbol}, 错误: {str(e)}")
-            return {'volatility': 0.0, 'change_percent': 0.0}
+        # 计算24小时振幅 = (最高价 - 最低价) / 最低价
+        volatility = 0.0
+        if low_price > 0:
+            volatility = (high_price - low_price) / low_price
+
+        # 涨幅百分比
+        change_percent = ticker.get('priceChangePercent', 0.0) / 100.0
+
+        return {
+            'volatility': volatility,
+            'change_percent': change_percent
+        }
 
     def test_connection(self) -> bool:
         """测试API连接"""
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .binance_api import to_millis
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 记录流：信号和tick快照分开存放，查询信号时不必扫描tick
+SIGNALS = 'signals'
+TICKS = 'ticks'
+
+# 时间索引：每条记录一项 (时间毫秒, 行起始偏移, 行字节数)
+INDEX_DTYPE = np.dtype([('time', '<i8'), ('offset', '<i8'), ('size', '<i8')])
+
+TimeLike = Union[datetime, int, None]
+
+
+def _day(time_ms: int) -> str:
+    """记录所在的UTC日期，即分区文件名"""
+    return datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class Journal:
+    """
+    信号与tick快照日志
+
+    只追加的JSONL文件，按 (记录流, UTC日期) 分区，每个分区带一个二进制时间索引。
+    追加时先写数据行再写索引项，中途中断不会让索引指向半条记录。
+    查询用索引二分定位时间范围，一次读出连续的字节块后只解析命中的行；
+    不带过滤条件的 limit 查询只读取索引末尾的 limit 行。无法解析的行记录警告后跳过。
+    记录需按时间顺序追加；同一目录只应有一个写入进程。
+    """
+
+    def __init__(self, root: str = None, enabled: bool = None):
+        self.root = root or config.get('data.journal.path', 'data/journal')
+        self.enabled = config.get('data.journal.enabled', True) if enabled is None else enabled
+        self._lock = threading.Lock()
+
+    def _paths(self, stream: str, day: str):
+        base = os.path.join(self.root, stream, day)
+        return f"{base}.jsonl", f"{base}.idx"
+
+    def append(self, stream: str, record: Dict[str, Any], time_ms: Optional[int] = None) -> bool:
+        """追加一条记录，'time' 字段为毫秒时间戳（默认当前时间）"""
+        if not self.enabled:
+            return False
+        try:
+            time_ms = int(time.time() * 1000) if time_ms is None else to_millis(time_ms)
+            line = json.dumps({'time': time_ms, **record}, ensure_ascii=False, separators=(',', ':'),
+                              default=str).encode('utf-8') + b'\n'
+            data_path, index_path = self._paths(stream, _day(time_ms))
+
+            with self._lock:
+                os.makedirs(os.path.dirname(data_path), exist_ok=True)
+                with open(data_path, 'ab') as f:
+                    offset = f.tell()
+                    f.write(line)
+                entry = np.array([(time_ms, offset, len(line))], dtype=INDEX_DTYPE)
+                with open(index_path, 'ab') as f:
+                    f.write(entry.tobytes())
+            return True
+
+        except Exception as e:
+            logger.error(f"写入日志记录失败: {stream}, 错误: {str(e)}")
+            return False
+
+    def record_signal(self, symbol: str, signal_type: str, signal_id: int, time_ms: Optional[int] = None,
+                      **fields) -> bool:
+        """记录一次信号触发，fields 为附加信息（如阶段、模式、价格）"""
+        record = {'symbol': symbol, 'type': signal_type, 'signal_id': int(signal_id), **fields}
+        return self.append(SIGNALS, record, time_ms)
+
+    def record_tick(self, symbol: str, data: Dict[str, Any], time_ms: Optional[int] = None) -> bool:
+        """记录一次检查时的计算数据快照"""
+        if not data:
+            return False
+        return self.append(TICKS, {'symbol': symbol, 'data': data}, time_ms)
+
+    def _days(self, stream: str, start: Optional[int], end: Optional[int]) -> List[str]:
+        directory = os.path.join(self.root, stream)
+        if not os.path.isdir(directory):
+            return []
+        days = sorted(name[:-len('.idx')] for name in os.listdir(directory) if name.endswith('.idx'))
+        first = _day(start) if start is not None else None
+        last = _day(end) if end is not None else None
+        return [day for day in days if (first is None or day >= first) and (last is None or day <= last)]
+
+    def prune(self, stream: str, keep_days: int, now_ms: Optional[int] = None) -> int:
+        """删除 keep_days 天之前的分区（按UTC日期），返回删除的分区数；keep_days<=0 时不删除"""
+        if keep_days <= 0:
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        cutoff = _day(now_ms - keep_days * 86_400_000)
+        removed = 0
+        try:
+            with self._lock:
+                for day in self._days(stream, None, None):
+                    if day >= cutoff:
+                        break
+                    for path in self._paths(stream, day):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    removed += 1
+        except Exception as e:
+            logger.error(f"清理日志分区失败: {stream}, 错误: {str(e)}")
+        if removed:
+            logger.info(f"已清理{removed}个过期日志分区: {stream}")
+        return removed
+
+    def _read_day(self, stream: str, day: str, start: Optional[int], end: Optional[int],
+                  tail: Optional[int] = None) -> List[Dict[str, Any]]:
+        """读取一个分区内时间范围中的记录，tail 不为 None 时只读最后 tail 条"""
+        data_path, index_path = self._paths(stream, day)
+        index = np.fromfile(index_path, dtype=INDEX_DTYPE)
+        lo = 0 if start is None else int(np.searchsorted(index['time'], start, side='left'))
+        hi = len(index) if end is None else int(np.searchsorted(index['time'], end, side='right'))
+        if tail is not None:
+            lo = max(lo, hi - tail)
+        if lo >= hi:
+            return []
+
+        begin = int(index['offset'][lo])
+        stop = int(index['offset'][hi - 1] + index['size'][hi - 1])
+        with open(data_path, 'rb') as f:
+            f.seek(begin)
+            block = f.read(stop - begin)
+
+        records = []
+        for number, line in enumerate(block.splitlines(), lo):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"跳过无法解析的日志记录: {data_path} 第{number + 1}条")
+        return records
+
+    def _scan(self, stream: str, start: TimeLike, end: TimeLike, match,
+              limit: Optional[int]) -> List[Dict[str, Any]]:
+        """按时间范围读取记录；match 为 None 表示不过滤"""
+        try:
+            start = None if start is None else to_millis(start)
+            end = None if end is None else to_millis(end)
+            days = self._days(stream, start, end)
+
+            if not limit:
+                return [record for day in days for record in self._read_day(stream, day, start, end)
+                        if match is None or match(record)]
+
+            # 只要最近的 limit 条：从最新的分区往前读，够数即停；不过滤时只读索引末尾的行
+            result = []
+            for day in reversed(days):
+                needed = limit - len(result)
+                if match is None:
+                    matched = self._read_day(stream, day, start, end, tail=needed)
+                else:
+                    matched = [record for record in self._read_day(stream, day, start, end) if match(record)]
+                result = matched[-needed:] + result
+                if len(result) >= limit:
+                    break
+            return result
+
+        except Exception as e:
+            logger.error(f"读取日志记录失败: {stream}, 错误: {str(e)}")
+            return []
+
+    def query(self, symbol: str = None, signal_id: int = None, start: TimeLike = None, end: TimeLike = None,
+              signal_type: str = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        查询信号记录
+
+        Args:
+            symbol: 交易对，None 表示不限
+            signal_id: 信号编号，None 表示不限
+            start, end: 时间范围（含两端），datetime（无时区按UTC）或毫秒时间戳
+            signal_type: 'buy' 或 'sell'，None 表示不限
+            limit: 只返回最近的 limit 条
+
+        Returns:
+            按时间排序的信号记录列表
+        """
+        def match(record):
+            return ((symbol is None or record.get('symbol') == symbol)
+                    and (signal_id is None or record.get('signal_id') == signal_id)
+                    and (signal_type is None or record.get('type') == signal_type))
+
+        unfiltered = symbol is None and signal_id is None and signal_type is None
+        return self._scan(SIGNALS, start, end, None if unfiltered else match, limit)
+
+    def last_signal(self, symbol: str = None, signal_id: int = None,
+                    signal_type: str = None) -> Optional[Dict[str, Any]]:
+        """最近一次符合条件的信号，没有时返回 None"""
+        records = self.query(symbol, signal_id, signal_type=signal_type, limit=1)
+        return records[0] if records else None
+
+    def ticks(self, symbol: str = None, start: TimeLike = None, end: TimeLike = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """查询tick快照，参数含义同 query()"""
+        match = None if symbol is None else lambda record: record.get('symbol') == symbol
+        return self._scan(TICKS, start, end, match, limit)
+
+
+# 全局信号日志实例
+journal = Journal()
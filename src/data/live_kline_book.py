@@ -0,0 +1,351 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .binance_api import binance_api, BinanceAPI, INTERVAL_MS
+from .kline_decoder import PRICE_COLUMNS
+from .websocket_client import websocket_client, BinanceWebSocket
+from ..utils.config import config
+from ..utils.logger import logger
+
+# WebSocket 24小时统计字段与REST接口字段的对应关系
+TICKER_FIELDS = {
+    'p': 'priceChange',
+    'P': 'priceChangePercent',
+    'w': 'weightedAvgPrice',
+    'x': 'prevClosePrice',
+    'c': 'lastPrice',
+    'b': 'bidPrice',
+    'a': 'askPrice',
+    'o': 'openPrice',
+    'h': 'highPrice',
+    'l': 'lowPrice',
+    'v': 'volume',
+    'n': 'count',
+}
+
+
+class KlineRing:
+    """
+    单个 (交易对, 时间间隔) 的固定大小K线环形缓冲
+
+    最后一根是形成中的K线：同一开盘时间的事件原地覆盖，
+    新开盘时间的事件追加一根并在满时覆盖最旧的一根。
+    last_closed 记录最后一根是否已收到收盘事件（x=true），REST初始化后未收到事件前为 None。
+    """
+
+    def __init__(self, interval: str, capacity: int):
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.capacity = capacity
+        self.open_time = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(PRICE_COLUMNS)), dtype=np.float64)
+        self.size = 0
+        self.last_closed: Optional[bool] = None
+        self._head = 0  # 最旧一根的位置
+
+    def load(self, df: pd.DataFrame):
+        """用REST获取的K线初始化（只保留最近 capacity 根）"""
+        df = df.iloc[-self.capacity:]
+        count = len(df)
+        self.open_time[:count] = df.index.as_unit('ms').asi8
+        self.values[:count] = df[list(PRICE_COLUMNS)].to_numpy(dtype=np.float64)
+        self.size = count
+        self.last_closed = None
+        self._head = 0
+
+    def _last_index(self) -> int:
+        return (self._head + self.size - 1) % self.capacity
+
+    @property
+    def last_open_time(self) -> Optional[int]:
+        """最后一根K线的开盘时间（毫秒）"""
+        return int(self.open_time[self._last_index()]) if self.size else None
+
+    def apply(self, kline: Dict[str, Any]) -> bool:
+        """
+        应用一条 @kline 事件中的 k 对象
+
+        Returns:
+            False 表示与缓冲中的数据不连续（漏掉了K线），需要重新初始化
+        """
+        open_time = int(kline['t'])
+        row = (float(kline['o']), float(kline['h']), float(kline['l']),
+               float(kline['c']), float(kline['v']))
+
+        last_open = self.last_open_time
+        if last_open is None or open_time > last_open + self.interval_ms:
+            return False
+
+        if open_time == last_open:
+            # 形成中的K线原地更新
+            self.values[self._last_index()] = row
+        elif open_time > last_open:
+            # 上一根已收盘，滚动到新K线
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self._head = (self._head + 1) % self.capacity
+            index = self._last_index()
+            self.open_time[index] = open_time
+            self.values[index] = row
+        else:
+            # 过期事件
+            return True
+
+        self.last_closed = bool(kline.get('x', False))
+        return True
+
+    def arrays(self, limit: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """按时间顺序返回最近 limit 根K线的 (open_time, values) 副本"""
+        count = self.size if limit is None else min(limit, self.size)
+        start = (self._head + self.size - count) % self.capacity
+        order = (start + np.arange(count)) % self.capacity
+        return self.open_time[order], self.values[order]
+
+    def frame(self, limit: int = None) -> pd.DataFrame:
+        """
+        按 BinanceAPI.get_klines 的格式返回最近 limit 根K线
+
+        attrs['last_closed'] 为最后一根是否已收盘（数据流的 x 标志，未知时为 None），
+        指标计算据此选择确认口径的K线，不依赖本地时钟。
+        """
+        open_time, values = self.arrays(limit)
+        index = pd.to_datetime(open_time, unit='ms')
+        index.name = 'timestamp'
+        df = pd.DataFrame(values, index=index, columns=list(PRICE_COLUMNS))
+        df.attrs['last_closed'] = self.last_closed
+        return df
+
+
+# REST初始化失败后的最长重试间隔（秒）
+MAX_RETRY_DELAY = 60
+
+
+class LiveKlineBook:
+    """
+    WebSocket驱动的内存K线簿
+
+    每个 (交易对, 时间间隔) 首次使用时通过REST初始化一次，之后只应用
+    @kline 数据流事件；24小时统计来自 @ticker 数据流。
+    策略和网页读取时不产生网络请求。数据流不连续时自动用REST重新初始化，
+    初始化失败后按指数退避（最长 MAX_RETRY_DELAY 秒）等待下一次数据流事件再重试。
+    连接断开或某个数据流超过 min(一个周期, max_silence 秒) 没有事件时，读取回退到REST，
+    不会在冻结的数据上继续计算。
+    """
+
+    def __init__(self, capacity: int = None, api: BinanceAPI = None, ws: BinanceWebSocket = None):
+        live_config = config.get('data.live_klines', {})
+        self.capacity = capacity or live_config.get('capacity', 500)
+        self.max_silence = live_config.get('max_silence', 120)  # 数据流无事件多少秒后视为过期
+        self.api = api or binance_api
+        self.ws = ws or websocket_client
+        self.running = False
+        self._rings: Dict[Tuple[str, str], KlineRing] = {}
+        self._pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._tickers: Dict[str, Dict[str, Any]] = {}
+        self._updated: Dict[Any, float] = {}  # (交易对, 时间间隔) 或交易对 -> 最近一次数据更新的时间
+        self._failures: Dict[Tuple[str, str], int] = {}  # 连续初始化失败次数
+        self._retry_at: Dict[Tuple[str, str], float] = {}  # 初始化失败后允许重试的时间
+        self._ticker_symbols = set()
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        self._lock = threading.RLock()
+        # 数据流不连续时的REST重新初始化在独立线程执行，不阻塞WebSocket回调线程
+        self._resync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kline-resync')
+
+    def start(self, kline_requests: Iterable[Tuple[str, str]] = (), ticker_symbols: Iterable[str] = ()):
+        """订阅数据流并初始化指定的K线"""
+        self.running = True
+        for symbol in ticker_symbols:
+            self.track_ticker(symbol)
+        for symbol, interval in kline_requests:
+            self.track(symbol, interval)
+        if not self.ws.is_connected:
+            self.ws.connect()
+        logger.info("实时K线簿已启动")
+
+    def stop(self):
+        """停止使用数据流（读取回退到REST），关闭连接且不再自动重连"""
+        self.running = False
+        self.ws.close()
+        logger.info("实时K线簿已停止")
+
+    def add_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]):
+        """注册K线事件监听，参数为 (交易对, 时间间隔, k对象)，在事件写入缓冲后调用"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]):
+        """移除K线事件监听"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def track(self, symbol: str, interval: str):
+        """订阅 @kline 数据流并通过REST初始化环形缓冲"""
+        key = (symbol, interval)
+        with self._lock:
+            # 初始化失败的序列已订阅，由之后的数据流事件按退避时间重试
+            if key in self._rings or key in self._pending or key in self._retry_at:
+                return
+            # 初始化期间到达的事件先缓存，初始化完成后重放
+            self._pending[key] = []
+
+        self.ws.subscribe_kline(symbol, interval,
+                                lambda data, key=key: self._on_kline(key, data))
+        self._bootstrap(key)
+
+    def track_ticker(self, symbol: str):
+        """订阅 @ticker 数据流"""
+        with self._lock:
+            if symbol in self._ticker_symbols:
+                return
+            self._ticker_symbols.add(symbol)
+        self.ws.subscribe_ticker(symbol, self._on_ticker)
+
+    def _bootstrap(self, key: Tuple[str, str]):
+        """REST获取最近 capacity 根K线，重放初始化期间缓存的事件"""
+        symbol, interval = key
+        df = self.api.get_klines(symbol, interval, self.capacity)
+        with self._lock:
+            pending = self._pending.pop(key, [])
+            if df.empty:
+                self._rings.pop(key, None)
+                failures = self._failures.get(key, 0) + 1
+                delay = min(2 ** failures, MAX_RETRY_DELAY)
+                self._failures[key] = failures
+                self._retry_at[key] = time.monotonic() + delay
+                logger.error(f"实时K线簿初始化失败: {symbol} {interval}，{delay}秒后重试")
+                return
+            self._failures.pop(key, None)
+            self._retry_at.pop(key, None)
+
+            ring = KlineRing(interval, self.capacity)
+            ring.load(df)
+            for kline in pending:
+                ring.apply(kline)
+            self._rings[key] = ring
+            self._updated[key] = time.monotonic()
+        logger.debug(f"实时K线簿初始化{symbol} {interval}: {ring.size}条")
+
+    def _on_kline(self, key: Tuple[str, str], data: Dict[str, Any]):
+        """处理 @kline 事件"""
+        kline = data['k']
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].append(kline)
+                return
+            ring = self._rings.get(key)
+            applied = ring is not None and ring.apply(kline)
+            resync = not applied and time.monotonic() >= self._retry_at.get(key, 0.0)
+            if applied:
+                self._updated[key] = time.monotonic()
+            elif resync:
+                self._pending[key] = []
+            listeners = list(self._listeners)
+
+        if resync:
+            # 重新初始化期间到达的事件缓存在 _pending 中，完成后重放
+            logger.warning(f"K线数据流不连续，重新初始化: {key[0]} {key[1]}")
+            self._resync_executor.submit(self._bootstrap, key)
+
+        for listener in listeners:
+            try:
+                listener(key[0], key[1], kline)
+            except Exception as e:
+                logger.error(f"K线事件监听处理失败: {str(e)}")
+
+    def _on_ticker(self, data: Dict[str, Any]):
+        """处理 @ticker 事件，转换为与REST接口相同的字段"""
+        ticker = {'symbol': data['s']}
+        for field, name in TICKER_FIELDS.items():
+            if field in data:
+                ticker[name] = float(data[field])
+        with self._lock:
+            self._tickers[data['s']] = ticker
+            self._updated[data['s']] = time.monotonic()
+
+    def is_live(self, symbol: str, interval: str) -> bool:
+        """该时间框架是否已由数据流维护"""
+        return (symbol, interval) in self._rings
+
+    def ring_frame(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """环形缓冲中的全部K线（格式同 get_klines），未维护时返回 None，不回退到REST"""
+        with self._lock:
+            ring = self._rings.get((symbol, interval))
+            return ring.frame() if ring is not None else None
+
+    def _is_fresh(self, key, max_age: float) -> bool:
+        """连接正常且 max_age 秒内收到过数据（调用方持有锁）"""
+        if not self.ws.is_connected:
+            return False
+        return time.monotonic() - self._updated.get(key, float('-inf')) <= max_age
+
+    def _warn_stale(self, name: str):
+        state = '连接已断开' if not self.ws.is_connected else '数据流无更新'
+        logger.warning(f"实时K线簿{state}，{name} 回退到REST")
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
+        """
+        获取K线数据，格式与 BinanceAPI.get_klines 相同
+
+        已维护的时间框架直接从内存读取；未维护的时间框架在运行中会先订阅，
+        超出缓冲容量、未运行或数据流已过期时回退到REST。
+        """
+        key = (symbol, interval)
+        if self.running and limit <= self.capacity and interval in INTERVAL_MS and key not in self._rings:
+            self.track(symbol, interval)
+
+        with self._lock:
+            ring = self._rings.get(key)
+            if self.running and ring is not None and limit <= ring.capacity:
+                if self._is_fresh(key, min(ring.interval_ms / 1000, self.max_silence)):
+                    return ring.frame(limit)
+                self._warn_stale(f"{symbol} {interval}")
+
+        return self.api.get_klines(symbol, interval, limit)
+
+    def get_24hr_tickers(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """获取24小时统计：数据流中未过期的直接返回，其余通过REST批量获取"""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            live = self._tickers if self.running else {}
+            result = {symbol: dict(live[symbol]) for symbol in symbols
+                      if symbol in live and self._is_fresh(symbol, self.max_silence)}
+            stale = [symbol for symbol in symbols if symbol in live and symbol not in result]
+        if stale:
+            self._warn_stale(f"{len(stale)}个交易对的24小时统计")
+
+        missing = [symbol for symbol in symbols if symbol not in result]
+        if missing:
+            if self.running:
+                for symbol in missing:
+                    self.track_ticker(symbol)
+            result.update(self.api.get_24hr_tickers(missing))
+
+        return {symbol: result.get(symbol, {}) for symbol in symbols}
+
+    def get_24hr_ticker(self, symbol: str) -> Dict[str, Any]:
+        """获取单个交易对的24小时统计"""
+        return self.get_24hr_tickers([symbol]).get(symbol, {})
+
+    def fetch_all(self, kline_requests: Iterable[Tuple[str, str]], ticker_symbols: Iterable[str],
+                  limit: int = 500) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], pd.DataFrame]]:
+        """
+        读取所有ticker和K线（与 AsyncBinanceAPI.fetch_all 相同的返回格式）
+
+        Returns:
+            (tickers, klines)
+        """
+        tickers = self.get_24hr_tickers(ticker_symbols)
+        klines = {key: self.get_klines(key[0], key[1], limit) for key in dict.fromkeys(kline_requests)}
+        return tickers, klines
+
+
+# 全局实时K线簿实例
+live_kline_book = LiveKlineBook()
@@ -0,0 +1,179 @@
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 请求优先级：数值越小越先获得权重
+PRIORITY_LIVE = 0       # 实时信号检查
+PRIORITY_BULK = 1       # 批量初始化（扫描器、交易对列表）
+PRIORITY_BACKFILL = 2   # 历史K线下载
+
+# 当前线程/协程发出请求的优先级，默认为实时
+_priority: contextvars.ContextVar = contextvars.ContextVar('binance_request_priority', default=PRIORITY_LIVE)
+
+# 服务器返回的已用权重（按IP统计的1分钟窗口）
+USED_WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1m'
+
+
+@contextlib.contextmanager
+def request_priority(level: int):
+    """在 with 块内以 level 优先级发出请求（线程池中的任务需在任务内部设置）"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def request_weight(endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """按币安文档估算一次请求的权重"""
+    params = params or {}
+    if endpoint == '/api/v3/klines':
+        return 2
+    if endpoint == '/api/v3/ticker/24hr':
+        if 'symbol' in params:
+            return 2
+        if 'symbols' not in params:
+            return 80
+        count = params['symbols'].count(',') + 1
+        return 2 if count <= 20 else 40 if count <= 100 else 80
+    if endpoint == '/api/v3/exchangeInfo':
+        return 20
+    return 1
+
+
+class RateLimitError(Exception):
+    """预计等待时间超过上限（通常是被限流或封禁期间），请求未发出"""
+
+
+class WeightGovernor:
+    """
+    请求权重令牌桶
+
+    所有请求发出前按权重取令牌，令牌按 (1 - reserve) × 每分钟上限 的速度匀速补充；
+    等待中的请求按优先级排队，实时检查优先于历史下载。
+    响应头中的已用权重会同步到令牌桶（同一IP上其他进程的用量也计入）；
+    收到 429/418 时按 Retry-After 暂停全部请求，没有该头时指数退避。
+    """
+
+    def __init__(self, weight_limit: int = None, reserve: float = None, max_wait: float = None,
+                 window: float = 60.0):
+        """
+        Args:
+            weight_limit: 服务器每分钟的权重上限
+            reserve: 保留比例，令牌桶容量为上限的 (1 - reserve)
+            max_wait: 单个请求最多等待的秒数，超过时抛出 RateLimitError
+            window: 权重上限对应的时间窗口（秒）
+        """
+        rate_config = config.get('api.rate_limit', {})
+        self.weight_limit = weight_limit or rate_config.get('weight_limit', 6000)
+        self.reserve = rate_config.get('reserve', 0.1) if reserve is None else reserve
+        self.max_wait = rate_config.get('max_wait', 10.0) if max_wait is None else max_wait
+        self.window = window
+        self.capacity = self.weight_limit * (1 - self.reserve)
+        self.rate = self.capacity / window
+
+        self.tokens = self.capacity
+        self.server_used: Optional[int] = None
+        self.blocked_until = 0.0
+        self.rejected = 0
+        self._backoff = 0
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, weight: int, priority: int = None, max_wait: float = None):
+        """
+        取得 weight 个令牌，必要时按优先级排队等待
+
+        Raises:
+            RateLimitError: 需要等待的时间超过 max_wait
+        """
+        priority = _priority.get() if priority is None else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+        weight = min(weight, self.capacity)
+        deadline = time.monotonic() + max_wait
+        entry = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry:
+                        wait = max(self.blocked_until - now, (weight - self.tokens) / self.rate, 0.0)
+                        if wait <= 0:
+                            self.tokens -= weight
+                            return
+                    else:
+                        wait = None
+
+                    if now + (wait or 0.0) > deadline:
+                        self.rejected += 1
+                        raise RateLimitError(f"请求权重不足，需等待{wait or max_wait:.1f}秒")
+                    self._cond.wait(min(wait, deadline - now) if wait is not None else deadline - now)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """根据响应状态码和响应头更新令牌桶"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            used = headers.get(USED_WEIGHT_HEADER)
+            if used is not None:
+                self.server_used = int(used)
+                self.tokens = min(self.tokens, self.capacity - self.server_used)
+
+            if status in (418, 429):
+                retry_after = headers.get('Retry-After')
+                self._backoff += 1
+                delay = float(retry_after) if retry_after is not None else min(2 ** self._backoff, 300)
+                self.blocked_until = max(self.blocked_until, now + delay)
+                self.tokens = min(self.tokens, 0.0)
+                logger.warning(f"Binance请求被{'封禁' if status == 418 else '限流'}({status})，"
+                               f"暂停{delay:.0f}秒")
+            elif status < 400:
+                self._backoff = 0
+            self._cond.notify_all()
+
+    def headroom(self) -> Dict[str, Any]:
+        """
+        当前余量
+
+        Returns:
+            {'weight_limit', 'capacity', 'tokens': 可用令牌, 'headroom': 可用比例,
+             'server_used': 服务器报告的已用权重, 'blocked_for': 剩余暂停秒数,
+             'waiting': 排队中的请求数, 'rejected': 累计被拒绝的请求数}
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'weight_limit': self.weight_limit,
+                'capacity': self.capacity,
+                'tokens': round(self.tokens, 1),
+                'headroom': round(max(self.tokens, 0.0) / self.capacity, 4),
+                'server_used': self.server_used,
+                'blocked_for': round(max(self.blocked_until - now, 0.0), 1),
+                'waiting': len(self._waiters),
+                'rejected': self.rejected,
+            }
+
+
+# 全局权重控制器：同一IP的所有请求共用
+weight_governor = WeightGovernor()
@@ -0,0 +1,196 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .binance_api import INTERVAL_MS
+from .live_kline_book import PRICE_COLUMNS
+
+# 基础K线周期：只订阅这一个数据流，其余时间框架由它聚合
+BASE_INTERVAL = '1m'
+
+# 可由基础K线聚合的时间框架：币安这些周期的K线从UTC纪元起按整倍数对齐
+# （4h 为 00:00/04:00/...，1d 为 UTC 0点）；1w 从周一开始、3d 的起点不同，不在其列
+RESAMPLE_INTERVALS = ('3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d')
+
+
+def bucket_start(open_time, interval: str):
+    """K线开盘时间（毫秒）所在的 interval 周期K线的开盘时间，支持标量和数组"""
+    if interval not in RESAMPLE_INTERVALS and interval != BASE_INTERVAL:
+        raise ValueError(f"不支持聚合的K线周期: {interval}")
+    interval_ms = INTERVAL_MS[interval]
+    return open_time // interval_ms * interval_ms
+
+
+def resample_klines(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    把1分钟K线聚合为 interval 周期的K线，格式与 BinanceAPI.get_klines 相同
+
+    开盘价取周期内第一根、收盘价取最后一根、最高/最低取极值、成交量求和。
+    首尾不完整的周期也会输出（最后一根即形成中的K线）。
+    """
+    if df.empty:
+        return df.copy()
+
+    open_time = df.index.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    buckets = bucket_start(open_time, interval)
+    grouped = df[list(PRICE_COLUMNS)].groupby(buckets, sort=True)
+    result = pd.DataFrame({
+        'open': grouped['open'].first(),
+        'high': grouped['high'].max(),
+        'low': grouped['low'].min(),
+        'close': grouped['close'].last(),
+        'volume': grouped['volume'].sum(),
+    })
+    result.index = pd.to_datetime(result.index.to_numpy(), unit='ms')
+    result.index.name = 'timestamp'
+    return result
+
+
+def compare_klines(resampled: pd.DataFrame, reference: pd.DataFrame, rtol: float = 1e-9) -> Dict[str, Any]:
+    """
+    对比聚合结果与REST获取的同周期K线（只比较两边都有的开盘时间）
+
+    Returns:
+        {'compared': 比较的K线数, 'missing': 只在REST中出现的开盘时间数,
+         'mismatched': 任一列不一致的开盘时间列表, 'max_diff': 各列最大相对误差}
+    """
+    common = resampled.index.intersection(reference.index)
+    left = resampled.loc[common, list(PRICE_COLUMNS)].to_numpy(dtype=np.float64)
+    right = reference.loc[common, list(PRICE_COLUMNS)].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diff = np.abs(left - right) / np.maximum(np.abs(right), 1e-12)
+    bad = (diff > rtol).any(axis=1) if len(common) else np.zeros(0, dtype=bool)
+    return {
+        'compared': len(common),
+        'missing': len(reference.index.difference(resampled.index)),
+        'mismatched': list(common[bad]),
+        'max_diff': {name: float(diff[:, n].max()) if len(common) else 0.0
+                     for n, name in enumerate(PRICE_COLUMNS)},
+    }
+
+
+class _Bucket:
+    """一个周期内已收盘的基础K线的聚合"""
+
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, start: int, bar: np.ndarray):
+        self.start = start
+        self.open, self.high, self.low, self.close, self.volume = (float(value) for value in bar)
+
+    def fold(self, bar: np.ndarray):
+        self.high = max(self.high, float(bar[1]))
+        self.low = min(self.low, float(bar[2]))
+        self.close = float(bar[3])
+        self.volume += float(bar[4])
+
+
+class KlineResampler:
+    """
+    由1分钟K线数据流实时聚合更高周期的K线
+
+    每个交易对记录最后一根基础K线（可能仍在形成中）和各周期已收盘部分的聚合。
+    每条 @kline_1m 事件返回各周期对应的 k 对象（字段同币安 @kline 事件），
+    包括形成中的K线；基础K线收盘且是该周期最后一分钟时 'x' 为 True。
+    """
+
+    def __init__(self, intervals: Iterable[str]):
+        self.intervals = [interval for interval in dict.fromkeys(intervals) if interval != BASE_INTERVAL]
+        for interval in self.intervals:
+            bucket_start(0, interval)
+        self.base_ms = INTERVAL_MS[BASE_INTERVAL]
+        # 交易对 -> [开盘时间, OHLCV数组, 是否已计入聚合]
+        self._last: Dict[str, list] = {}
+        self._buckets: Dict[str, Dict[str, _Bucket]] = {}
+        self._broken = set()  # 数据流不连续、等待重新 seed() 的交易对
+
+    @property
+    def seed_limit(self) -> int:
+        """初始化时需要的基础K线根数：覆盖最长周期的一整根K线和形成中的一根"""
+        return max((INTERVAL_MS[interval] // self.base_ms for interval in self.intervals), default=0) + 1
+
+    def reset(self, symbol: str):
+        """丢弃交易对的聚合状态"""
+        self._last.pop(symbol, None)
+        self._buckets.pop(symbol, None)
+        self._broken.discard(symbol)
+
+    def seed(self, symbol: str, df: pd.DataFrame):
+        """
+        用REST获取的1分钟K线初始化聚合状态
+
+        最后一根视为可能仍在形成中；应不少于 seed_limit 根，否则当前周期缺少开头部分。
+        """
+        self.reset(symbol)
+        if df.empty:
+            return
+        open_time = df.index.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        values = df[list(PRICE_COLUMNS)].to_numpy(dtype=np.float64)
+        for n in range(len(df) - 1):
+            self._fold(symbol, int(open_time[n]), values[n])
+        self._last[symbol] = [int(open_time[-1]), values[-1], False]
+
+    def _fold(self, symbol: str, open_time: int, bar: np.ndarray):
+        buckets = self._buckets.setdefault(symbol, {})
+        for interval in self.intervals:
+            start = bucket_start(open_time, interval)
+            bucket = buckets.get(interval)
+            if bucket is None or bucket.start != start:
+                buckets[interval] = _Bucket(start, bar)
+            else:
+                bucket.fold(bar)
+
+    def update(self, symbol: str, kline: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        应用一条 @kline_1m 事件中的 k 对象
+
+        Returns:
+            各周期的 k 对象列表（过期事件返回空列表）；
+            None 表示与上一根基础K线不连续，聚合状态已丢弃，重新 seed() 之前都返回 None
+        """
+        if symbol in self._broken:
+            return None
+        open_time = int(kline['t'])
+        bar = np.array([float(kline[field]) for field in 'ohlcv'])
+        closed = bool(kline.get('x', False))
+
+        last = self._last.get(symbol)
+        if last is not None:
+            if open_time < last[0] or (open_time == last[0] and last[2]):
+                return []
+            if open_time > last[0] + self.base_ms:
+                self.reset(symbol)
+                self._broken.add(symbol)
+                return None
+            if open_time > last[0] and not last[2]:
+                # 上一根的收盘事件未收到，新K线开始说明它已收盘
+                self._fold(symbol, last[0], last[1])
+
+        if closed:
+            self._fold(symbol, open_time, bar)
+        self._last[symbol] = [open_time, bar, closed]
+
+        buckets = self._buckets.get(symbol, {})
+        result = []
+        for interval in self.intervals:
+            interval_ms = INTERVAL_MS[interval]
+            start = bucket_start(open_time, interval)
+            bucket = buckets.get(interval)
+            if bucket is not None and bucket.start != start:
+                bucket = None
+
+            if closed:
+                o, h, l, c, v = bucket.open, bucket.high, bucket.low, bucket.close, bucket.volume
+            elif bucket is None:
+                o, h, l, c, v = (float(value) for value in bar)
+            else:
+                o, h, l, c, v = (bucket.open, max(bucket.high, bar[1]), min(bucket.low, bar[2]),
+                                 float(bar[3]), bucket.volume + float(bar[4]))
+
+            result.append({
+                't': start, 'T': start + interval_ms - 1, 'i': interval,
+                'o': o, 'h': float(h), 'l': float(l), 'c': c, 'v': v,
+                'x': closed and open_time + self.base_ms == start + interval_ms,
+            })
+        return result
@@ -0,0 +1,321 @@
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .binance_api import binance_api, BinanceAPI, INTERVAL_MS, to_millis
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 列名及类型，每列在文件中是一段连续的数组
+COLUMNS = (
+    ('open_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+)
+
+# 文件头：魔数(8字节) + 容量(int64) + 已写入行数(int64) + 上市时间(int64，0表示未知)，补齐到64字节
+_MAGIC = b'BQKLINE1'
+_HEADER = struct.Struct('<8sqqq')
+_HEADER_SIZE = 64
+_ITEM_SIZE = 8
+_MIN_CAPACITY = 1024
+
+
+class KlineStore:
+    """
+    本地K线列式存储
+
+    每个 (交易对, 时间间隔) 对应一个文件。文件按列分区存放 open_time/OHLCV，
+    每列预留 capacity 行的连续空间，读取时按列直接内存映射（零拷贝）。
+    追加时先写数据再更新文件头中的行数，中途中断不会产生半条记录；
+    容量不足时按倍数扩容重写文件。只保存已收盘的K线。
+    已确认交易对在本地第一根K线之前没有数据时，文件头记录其上市时间，之后不再向前补齐。
+    """
+
+    def __init__(self, root: str = None, api: BinanceAPI = None):
+        self.root = root or config.get('data.store_path', 'data/klines')
+        self.api = api or binance_api
+
+    def path(self, symbol: str, interval: str) -> str:
+        """获取 (交易对, 时间间隔) 对应的文件路径"""
+        return os.path.join(self.root, symbol.upper(), f"{interval}.bin")
+
+    def _read_header(self, path: str):
+        """返回 (容量, 行数, 上市时间)"""
+        with open(path, 'rb') as f:
+            magic, capacity, length, listed = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"K线存储文件格式错误: {path}")
+        return capacity, length, listed
+
+    def _write_header(self, f, capacity: int, length: int, listed: int = 0):
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, capacity, length, listed).ljust(_HEADER_SIZE, b'\0'))
+
+    def __contains__(self, key) -> bool:
+        symbol, interval = key
+        return os.path.exists(self.path(symbol, interval))
+
+    def length(self, symbol: str, interval: str) -> int:
+        """已保存的K线数量"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return 0
+        return self._read_header(path)[1]
+
+    def listing_start(self, symbol: str, interval: str) -> Optional[int]:
+        """已记录的上市时间（第一根K线的开盘时间，毫秒），未知时为 None"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        return self._read_header(path)[2] or None
+
+    def load(self, symbol: str, interval: str) -> Dict[str, np.ndarray]:
+        """
+        以只读内存映射方式加载所有列
+
+        Returns:
+            {列名: 一维数组}，没有数据时返回空数组
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+        capacity, length, _ = self._read_header(path)
+        if length == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+        return {
+            name: np.memmap(path, dtype=dtype, mode='r', shape=(length,),
+                            offset=_HEADER_SIZE + index * capacity * _ITEM_SIZE)
+            for index, (name, dtype) in enumerate(COLUMNS)
+        }
+
+    def load_frame(self, symbol: str, interval: str,
+                   start: Union[datetime, int] = None, end: Union[datetime, int] = None) -> pd.DataFrame:
+        """
+        加载为与 BinanceAPI.get_klines 相同格式的DataFrame
+
+        Args:
+            start: 开始时间（含），datetime按UTC处理，或毫秒时间戳
+            end: 结束时间（含）
+        """
+        columns = self.load(symbol, interval)
+        open_time = columns['open_time']
+
+        lo = 0 if start is None else int(np.searchsorted(open_time, to_millis(start), side='left'))
+        hi = len(open_time) if end is None else int(np.searchsorted(open_time, to_millis(end), side='right'))
+        if hi <= lo:
+            return pd.DataFrame()
+
+        index = pd.to_datetime(np.asarray(open_time[lo:hi]), unit='ms')
+        index.name = 'timestamp'
+        return pd.DataFrame({name: columns[name][lo:hi] for name, _ in COLUMNS[1:]}, index=index)
+
+    def first_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """第一根已保存K线的开盘时间（毫秒）"""
+        open_time = self.load(symbol, interval)['open_time']
+        return int(open_time[0]) if len(open_time) else None
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """最后一根已保存K线的开盘时间（毫秒）"""
+        open_time = self.load(symbol, interval)['open_time']
+        return int(open_time[-1]) if len(open_time) else None
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """
+        追加K线，只写入开盘时间晚于已保存最后一根的行
+
+        Args:
+            df: BinanceAPI.get_klines 格式的DataFrame
+
+        Returns:
+            实际追加的行数
+        """
+        if df.empty:
+            return 0
+
+        open_time = df.index.as_unit('ms').asi8
+        last = self.last_open_time(symbol, interval)
+        mask = open_time > last if last is not None else np.ones(len(df), dtype=bool)
+        if not mask.any():
+            return 0
+
+        rows = {'open_time': open_time[mask].astype(np.int64)}
+        for name, dtype in COLUMNS[1:]:
+            rows[name] = df[name].to_numpy(dtype=dtype)[mask]
+
+        self._write_rows(symbol, interval, rows)
+        return int(mask.sum())
+
+    def _write_rows(self, symbol: str, interval: str, rows: Dict[str, np.ndarray]):
+        """将各列数据写入文件末尾，必要时扩容"""
+        path = self.path(symbol, interval)
+        count = len(rows['open_time'])
+
+        if os.path.exists(path):
+            capacity, length, listed = self._read_header(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            capacity, length, listed = 0, 0, 0
+
+        if length + count > capacity:
+            capacity = self._grow(path, capacity, length, max(_MIN_CAPACITY, capacity * 2, length + count))
+
+        with open(path, 'r+b') as f:
+            for index, (name, dtype) in enumerate(COLUMNS):
+                f.seek(_HEADER_SIZE + (index * capacity + length) * _ITEM_SIZE)
+                f.write(np.ascontiguousarray(rows[name], dtype=dtype).tobytes())
+            f.flush()
+            # 数据写完后再更新行数
+            self._write_header(f, capacity, length + count, listed)
+
+    def _grow(self, path: str, capacity: int, length: int, new_capacity: int) -> int:
+        """按新容量重写文件"""
+        if capacity:
+            old, listed = self._read_columns(path, capacity, length), self._read_header(path)[2]
+        else:
+            old, listed = None, 0
+        self._rewrite(path, old, length, new_capacity, listed)
+        return new_capacity
+
+    def _rewrite(self, path: str, columns: Optional[Dict[str, np.ndarray]], length: int, capacity: int,
+                 listed: int):
+        """按容量写出完整文件（写临时文件后原子替换）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            self._write_header(f, capacity, length, listed)
+            f.truncate(_HEADER_SIZE + len(COLUMNS) * capacity * _ITEM_SIZE)
+            if columns is not None:
+                for index, (name, dtype) in enumerate(COLUMNS):
+                    f.seek(_HEADER_SIZE + index * capacity * _ITEM_SIZE)
+                    f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_columns(path: str, capacity: int, length: int) -> Dict[str, np.ndarray]:
+        """读取已写入部分的各列副本（扩容时使用）"""
+        with open(path, 'rb') as f:
+            columns = {}
+            for index, (name, dtype) in enumerate(COLUMNS):
+                f.seek(_HEADER_SIZE + index * capacity * _ITEM_SIZE)
+                columns[name] = np.frombuffer(f.read(length * _ITEM_SIZE), dtype=dtype)
+        return columns
+
+    def prepend(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """
+        在前部插入K线，只写入开盘时间早于已保存第一根的行（重写文件）
+
+        Returns:
+            实际插入的行数
+        """
+        first = self.first_open_time(symbol, interval)
+        if first is None:
+            return self.append(symbol, interval, df)
+        if df.empty:
+            return 0
+
+        open_time = df.index.as_unit('ms').asi8
+        mask = open_time < first
+        count = int(mask.sum())
+        if not count:
+            return 0
+
+        path = self.path(symbol, interval)
+        capacity, length, listed = self._read_header(path)
+        old = self._read_columns(path, capacity, length)
+        columns = {'open_time': np.concatenate([open_time[mask].astype(np.int64), old['open_time']])}
+        for name, dtype in COLUMNS[1:]:
+            columns[name] = np.concatenate([df[name].to_numpy(dtype=dtype)[mask], old[name]])
+
+        if length + count > capacity:
+            capacity = max(_MIN_CAPACITY, capacity * 2, length + count)
+        self._rewrite(path, columns, length + count, capacity, listed)
+        return count
+
+    def _set_listing_start(self, symbol: str, interval: str, listed: int):
+        path = self.path(symbol, interval)
+        capacity, length, _ = self._read_header(path)
+        with open(path, 'r+b') as f:
+            self._write_header(f, capacity, length, listed)
+
+    def prepend_missing(self, symbol: str, interval: str, start: Union[datetime, int]) -> int:
+        """
+        下载并在前部插入 start 到第一根已保存K线之间缺少的K线
+
+        交易对上市晚于 start 时记录上市时间，之后不再重复下载。
+
+        Returns:
+            插入的行数
+        """
+        start_ms = to_millis(start)
+        first = self.first_open_time(symbol, interval)
+        if first is None or first <= start_ms or self.listing_start(symbol, interval) is not None:
+            return 0
+
+        # 范围包含已保存的第一根：请求成功时结果一定非空，结果的起点晚于 start 说明此前没有数据
+        df = self.api.get_klines_range(symbol, interval, start_ms, first)
+        if df.empty:
+            return 0
+        prepended = self.prepend(symbol, interval, df)
+        fetched_first = int(df.index.as_unit('ms').asi8[0])
+        if fetched_first > start_ms:
+            self._set_listing_start(symbol, interval, fetched_first)
+            logger.info(f"{symbol} {interval} 最早的K线开盘于{pd.to_datetime(fetched_first, unit='ms')}，不再向前补齐")
+        logger.debug(f"K线存储前部补齐{symbol} {interval}: {prepended}条")
+        return prepended
+
+    def append_new(self, symbol: str, interval: str, start: Union[datetime, int] = None) -> int:
+        """
+        下载并追加最后一根已保存K线之后的所有已收盘K线
+
+        Args:
+            start: 本地没有数据时的起始时间
+
+        Returns:
+            追加的行数
+        """
+        interval_ms = INTERVAL_MS[interval]
+        last = self.last_open_time(symbol, interval)
+        if last is not None:
+            fetch_from = last + interval_ms
+        elif start is not None:
+            fetch_from = to_millis(start)
+        else:
+            raise ValueError(f"{symbol} {interval} 本地无数据，需要指定起始时间")
+
+        # 只保存已收盘的K线
+        now_ms = int(time.time() * 1000)
+        fetch_to = now_ms // interval_ms * interval_ms - 1
+        if fetch_from > fetch_to:
+            return 0
+
+        df = self.api.get_klines_range(symbol, interval, fetch_from, fetch_to)
+        appended = self.append(symbol, interval, df)
+        logger.debug(f"K线存储追加{symbol} {interval}: {appended}条")
+        return appended
+
+    def load_recent(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        """
+        获取最近 limit 根已收盘K线：本地数据不足时先补齐（前部只下载缺少的范围），再从本地读取
+        """
+        interval_ms = INTERVAL_MS[interval]
+        now_ms = int(time.time() * 1000)
+        start_ms = (now_ms // interval_ms - limit) * interval_ms
+
+        self.append_new(symbol, interval, start=start_ms)
+        self.prepend_missing(symbol, interval, start_ms)
+        return self.load_frame(symbol, interval).iloc[-limit:]
+
+
+# 全局K线存储实例
+kline_store = KlineStore()
@@ -1,12 +1,15 @@
 import json
 import websocket
 import threading
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, Optional
 from datetime import datetime
 
 from ..utils.config import config
 from ..utils.logger import logger
 
+# 每条SUBSCRIBE消息包含的最多数据流数（服务端限制每秒最多5条控制消息）
+_SUBSCRIBE_BATCH = 200
+
 
 class BinanceWebSocket:
     """Binance WebSocket实时数据客户端"""
@@ -20,6 +23,8 @@ class BinanceWebSocket:
         self.is_connected = False
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
+        self.closing = False  # 主动关闭时不自动重连
+        self._reconnect_timer: Optional[threading.Timer] = None
 
     def on_message(self, ws, message):
         """处理WebSocket消息"""
@@ -44,11 +49,19 @@ class BinanceWebSocket:
         logger.warning("WebSocket连接关闭")
         self.is_connected = False
 
-        # 自动重连
+        # 自动重连（主动关闭的除外）
+        if self.closing:
+            return
         if self.reconnect_attempts < self.max_reconnect_attempts:
             self.reconnect_attempts += 1
             logger.info(f"尝试重连 ({self.reconnect_attempts}/{self.max_reconnect_attempts})")
-            threading.Timer(5.0, self.connect).start()
+            self._reconnect_timer = threading.Timer(5.0, self._reconnect)
+            self._reconnect_timer.start()
+
+    def _reconnect(self):
+        """延迟重连，等待期间已主动关闭的不再连接"""
+        if not self.closing:
+            self.connect()
 
     def on_open(self, ws):
         """WebSocket连接建立"""
@@ -62,6 +75,7 @@ class BinanceWebSocket:
 
     def connect(self):
         """建立WebSocket连接"""
+        self.closing = False
         try:
             websocket.enableTrace(False)
             self.ws = websocket.WebSocketApp(
@@ -98,22 +112,57 @@ class BinanceWebSocket:
 
         logger.info(f"订阅K线数据流: {stream}")
 
+    def subscribe_ticker(self, symbol: str, callback: Callable):
+        """
+        订阅24小时统计数据流
+
+        Args:
+            symbol: 交易对，如 'btcusdt'
+            callback: 回调函数
+        """
+        stream = f"{symbol.lower()}@ticker"
+        self.subscriptions[stream] = True
+        self.callbacks[stream] = callback
+
+        if self.is_connected:
+            self.subscribe_streams([stream])
+
+        logger.info(f"订阅24小时统计数据流: {stream}")
+
+    def subscribe_many(self, callbacks: Dict[str, Callable]):
+        """
+        批量订阅数据流（组合流），合并为尽量少的SUBSCRIBE消息
+
+        Args:
+            callbacks: {数据流名称: 回调函数}，如 {'dogeusdt@kline_1m': callback}
+        """
+        for stream, callback in callbacks.items():
+            self.subscriptions[stream] = True
+            self.callbacks[stream] = callback
+
+        if self.is_connected:
+            self.subscribe_streams(list(callbacks))
+
+        logger.info(f"批量订阅数据流: {len(callbacks)}个")
+
     def subscribe_streams(self, streams: list):
-        """订阅多个数据流"""
+        """订阅多个数据流，每 _SUBSCRIBE_BATCH 个合并为一条消息"""
         if not self.ws or not self.is_connected:
             return
 
-        subscribe_msg = {
-            "method": "SUBSCRIBE",
-            "params": streams,
-            "id": int(datetime.now().timestamp())
-        }
+        for start in range(0, len(streams), _SUBSCRIBE_BATCH):
+            batch = streams[start:start + _SUBSCRIBE_BATCH]
+            subscribe_msg = {
+                "method": "SUBSCRIBE",
+                "params": batch,
+                "id": int(datetime.now().timestamp() * 1000) + start
+            }
 
-        try:
-            self.ws.send(json.dumps(subscribe_msg))
-            logger.debug(f"订阅数据流: {streams}")
-        except Exception as e:
-            logger.error(f"订阅数据流失败: {str(e)}")
+            try:
+                self.ws.send(json.dumps(subscribe_msg))
+                logger.debug(f"订阅数据流: {len(batch)}个")
+            except Exception as e:
+                logger.error(f"订阅数据流失败: {str(e)}")
 
     def unsubscribe_stream(self, stream: str):
         """取消订阅数据流"""
@@ -137,7 +186,10 @@ class BinanceWebSocket:
             logger.error(f"取消订阅失败: {str(e)}")
 
     def close(self):
-        """关闭WebSocket连接"""
+        """关闭WebSocket连接，之后不自动重连（再次调用 connect() 恢复）"""
+        self.closing = True
+        if self._reconnect_timer:
+            self._reconnect_timer.cancel()
         if self.ws:
             self.ws.close()
             self.is_connected = False
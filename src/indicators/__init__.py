@@ -1,5 +1,7 @@
 # 技术指标模块
-from .boll import BOLL, calculate_boll
-from .kdj import KDJ, calculate_kdj
+from .boll import BOLL, StreamingBOLL, calculate_boll, boll_arrays
+from .kdj import KDJ, StreamingKDJ, calculate_kdj, kdj_arrays
+from .modes import REALTIME, CONFIRMED, DUAL
 
-__all__ = ['BOLL', 'KDJ', 'calculate_boll', 'calculate_kdj']
\ No newline at end of file
+__all__ = ['BOLL', 'StreamingBOLL', 'KDJ', 'StreamingKDJ', 'calculate_boll', 'boll_arrays', 'calculate_kdj', 'kdj_arrays',
+           'REALTIME', 'CONFIRMED', 'DUAL']
@@ -1,9 +1,56 @@
+import math
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Tuple, Dict, Mapping, Optional
 
+from .modes import DUAL, REALTIME, mode_positions
 from ..utils.config import config
 
+# 接近中轨的容差（0.1%）
+MB_TOLERANCE = 0.001
+
+
+def boll_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                period: int = 20, std_dev: float = 2) -> Dict[str, np.ndarray]:
+    """
+    基于NumPy数组计算完整的布林带序列和影线触及状态
+
+    Args:
+        high: 最高价数组
+        low: 最低价数组
+        close: 收盘价数组；二维数组（交易对 × K线）时每行独立计算
+
+    Returns:
+        {'MB', 'UP', 'DN', 'touch'} 与输入同形状的数组，前 period-1 根为NaN，touch为''
+    """
+    n = close.shape[-1]
+    mb = np.full(close.shape, np.nan)
+    std = np.full(close.shape, np.nan)
+
+    if n >= period:
+        windows = sliding_window_view(close, period, axis=-1)
+        mb[..., period-1:] = windows.mean(axis=-1)
+        std[..., period-1:] = windows.std(axis=-1, ddof=1)
+
+    up = mb + std_dev * std
+    dn = mb - std_dev * std
+
+    # 与 check_touch_condition 相同的优先级：UP > DN > MB
+    with np.errstate(invalid='ignore'):
+        touch = np.select(
+            [high >= up, low <= dn, np.abs(close - mb) <= mb * MB_TOLERANCE],
+            np.array(['UP', 'DN', 'MB'], dtype=object),
+            default=''
+        )
+
+    return {
+        'MB': mb,
+        'UP': up,
+        'DN': dn,
+        'touch': touch
+    }
+
 
 class BOLL:
     """布林带指标计算器 (BOLL, 20, 2)"""
@@ -66,9 +113,6 @@ class BOLL:
             'UP': 触及上轨, 'DN': 触及下轨, 'MB': 接近中轨, '': 无触及
         """
         try:
-            # 容差阈值（0.1%）
-            tolerance = 0.001
-
             # 触及上轨：最高价 >= 上轨
             if high >= up:
                 return 'UP'
@@ -78,7 +122,7 @@ class BOLL:
                 return 'DN'
 
             # 接近中轨：收盘价在中轨附近 ±0.1%
-            mb_range = mb * tolerance
+            mb_range = mb * MB_TOLERANCE
             if abs(close - mb) <= mb_range:
                 return 'MB'
 
@@ -87,42 +131,204 @@ class BOLL:
         except Exception as e:
             raise ValueError(f"布林带触及条件检查失败: {str(e)}")
 
-    def get_latest_values(self, df: pd.DataFrame) -> Dict[str, float]:
+    def get_latest_values(self, df: pd.DataFrame, mode: str = REALTIME) -> Dict[str, float]:
         """
         获取最新的布林带值
 
+        Args:
+            df: 包含OHLCV数据的DataFrame
+            mode: 'realtime' 使用形成中的K线，'confirmed' 使用上一根已收盘的K线，
+                  'dual' 只计算一次序列，同时返回两种口径
+
         Returns:
-            {'MB': 中轨, 'UP': 上轨, 'DN': 下轨, 'close': 收盘价, 'touch': 触及状态}
+            {'MB': 中轨, 'UP': 上轨, 'DN': 下轨, 'close': 收盘价, 'touch': 触及状态}，
+            mode='dual' 时为 {'realtime': {...}, 'confirmed': {...}}
         """
+        positions = mode_positions(mode)
         if df.empty:
-            return {}
+            return {name: {} for name in positions} if mode == DUAL else {}
 
         try:
             boll_df = self.calculate(df)
-            if boll_df.empty:
-                return {}
-
-            latest = boll_df.iloc[-1]
-            current_price = latest['close']
-
-            touch = self.check_touch_condition(
-                latest['high'], latest['low'], latest['close'],
-                latest['MB'], latest['UP'], latest['DN']
-            )
-
-            return {
-                'MB': latest['MB'],
-                'UP': latest['UP'],
-                'DN': latest['DN'],
-                'close': current_price,
-                'high': latest['high'],
-                'low': latest['low'],
-                'touch': touch
-            }
+            values = {name: self.values_at(boll_df, position) for name, position in positions.items()}
+            return values if mode == DUAL else values[mode]
 
         except Exception as e:
             raise ValueError(f"获取布林带最新值失败: {str(e)}")
 
+    def values_at(self, boll_df: pd.DataFrame, position: int) -> Dict[str, float]:
+        """
+        读取已计算序列中某一根K线的布林带值
+
+        Args:
+            boll_df: calculate() 的结果
+            position: K线位置，-1为最后一根
+
+        Returns:
+            {'MB', 'UP', 'DN', 'close', 'high', 'low', 'touch'}，数据不足时返回空字典
+        """
+        if not -len(boll_df) <= position < len(boll_df):
+            return {}
+
+        row = boll_df.iloc[position]
+        touch = self.check_touch_condition(
+            row['high'], row['low'], row['close'],
+            row['MB'], row['UP'], row['DN']
+        )
+
+        return {
+            'MB': row['MB'],
+            'UP': row['UP'],
+            'DN': row['DN'],
+            'close': row['close'],
+            'high': row['high'],
+            'low': row['low'],
+            'touch': touch
+        }
+
+
+
+class StreamingBOLL(BOLL):
+    """
+    布林带增量计算器
+
+    用 period 个槽位的环形缓冲区保存最近的收盘价，配合滑动窗口Welford算法
+    维护均值和离差平方和（M2），每根新K线O(1)更新；标准差与 rolling().std()
+    一致采用样本标准差。正在形成的K线只计算临时值，收盘时才写入缓冲区。
+    """
+
+    # 每提交这么多根K线，用缓冲区精确重算一次均值和M2，消除累计误差
+    RESYNC_INTERVAL = 1000
+
+    def __init__(self, period: int = None, std_dev: float = None):
+        super().__init__(period, std_dev)
+        self._buffer = np.zeros(self.period, dtype=np.float64)
+        self._head = 0  # 下一个写入位置（缓冲区满时即最旧的收盘价）
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
+        self._committed: Dict[str, float] = {}
+        self._forming: Optional[Dict[str, float]] = None
+
+    def reset(self):
+        """清空状态"""
+        self._buffer.fill(0.0)
+        self._head = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
+        self._committed = {}
+        self._forming = None
+
+    def seed(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        用历史K线初始化状态（所有行均视为已收盘）
+
+        Returns:
+            最后一根K线的布林带值，不足一个周期时返回空字典
+        """
+        self.reset()
+        if df.empty:
+            return {}
+
+        closes = df['close'].to_numpy(dtype=np.float64)[-self.period:]
+        self._buffer[:len(closes)] = closes
+        self._count = min(len(df), self.period)
+        self._head = self._count % self.period
+        self._resync()
+        self._count = len(df)
+
+        if self._count < self.period:
+            return {}
+        latest = df.iloc[-1]
+        self._committed = self._band_values(latest['high'], latest['low'], latest['close'], self._mean, self._m2)
+        return dict(self._committed)
+
+    def update(self, bar: Mapping[str, float], closed: bool) -> Dict[str, float]:
+        """
+        推入一根K线
+
+        Args:
+            bar: 含 'high'、'low'、'close' 的K线（dict或Series均可）
+            closed: True表示该K线已收盘并提交；False表示形成中的K线，只更新临时值
+
+        Returns:
+            {'MB', 'UP', 'DN', 'close', 'high', 'low', 'touch'}，不足一个周期时返回空字典
+        """
+        close = float(bar['close'])
+        filled = min(self._count, self.period)
+
+        if filled < self.period:
+            # 缓冲区未满：标准Welford追加
+            n = filled + 1
+            mean = self._mean + (close - self._mean) / n
+            m2 = self._m2 + (close - self._mean) * (close - mean)
+        else:
+            # 缓冲区已满：用新收盘价替换最旧的收盘价
+            oldest = self._buffer[self._head]
+            mean = self._mean + (close - oldest) / self.period
+            m2 = self._m2 + (close - oldest) * (close - mean + oldest - self._mean)
+            n = self.period
+
+        values = {}
+        if n >= self.period:
+            values = self._band_values(bar['high'], bar['low'], close, mean, m2)
+
+        if closed:
+            self._buffer[self._head] = close
+            self._head = (self._head + 1) % self.period
+            self._count += 1
+            self._mean = mean
+            self._m2 = m2
+            self._committed = values
+            self._forming = None
+
+            self._since_resync += 1
+            if self._since_resync >= self.RESYNC_INTERVAL:
+                self._resync()
+        else:
+            self._forming = values or None
+
+        return values
+
+    def latest(self) -> Dict[str, float]:
+        """获取最新布林带值：有形成中的K线时返回其临时值，否则返回最后一次提交的值"""
+        if self._forming is not None:
+            return dict(self._forming)
+        return self.committed()
+
+    def committed(self) -> Dict[str, float]:
+        """最后一根已收盘K线的布林带值（不含形成中的K线），不足一个周期时返回空字典"""
+        return dict(self._committed)
+
+    def _resync(self):
+        """根据缓冲区内容精确重算均值和M2"""
+        window = self._buffer[:min(self._count, self.period)]
+        if len(window):
+            self._mean = float(window.mean())
+            self._m2 = float(((window - self._mean) ** 2).sum())
+        self._since_resync = 0
+
+    def _band_values(self, high: float, low: float, close: float, mean: float, m2: float) -> Dict[str, float]:
+        """由均值和M2生成MB/UP/DN及影线触及状态"""
+        std = math.sqrt(max(m2, 0.0) / (self.period - 1))
+        up = mean + self.std_dev * std
+        dn = mean - self.std_dev * std
+        high = float(high)
+        low = float(low)
+
+        return {
+            'MB': mean,
+            'UP': up,
+            'DN': dn,
+            'close': close,
+            'high': high,
+            'low': low,
+            'touch': self.check_touch_condition(high, low, close, mean, up, dn)
+        }
+
 
 def calculate_boll(df: pd.DataFrame, period: int = 20, std_dev: float = 2) -> pd.DataFrame:
     """便捷函数：计算布林带指标"""
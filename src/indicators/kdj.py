@@ -1,9 +1,85 @@
 import pandas as pd
 import numpy as np
-from typing import Dict
+from numpy.lib.stride_tricks import sliding_window_view
+from collections import deque
+from typing import Dict, Mapping, Optional
 
+from .modes import DUAL, REALTIME, mode_positions
 from ..utils.config import config
 
+# 递推平滑时每块的长度，块内用矩阵乘法一次算完，块间只传递上一块的末值
+_EMA_BLOCK = 64
+
+
+def _smooth(values: np.ndarray, alpha: float, initial: float = 50.0) -> np.ndarray:
+    """
+    向量化计算 y[i] = (1 - alpha) × y[i-1] + alpha × x[i]（y[-1] = initial）
+
+    按块展开递推式：块内 y = W·x + decay × 上一块末值，
+    W为下三角权重矩阵，避免逐行的Python循环。二维输入时沿最后一维（K线）逐行计算。
+    """
+    n = values.shape[-1]
+    out = np.empty(values.shape, dtype=np.float64)
+    if n == 0:
+        return out
+
+    block = min(_EMA_BLOCK, n)
+    decay = (1.0 - alpha) ** np.arange(1, block + 1)
+    lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+    weights = np.where(lags >= 0, alpha * (1.0 - alpha) ** np.clip(lags, 0, None), 0.0)
+
+    prev = np.full(values.shape[:-1] + (1,), initial)
+    for start in range(0, n, block):
+        chunk = values[..., start:start + block]
+        size = chunk.shape[-1]
+        smoothed = chunk @ weights[:size, :size].T + decay[:size] * prev
+        out[..., start:start + size] = smoothed
+        prev = smoothed[..., -1:]
+
+    return out
+
+
+def kdj_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+               k_period: int = 9, k_smooth: int = 3, d_smooth: int = 3) -> Dict[str, np.ndarray]:
+    """
+    基于NumPy数组计算完整的KDJ序列
+
+    Args:
+        high: 最高价数组
+        low: 最低价数组
+        close: 收盘价数组；二维数组（交易对 × K线）时每行独立计算
+
+    Returns:
+        {'RSV', 'K', 'D', 'J', 'KDJ_MAX'} 与输入同形状的数组，前 k_period-1 根的RSV按50处理
+    """
+    n = close.shape[-1]
+    rsv = np.full(close.shape, 50.0)
+
+    if n >= k_period:
+        # 最近N期的最高价和最低价
+        low_min = sliding_window_view(low, k_period, axis=-1).min(axis=-1)
+        high_max = sliding_window_view(high, k_period, axis=-1).max(axis=-1)
+
+        # RSV = (收盘价 - 最近9根最低价) / (最近9根最高价 - 最近9根最低价) × 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            window_rsv = (close[..., k_period-1:] - low_min) / (high_max - low_min) * 100
+
+        # 处理除零情况，默认值50
+        rsv[..., k_period-1:] = np.where(np.isnan(window_rsv), 50.0, window_rsv)
+
+    # K = 2/3 × K前值 + 1/3 × RSV，D = 2/3 × D前值 + 1/3 × K（初始值均为50）
+    k = _smooth(rsv, 1.0 / k_smooth)
+    d = _smooth(k, 1.0 / d_smooth)
+    j = 3 * k - 2 * d
+
+    return {
+        'RSV': rsv,
+        'K': k,
+        'D': d,
+        'J': j,
+        'KDJ_MAX': np.maximum(np.maximum(k, d), j)
+    }
+
 
 class KDJ:
     """KDJ随机指标计算器 (9, 3, 3)"""
@@ -16,7 +92,41 @@ class KDJ:
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        计算KDJ指标
+        计算KDJ指标（NumPy向量化实现）
+
+        Args:
+            df: 包含OHLCV数据的DataFrame
+
+        Returns:
+            包含K、D、J值的DataFrame
+        """
+        if df.empty or len(df) < self.k_period:
+            return pd.DataFrame()
+
+        try:
+            arrays = kdj_arrays(
+                df['high'].to_numpy(dtype=np.float64),
+                df['low'].to_numpy(dtype=np.float64),
+                df['close'].to_numpy(dtype=np.float64),
+                self.k_period, self.k_smooth, self.d_smooth
+            )
+
+            # 复制原数据框并写入指标列
+            result = df.copy()
+            for column in ('RSV', 'K', 'D', 'J', 'KDJ_MAX'):
+                result[column] = arrays[column]
+
+            # 去除前面无效的数据
+            result = result.iloc[self.k_period-1:].copy()
+
+            return result
+
+        except Exception as e:
+            raise ValueError(f"KDJ计算失败: {str(e)}")
+
+    def _calculate_reference(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        逐行计算KDJ指标（原始实现，仅作为向量化结果的对照基准）
 
         Args:
             df: 包含OHLCV数据的DataFrame
@@ -78,33 +188,54 @@ class KDJ:
         except Exception as e:
             raise ValueError(f"KDJ计算失败: {str(e)}")
 
-    def get_latest_values(self, df: pd.DataFrame) -> Dict[str, float]:
+    def get_latest_values(self, df: pd.DataFrame, mode: str = REALTIME) -> Dict[str, float]:
         """
         获取最新的KDJ值
 
+        Args:
+            df: 包含OHLCV数据的DataFrame
+            mode: 'realtime' 使用形成中的K线，'confirmed' 使用上一根已收盘的K线，
+                  'dual' 只计算一次序列，同时返回两种口径
+
         Returns:
-            {'K': K值, 'D': D值, 'J': J值, 'KDJ_MAX': 判断值}
+            {'K': K值, 'D': D值, 'J': J值, 'KDJ_MAX': 判断值}，
+            mode='dual' 时为 {'realtime': {...}, 'confirmed': {...}}
         """
+        positions = mode_positions(mode)
         if df.empty:
-            return {}
+            return {name: {} for name in positions} if mode == DUAL else {}
 
         try:
             kdj_df = self.calculate(df)
-            if kdj_df.empty:
-                return {}
-
-            latest = kdj_df.iloc[-1]
-
-            return {
-                'K': latest['K'],
-                'D': latest['D'],
-                'J': latest['J'],
-                'KDJ_MAX': latest['KDJ_MAX']
-            }
+            values = {name: self.values_at(kdj_df, position) for name, position in positions.items()}
+            return values if mode == DUAL else values[mode]
 
         except Exception as e:
             raise ValueError(f"获取KDJ最新值失败: {str(e)}")
 
+    def values_at(self, kdj_df: pd.DataFrame, position: int) -> Dict[str, float]:
+        """
+        读取已计算序列中某一根K线的KDJ值
+
+        Args:
+            kdj_df: calculate() 的结果
+            position: K线位置，-1为最后一根
+
+        Returns:
+            {'K', 'D', 'J', 'KDJ_MAX'}，数据不足时返回空字典
+        """
+        if not -len(kdj_df) <= position < len(kdj_df):
+            return {}
+
+        row = kdj_df.iloc[position]
+
+        return {
+            'K': row['K'],
+            'D': row['D'],
+            'J': row['J'],
+            'KDJ_MAX': row['KDJ_MAX']
+        }
+
     def check_oversold(self, kdj_max: float, threshold: float = 20) -> bool:
         """
         检查是否超卖
@@ -146,6 +277,116 @@ class KDJ:
             return 'NEUTRAL'
 
 
+
+class StreamingKDJ(KDJ):
+    """
+    KDJ增量计算器
+
+    只保存上一根已收盘K线之后的K、D值和最近 k_period-1 根已收盘K线的高低点，
+    每次更新为O(1)。正在形成的K线只计算临时值，收盘时才提交到状态中。
+    """
+
+    def __init__(self, k_period: int = None, k_smooth: int = None, d_smooth: int = None):
+        super().__init__(k_period, k_smooth, d_smooth)
+        self._highs = deque(maxlen=self.k_period - 1)
+        self._lows = deque(maxlen=self.k_period - 1)
+        self._closed_count = 0
+        self._k = 50.0
+        self._d = 50.0
+        self._forming: Optional[Dict[str, float]] = None
+
+    def reset(self):
+        """清空状态，回到初始值50"""
+        self._highs.clear()
+        self._lows.clear()
+        self._closed_count = 0
+        self._k = 50.0
+        self._d = 50.0
+        self._forming = None
+
+    def seed(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        用历史K线初始化状态（所有行均视为已收盘）
+
+        Args:
+            df: 包含high、low、close列的DataFrame
+
+        Returns:
+            最后一根K线的KDJ值
+        """
+        self.reset()
+        if df.empty:
+            return {}
+
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        arrays = kdj_arrays(high, low, close, self.k_period, self.k_smooth, self.d_smooth)
+
+        self._highs.extend(high[-(self.k_period - 1):].tolist())
+        self._lows.extend(low[-(self.k_period - 1):].tolist())
+        self._closed_count = len(close)
+        self._k = float(arrays['K'][-1])
+        self._d = float(arrays['D'][-1])
+
+        return self.latest()
+
+    def update(self, bar: Mapping[str, float], closed: bool) -> Dict[str, float]:
+        """
+        推入一根K线
+
+        Args:
+            bar: 含 'high'、'low'、'close' 的K线（dict或Series均可）
+            closed: True表示该K线已收盘并提交；False表示形成中的K线，只更新临时值
+
+        Returns:
+            {'K': K值, 'D': D值, 'J': J值, 'KDJ_MAX': 判断值}
+        """
+        high = float(bar['high'])
+        low = float(bar['low'])
+        close = float(bar['close'])
+
+        rsv = 50.0
+        if self._closed_count + 1 >= self.k_period:
+            high_max = max(max(self._highs), high) if self._highs else high
+            low_min = min(min(self._lows), low) if self._lows else low
+            if high_max != low_min:
+                rsv = (close - low_min) / (high_max - low_min) * 100
+
+        k = (1 - 1.0 / self.k_smooth) * self._k + rsv / self.k_smooth
+        d = (1 - 1.0 / self.d_smooth) * self._d + k / self.d_smooth
+        j = 3 * k - 2 * d
+        values = {'K': k, 'D': d, 'J': j, 'KDJ_MAX': max(k, d, j)}
+
+        if closed:
+            self._highs.append(high)
+            self._lows.append(low)
+            self._closed_count += 1
+            self._k = k
+            self._d = d
+            self._forming = None
+        else:
+            self._forming = values
+
+        return values
+
+    def latest(self) -> Dict[str, float]:
+        """
+        获取最新KDJ值：有形成中的K线时返回其临时值，否则返回最后一根已收盘K线的值
+        """
+        if self._forming is not None:
+            return dict(self._forming)
+        return self.committed()
+
+    def committed(self) -> Dict[str, float]:
+        """最后一根已收盘K线的KDJ值（不含形成中的K线），没有已收盘K线时返回空字典"""
+        if self._closed_count == 0:
+            return {}
+
+        j = 3 * self._k - 2 * self._d
+        return {'K': self._k, 'D': self._d, 'J': j, 'KDJ_MAX': max(self._k, self._d, j)}
+
+
 def calculate_kdj(df: pd.DataFrame, k_period: int = 9, k_smooth: int = 3, d_smooth: int = 3) -> pd.DataFrame:
     """便捷函数：计算KDJ指标"""
     kdj = KDJ(k_period, k_smooth, d_smooth)
@@ -0,0 +1,23 @@
+from typing import Dict
+
+# 信号判断口径
+REALTIME = 'realtime'    # 预警：使用正在形成的K线（iloc[-1]）
+CONFIRMED = 'confirmed'  # 确认：使用上一根已收盘的K线（iloc[-2]）
+DUAL = 'dual'            # 同时给出两种口径的结果，按口径分组
+
+# 各口径读取的K线位置
+MODE_POSITIONS = {REALTIME: -1, CONFIRMED: -2}
+
+
+def mode_positions(mode: str) -> Dict[str, int]:
+    """
+    获取口径对应的K线位置
+
+    Returns:
+        {口径: 位置}，DUAL 返回两种口径
+    """
+    if mode == DUAL:
+        return dict(MODE_POSITIONS)
+    if mode not in MODE_POSITIONS:
+        raise ValueError(f"不支持的判断口径: {mode}")
+    return {mode: MODE_POSITIONS[mode]}
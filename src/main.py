@@ -4,14 +4,18 @@
 监控BTC/USDT和DOGE/USDT，生成买卖信号
 """
 
-import time
 import argparse
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from .core.scheduler import SignalScheduler
 from .data.binance_api import binance_api
+from .data.journal import journal
+from .data.live_kline_book import live_kline_book
+from .indicators.modes import CONFIRMED, DUAL, MODE_POSITIONS
 from .strategy.doge_signals import doge_signal_generator
 from .strategy.btc_monitor import btc_monitor
+from .strategy.market_snapshot import MarketSnapshot, default_kline_requests
 from .utils.config import config
 from .utils.logger import logger
 
@@ -21,24 +25,34 @@ class TradingSignalMonitor:
 
     def __init__(self):
         self.is_running = False
-        self.update_interval = config.get('monitoring.update_interval', 60)
+        self.realtime_cooldown = config.get('monitoring.realtime_cooldown', 10)
+        self.scheduler: Optional[SignalScheduler] = None
         self.last_signals = []
 
     def start_monitoring(self):
         """开始监控"""
         self.is_running = True
         logger.info("🚀 交易信号监控启动")
-        logger.info(f"监控间隔: {self.update_interval}秒")
+        logger.info(f"K线收盘时确认信号，实时预警间隔: {self.realtime_cooldown}秒")
 
         # 测试API连接
         if not binance_api.test_connection():
             logger.error("API连接失败，退出监控")
             return
 
+        # 实时K线簿：之后的检查直接读取内存中的K线和ticker
+        if config.get('data.live_klines.enabled', True):
+            live_kline_book.start(default_kline_requests(), config.get_symbols().values())
+
+        # K线收盘时确认；DOGE形成中的K线按冷却时间预警
+        self.scheduler = SignalScheduler(default_kline_requests(), self.realtime_cooldown,
+                                         realtime_symbols=[config.get('symbols.doge', 'DOGEUSDT')])
+        self.scheduler.on_confirmed(lambda event: self.check_signals(trigger=event['type']))
+        self.scheduler.on_realtime(lambda event: self.check_signals(trigger=event['type']))
+
         try:
-            while self.is_running:
-                self.check_signals()
-                time.sleep(self.update_interval)
+            self.check_signals()
+            self.scheduler.run_forever()
 
         except KeyboardInterrupt:
             logger.info("接收到停止信号，正在退出...")
@@ -50,20 +64,39 @@ class TradingSignalMonitor:
     def stop_monitoring(self):
         """停止监控"""
         self.is_running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if live_kline_book.running:
+            live_kline_book.stop()
         logger.info("📴 交易信号监控已停止")
 
-    def check_signals(self):
-        """检查交易信号"""
+    def check_signals(self, trigger: str = None):
+        """
+        检查交易信号
+
+        Args:
+            trigger: 触发来源，'confirmed'（K线收盘）或 'realtime'（形成中的K线）
+        """
         try:
+            if trigger:
+                logger.debug(f"信号检查触发: {trigger}")
+
+            # 本次检查的所有数据只获取一次
+            snapshot = MarketSnapshot.capture()
+
             # 获取详细计算数据用于日志记录
-            btc_data = self.get_btc_calculation_data()
-            doge_data = self.get_doge_calculation_data()
+            btc_data = self.get_btc_calculation_data(snapshot)
+            doge_data = self.get_doge_calculation_data(snapshot)
 
-            # 记录详细计算过程到日志
+            # 记录详细计算过程到日志，计算数据同时写入可查询的信号日志
             logger.calculation_details(btc_data, doge_data)
+            journal.record_tick(config.get('symbols.btc', 'BTCUSDT'), btc_data)
+            journal.record_tick(config.get('symbols.doge', 'DOGEUSDT'), doge_data)
 
-            # 检查所有信号
-            signals = doge_signal_generator.check_all_signals()
+            # K线收盘时按确认口径、形成中按预警口径检查，其余情况两种口径都给出
+            mode = trigger if trigger in MODE_POSITIONS else DUAL
+            signals = doge_signal_generator.check_all_signals(snapshot, mode)
 
             if signals:
                 for signal in signals:
@@ -72,43 +105,31 @@ class TradingSignalMonitor:
                 # 显示当前状态（每10次检查显示一次）
                 current_time = datetime.now()
                 if current_time.minute % 10 == 0:
-                    self.show_status()
+                    self.show_status(snapshot)
 
         except Exception as e:
             logger.error(f"信号检查失败: {str(e)}")
 
-    def get_btc_calculation_data(self) -> dict:
+    def get_btc_calculation_data(self, snapshot: Optional[MarketSnapshot] = None) -> dict:
         """获取BTC计算数据"""
         try:
-            from .data.binance_api import binance_api
-            from .indicators.kdj import KDJ
+            snapshot = snapshot or MarketSnapshot.capture()
+            btc_symbol = config.get('symbols.btc', 'BTCUSDT')
 
             # 获取BTC基础数据
-            btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
+            btc_ticker = snapshot.ticker(btc_symbol)
             if not btc_ticker:
                 return {}
 
             btc_price = float(btc_ticker['lastPrice'])
-            btc_stats = binance_api.calculate_24h_stats('BTCUSDT')
+            btc_stats = snapshot.stats_24h(btc_symbol)
 
             # 获取KDJ数据
-            kdj = KDJ()
-            btc_4h = binance_api.get_klines('BTCUSDT', '4h', 50)
-            btc_1h = binance_api.get_klines('BTCUSDT', '1h', 50)
-
-            kdj_4h = 0
-            kdj_1h = 0
-
-            if not btc_4h.empty:
-                kdj_4h_values = kdj.get_latest_values(btc_4h)
-                kdj_4h = kdj_4h_values.get('KDJ_MAX', 0)
-
-            if not btc_1h.empty:
-                kdj_1h_values = kdj.get_latest_values(btc_1h)
-                kdj_1h = kdj_1h_values.get('KDJ_MAX', 0)
+            kdj_4h = snapshot.indicators_for(btc_symbol, '4h')['kdj'].get('KDJ_MAX', 0)
+            kdj_1h = snapshot.indicators_for(btc_symbol, '1h')['kdj'].get('KDJ_MAX', 0)
 
             # 检查条件
-            btc_conditions = btc_monitor.check_all_conditions()
+            btc_conditions = btc_monitor.check_all_conditions(snapshot)
 
             return {
                 'price': btc_price,
@@ -123,47 +144,34 @@ class TradingSignalMonitor:
             logger.error(f"获取BTC计算数据失败: {str(e)}")
             return {}
 
-    def get_doge_calculation_data(self) -> dict:
+    def get_doge_calculation_data(self, snapshot: Optional[MarketSnapshot] = None) -> dict:
         """获取DOGE计算数据"""
         try:
-            from .data.binance_api import binance_api
-            from .indicators.boll import BOLL
-            from .indicators.kdj import KDJ
+            snapshot = snapshot or MarketSnapshot.capture()
+            doge_symbol = config.get('symbols.doge', 'DOGEUSDT')
 
             # 获取DOGE基础数据
-            doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+            doge_ticker = snapshot.ticker(doge_symbol)
             if not doge_ticker:
                 return {}
 
             doge_price = float(doge_ticker['lastPrice'])
 
-            # 获取技术指标数据
-            boll = BOLL()
-            kdj = KDJ()
-
-            doge_1h = binance_api.get_klines('DOGEUSDT', '1h', 50)
-            doge_15m = binance_api.get_klines('DOGEUSDT', '15m', 50)
-            doge_1m = binance_api.get_klines('DOGEUSDT', '1m', 50)
-
             result = {'price': doge_price}
 
             # 1小时指标
-            if not doge_1h.empty:
-                boll_1h = boll.get_latest_values(doge_1h)
-                kdj_1h = kdj.get_latest_values(doge_1h)
-
-                result['boll_1h'] = boll_1h.get('touch', '无')
-                result['kdj_1h'] = kdj_1h.get('KDJ_MAX', 0)
+            if not snapshot.klines_for(doge_symbol, '1h').empty:
+                indicators_1h = snapshot.indicators_for(doge_symbol, '1h')
+                result['boll_1h'] = indicators_1h['boll'].get('touch', '无')
+                result['kdj_1h'] = indicators_1h['kdj'].get('KDJ_MAX', 0)
 
             # 15分钟指标
-            if not doge_15m.empty:
-                kdj_15m = kdj.get_latest_values(doge_15m)
-                result['kdj_15m'] = kdj_15m.get('KDJ_MAX', 0)
+            if not snapshot.klines_for(doge_symbol, '15m').empty:
+                result['kdj_15m'] = snapshot.indicators_for(doge_symbol, '15m')['kdj'].get('KDJ_MAX', 0)
 
             # 1分钟指标
-            if not doge_1m.empty:
-                kdj_1m = kdj.get_latest_values(doge_1m)
-                result['kdj_1m'] = kdj_1m.get('KDJ_MAX', 0)
+            if not snapshot.klines_for(doge_symbol, '1m').empty:
+                result['kdj_1m'] = snapshot.indicators_for(doge_symbol, '1m')['kdj'].get('KDJ_MAX', 0)
 
             return result
 
@@ -177,29 +185,38 @@ class TradingSignalMonitor:
             signal_type = signal.get('type', 'unknown')
             signal_id = signal.get('signal_id', 0)
             symbol = config.get('symbols.doge', 'DOGEUSDT')
+            stage = self.signal_stage(signal)
 
             # 生成信号消息
             if signal_type == 'buy':
-                logger.signal('Buy', symbol, signal_id)
+                logger.signal('Buy', symbol, signal_id, stage)
             elif signal_type == 'sell':
-                logger.signal('Sell', symbol, signal_id)
+                logger.signal('Sell', symbol, signal_id, stage)
+            journal.record_signal(symbol, signal_type, signal_id, stage=stage, mode=signal.get('mode'))
 
         except Exception as e:
             logger.error(f"处理信号失败: {str(e)}")
 
-    def show_status(self):
+    @staticmethod
+    def signal_stage(signal: Dict) -> str:
+        """信号阶段：已收盘K线确认为'确认'，仅形成中的K线满足为'预警'"""
+        verdicts = signal.get('verdicts')
+        if verdicts is not None:
+            return '确认' if verdicts.get(CONFIRMED) else '预警'
+        return '确认' if signal.get('mode') == CONFIRMED else '预警'
+
+    def show_status(self, snapshot: Optional[MarketSnapshot] = None):
         """显示当前状态"""
         try:
+            snapshot = snapshot or MarketSnapshot.capture()
+
             # 获取BTC状态
-            btc_status = btc_monitor.get_status_summary()
+            btc_status = btc_monitor.get_status_summary(snapshot)
             logger.info(f"📊 {btc_status}")
 
             # 获取DOGE当前价格
-            btc_symbol = config.get('symbols.btc', 'BTCUSDT')
             doge_symbol = config.get('symbols.doge', 'DOGEUSDT')
-
-            btc_stats = binance_api.calculate_24h_stats(btc_symbol)
-            doge_ticker = binance_api.get_24hr_ticker(doge_symbol)
+            doge_ticker = snapshot.ticker(doge_symbol)
 
             if doge_ticker:
                 doge_price = doge_ticker.get('lastPrice', 0)
@@ -219,24 +236,26 @@ class TradingSignalMonitor:
             return False
 
         try:
+            snapshot = MarketSnapshot.capture()
+
             # 检查BTC条件
-            btc_status = btc_monitor.get_status_summary()
+            btc_status = btc_monitor.get_status_summary(snapshot)
             logger.info(f"BTC状态: {btc_status}")
 
-            # 检查DOGE信号
-            signals = doge_signal_generator.check_all_signals()
+            # 检查DOGE信号（预警和确认两种口径）
+            signals = doge_signal_generator.check_all_signals(snapshot, DUAL)
 
             if signals:
                 logger.info(f"检测到 {len(signals)} 个信号:")
                 for signal in signals:
                     signal_type = signal.get('type', 'unknown')
                     signal_id = signal.get('signal_id', 0)
-                    logger.info(f"  - {signal_type.upper()} Signal {signal_id}")
+                    logger.info(f"  - {signal_type.upper()} Signal {signal_id} ({self.signal_stage(signal)})")
             else:
                 logger.info("当前无信号触发")
 
             # 显示当前价格
-            self.show_status()
+            self.show_status(snapshot)
 
             logger.info("✅ 测试模式完成")
             return True
@@ -255,7 +274,7 @@ def parse_arguments():
 使用示例:
   python main.py                 # 启动持续监控
   python main.py --test          # 测试模式（运行一次）
-  python main.py --interval 30   # 设置30秒检查间隔
+  python main.py --interval 30   # 实时预警最多每30秒一次
         """
     )
 
@@ -269,7 +288,7 @@ def parse_arguments():
         '--interval',
         type=int,
         default=None,
-        help='监控间隔（秒），默认使用配置文件设置'
+        help='实时预警的最小间隔（秒），默认使用配置文件设置'
     )
 
     parser.add_argument(
@@ -289,9 +308,9 @@ def main():
     # 创建监控器
     monitor = TradingSignalMonitor()
 
-    # 设置更新间隔
+    # 设置实时预警间隔
     if args.interval:
-        monitor.update_interval = args.interval
+        monitor.realtime_cooldown = args.interval
 
     try:
         if args.test:
@@ -0,0 +1,301 @@
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..data.binance_api import INTERVAL_MS
+from ..indicators.boll import BOLL, boll_arrays
+from ..indicators.kdj import KDJ, kdj_arrays
+from .rules import RuleSet, doge_rules
+from ..utils.config import config
+
+# BTC 24小时统计使用的1小时K线根数
+_WINDOW_24H = 24
+
+
+def open_times_ms(df: pd.DataFrame) -> np.ndarray:
+    """K线开盘时间（毫秒）"""
+    return df.index.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+
+def align_closed(close_times: np.ndarray, grid_times: np.ndarray) -> np.ndarray:
+    """
+    按时点对齐：对每个网格时刻，找到此前已经收盘的最后一根K线
+
+    Args:
+        close_times: 高周期K线的收盘时间（毫秒，升序）
+        grid_times: 网格时刻（毫秒）
+
+    Returns:
+        高周期K线的下标数组，尚无已收盘K线时为-1
+    """
+    return np.searchsorted(close_times, grid_times, side='right') - 1
+
+
+def take_aligned(values: np.ndarray, index: np.ndarray, fill) -> np.ndarray:
+    """按对齐下标取值，下标为-1（尚无已收盘K线）的位置填充 fill"""
+    aligned = values[np.clip(index, 0, None)]
+    aligned[index < 0] = fill
+    return aligned
+
+
+class VectorBacktest:
+    """
+    向量化多时间框架回测
+
+    每个 (交易对, 时间间隔) 的BOLL/KDJ整段只计算一次；以DOGE 1分钟K线的收盘时刻为网格，
+    高周期指标按“网格时刻已收盘的最后一根K线”前向填充对齐，不使用未来数据；
+    BTC 24小时统计由滚动的24根1小时K线计算。所有规则在整个网格上以布尔数组一次求值。
+    """
+
+    def __init__(self, rules: Optional[RuleSet] = None,
+                 boll: Optional[BOLL] = None, kdj: Optional[KDJ] = None):
+        self.rules = rules or doge_rules
+        self.boll = boll or BOLL()
+        self.kdj = kdj or KDJ()
+
+        self.btc_symbol = config.get('symbols.btc', 'BTCUSDT')
+        self.doge_symbol = config.get('symbols.doge', 'DOGEUSDT')
+
+        btc_conditions = config.get_strategy_config().get('btc_conditions', {})
+        self.volatility_threshold = btc_conditions.get('volatility_threshold', 0.03)
+        self.growth_threshold = btc_conditions.get('growth_threshold', 0.01)
+        self.kdj_threshold = btc_conditions.get('kdj_threshold', 50)
+
+    def required_klines(self) -> Tuple[Tuple[str, str], ...]:
+        """回测需要的 (交易对, 时间间隔)"""
+        doge = tuple((self.doge_symbol, interval) for interval in self.rules.timeframes)
+        if (self.doge_symbol, '1m') not in doge:
+            doge += ((self.doge_symbol, '1m'),)
+        return ((self.btc_symbol, '4h'), (self.btc_symbol, '1h')) + doge
+
+    def indicator_arrays(self, df: pd.DataFrame, interval: str) -> Dict[str, np.ndarray]:
+        """整段计算一次指标序列：收盘时间、KDJ_MAX、布林带触及"""
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        kdj_max = kdj_arrays(high, low, close,
+                             self.kdj.k_period, self.kdj.k_smooth, self.kdj.d_smooth)['KDJ_MAX']
+        kdj_max[:self.kdj.k_period - 1] = np.nan  # 与 KDJ.calculate 一致，预热期无值
+
+        return {
+            'close_time': open_times_ms(df) + INTERVAL_MS[interval],
+            'kdj': kdj_max,
+            'touch': boll_arrays(high, low, close, self.boll.period, self.boll.std_dev)['touch'],
+        }
+
+    def btc_24h_arrays(self, btc_1h: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        滚动24根1小时K线的振幅和涨幅（与实时ticker口径一致）
+        振幅 = (最高价 - 最低价) / 最低价，涨幅 = (收盘价 - 开盘价) / 开盘价
+        """
+        n = len(btc_1h)
+        volatility = np.full(n, np.nan)
+        change = np.full(n, np.nan)
+        if n >= _WINDOW_24H:
+            high = btc_1h['high'].to_numpy(dtype=np.float64)
+            low = btc_1h['low'].to_numpy(dtype=np.float64)
+            open_ = btc_1h['open'].to_numpy(dtype=np.float64)
+            close = btc_1h['close'].to_numpy(dtype=np.float64)
+
+            high_24h = sliding_window_view(high, _WINDOW_24H).max(axis=1)
+            low_24h = sliding_window_view(low, _WINDOW_24H).min(axis=1)
+            open_24h = open_[:n - _WINDOW_24H + 1]
+
+            volatility[_WINDOW_24H - 1:] = (high_24h - low_24h) / low_24h
+            change[_WINDOW_24H - 1:] = (close[_WINDOW_24H - 1:] - open_24h) / open_24h
+
+        return {'volatility': volatility, 'change_percent': change}
+
+    def prepare(self, klines: Mapping[Tuple[str, str], pd.DataFrame],
+                start=None, end=None) -> Dict[str, np.ndarray]:
+        """
+        计算并对齐回测所需的全部数组（与阈值无关，可在多组参数间共用）
+
+        Args:
+            klines: {(交易对, 时间间隔): K线DataFrame}，需包含 required_klines() 中的全部数据
+            start: 网格起点（含），早于起点的数据只用于指标预热
+            end: 网格终点（含）
+
+        Returns:
+            等长的一维数组：'time'（网格K线开盘时间，毫秒）、'price'、
+            'btc_volatility'、'btc_change_percent'、'btc_kdj_4h'、'btc_kdj_1h'，
+            以及规则用到的各时间框架 '{时间框架}_touch'、'{时间框架}_kdj'
+        """
+        missing = [key for key in self.required_klines() if klines.get(key) is None or klines[key].empty]
+        if missing:
+            raise ValueError(f"回测数据缺失: {missing}")
+
+        grid_df = klines[(self.doge_symbol, '1m')]
+        if start is not None:
+            grid_df = grid_df[grid_df.index >= pd.Timestamp(start)]
+        if end is not None:
+            grid_df = grid_df[grid_df.index <= pd.Timestamp(end)]
+        grid_open = open_times_ms(grid_df)
+        grid_times = grid_open + INTERVAL_MS['1m']
+
+        arrays = {
+            'time': grid_open,
+            'price': grid_df['close'].to_numpy(dtype=np.float64),
+        }
+
+        # 每个 (交易对, 时间间隔) 只计算一次指标，再对齐到网格
+        for symbol, interval in self.required_klines():
+            series = self.indicator_arrays(klines[(symbol, interval)], interval)
+            index = align_closed(series['close_time'], grid_times)
+            if symbol == self.btc_symbol:
+                arrays[f'btc_kdj_{interval}'] = take_aligned(series['kdj'], index, np.nan)
+                if interval == '1h':
+                    stats = self.btc_24h_arrays(klines[(symbol, interval)])
+                    arrays['btc_volatility'] = take_aligned(stats['volatility'], index, np.nan)
+                    arrays['btc_change_percent'] = take_aligned(stats['change_percent'], index, np.nan)
+            elif interval in self.rules.timeframes:
+                arrays[f'{interval}_touch'] = take_aligned(series['touch'], index, '')
+                arrays[f'{interval}_kdj'] = take_aligned(series['kdj'], index, np.nan)
+
+        return arrays
+
+    def evaluate(self, arrays: Mapping[str, np.ndarray]) -> Dict[str, any]:
+        """
+        按当前阈值和规则对 prepare() 的结果求值
+
+        Returns:
+            {'btc_valid': 布尔数组, 'masks': {(类型, 信号ID): 布尔数组}}
+        """
+        with np.errstate(invalid='ignore'):
+            btc_valid = (
+                ((arrays['btc_volatility'] < self.volatility_threshold)
+                 | (arrays['btc_change_percent'] > self.growth_threshold))
+                & (arrays['btc_kdj_4h'] < self.kdj_threshold)
+                & (arrays['btc_kdj_1h'] < self.kdj_threshold)
+            )
+
+            inputs = {
+                interval: {'touch': arrays[f'{interval}_touch'], 'kdj': arrays[f'{interval}_kdj']}
+                for interval in self.rules.timeframes
+            }
+            verdicts = self.rules.evaluate(inputs, btc_valid)
+
+        size = len(arrays['time'])
+        return {
+            'btc_valid': btc_valid,
+            'masks': {key: np.broadcast_to(result['signal'], size) for key, result in verdicts.items()}
+        }
+
+    def run(self, klines: Mapping[Tuple[str, str], pd.DataFrame],
+            start=None, end=None) -> Dict[str, any]:
+        """
+        运行回测
+
+        Args:
+            klines: {(交易对, 时间间隔): K线DataFrame}，需包含 required_klines() 中的全部数据
+            start: 网格起点（含），早于起点的数据只用于指标预热
+            end: 网格终点（含）
+
+        Returns:
+            {
+                'index': 网格时刻（DOGE 1分钟K线开盘时间）,
+                'price': DOGE收盘价数组,
+                'btc': {'valid', 'volatility', 'change_percent', 'kdj_4h', 'kdj_1h'} 数组,
+                'masks': {(类型, 信号ID): 布尔数组},
+                'signals': 新触发信号的DataFrame（timestamp, type, signal_id, price）
+            }
+        """
+        arrays = self.prepare(klines, start, end)
+        evaluation = self.evaluate(arrays)
+
+        index = pd.to_datetime(arrays['time'], unit='ms')
+        details = {}
+        for interval in self.rules.timeframes:
+            details[f'{interval}_boll'] = arrays[f'{interval}_touch']
+            details[f'{interval}_kdj'] = arrays[f'{interval}_kdj']
+
+        return {
+            'index': index,
+            'price': arrays['price'],
+            'btc': {
+                'valid': evaluation['btc_valid'],
+                'volatility': arrays['btc_volatility'],
+                'change_percent': arrays['btc_change_percent'],
+                'kdj_4h': arrays['btc_kdj_4h'],
+                'kdj_1h': arrays['btc_kdj_1h'],
+            },
+            'masks': evaluation['masks'],
+            'signals': self.signal_events(index, arrays['price'], evaluation['masks'], details),
+        }
+
+    @staticmethod
+    def signal_events(index: pd.Index, price: np.ndarray,
+                      masks: Mapping[Tuple[str, int], np.ndarray],
+                      details: Optional[Mapping[str, np.ndarray]] = None) -> pd.DataFrame:
+        """
+        把信号掩码转换为事件：连续满足的一段只在第一根K线记一次
+
+        Returns:
+            DataFrame（timestamp, type, signal_id, price 及 details 中的各列），按时间排序
+        """
+        details = details or {}
+        frames = []
+        for (signal_type, signal_id), mask in masks.items():
+            rising = rising_edges(mask)
+            if len(rising):
+                frames.append(pd.DataFrame({
+                    'timestamp': index[rising],
+                    'type': signal_type,
+                    'signal_id': signal_id,
+                    'price': price[rising],
+                    **{name: values[rising] for name, values in details.items()}
+                }))
+
+        if not frames:
+            return pd.DataFrame(columns=['timestamp', 'type', 'signal_id', 'price', *details])
+        return pd.concat(frames, ignore_index=True).sort_values(['timestamp', 'type', 'signal_id'],
+                                                               ignore_index=True)
+
+
+def rising_edges(mask: np.ndarray) -> np.ndarray:
+    """布尔数组由False变为True的位置"""
+    mask = np.asarray(mask, dtype=bool)
+    return np.flatnonzero(mask & ~np.concatenate(([False], mask[:-1])))
+
+
+def trade_pnl(price: np.ndarray, masks: Mapping[Tuple[str, int], np.ndarray]) -> Dict[str, float]:
+    """
+    按信号模拟单仓位做多：空仓时任一买入信号新触发即按当根收盘价买入，
+    持仓时任一卖出信号新触发即卖出，期末仍持仓按最后价格计算浮动收益
+
+    Returns:
+        {'trades': 交易次数, 'wins': 盈利次数, 'pnl': 累计收益率（各笔收益率之和）}
+    """
+    size = len(price)
+    buy = np.zeros(size, dtype=bool)
+    sell = np.zeros(size, dtype=bool)
+    for (signal_type, _), mask in masks.items():
+        edges = rising_edges(mask)
+        if signal_type == 'buy':
+            buy[edges] = True
+        elif signal_type == 'sell':
+            sell[edges] = True
+
+    buys = np.flatnonzero(buy)
+    sells = np.flatnonzero(sell)
+    returns = []
+    position = 0
+    while position < len(buys):
+        entry = buys[position]
+        exit_at = np.searchsorted(sells, entry, side='right')
+        exit_index = sells[exit_at] if exit_at < len(sells) else size - 1
+        returns.append(price[exit_index] / price[entry] - 1.0)
+        if exit_at >= len(sells):
+            break
+        # 卖出之后的下一次买入
+        position = np.searchsorted(buys, exit_index, side='right')
+
+    returns = np.asarray(returns)
+    return {
+        'trades': len(returns),
+        'wins': int(np.count_nonzero(returns > 0)),
+        'pnl': float(returns.sum()) if len(returns) else 0.0
+    }
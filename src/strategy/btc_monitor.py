@@ -1,8 +1,10 @@
-from typing import Dict
+from typing import Dict, Optional
 import pandas as pd
 
 from ..data.binance_api import binance_api
 from ..indicators.kdj import KDJ
+from ..indicators.modes import DUAL, REALTIME, mode_positions
+from .market_snapshot import MarketSnapshot, frame_positions
 from ..utils.config import config
 from ..utils.logger import logger
 
@@ -21,11 +23,14 @@ class BTCMonitor:
 
         self.kdj_calculator = KDJ()
 
-    def check_24h_conditions(self) -> Dict[str, any]:
+    def check_24h_conditions(self, snapshot: Optional[MarketSnapshot] = None) -> Dict[str, any]:
         """
         检查BTC 24小时条件
         - 24小时振幅 < 3% 或 24小时涨幅 > 1%
 
+        Args:
+            snapshot: 行情快照，提供时直接使用快照中的ticker，不再请求API
+
         Returns:
             {
                 'valid': bool,
@@ -37,7 +42,10 @@ class BTCMonitor:
         """
         try:
             # 获取24小时统计数据
-            stats = binance_api.calculate_24h_stats(self.symbol)
+            if snapshot is not None:
+                stats = snapshot.stats_24h(self.symbol)
+            else:
+                stats = binance_api.calculate_24h_stats(self.symbol)
             volatility = stats.get('volatility', 0.0)
             change_percent = stats.get('change_percent', 0.0)
 
@@ -69,11 +77,17 @@ class BTCMonitor:
                 'growth_ok': False
             }
 
-    def check_kdj_conditions(self) -> Dict[str, any]:
+    def check_kdj_conditions(self, snapshot: Optional[MarketSnapshot] = None,
+                             mode: str = REALTIME) -> Dict[str, any]:
         """
         检查BTC KDJ条件
         - 4小时KDJ < 50 且 1小时KDJ < 50
 
+        Args:
+            snapshot: 行情快照，提供时直接使用快照中已计算的KDJ，不再请求API
+            mode: 'realtime' 使用形成中的K线，'confirmed' 使用上一根已收盘的K线，
+                  'dual' 同时判断两种口径
+
         Returns:
             {
                 'valid': bool,
@@ -82,92 +96,119 @@ class BTCMonitor:
                 'kdj_4h_ok': bool,
                 'kdj_1h_ok': bool
             }
+            mode='dual' 时为 {'realtime': {...}, 'confirmed': {...}}
         """
+        modes = list(mode_positions(mode))
         try:
-            # 获取4小时KDJ
-            klines_4h = binance_api.get_klines(self.symbol, '4h', 100)
-            kdj_4h_values = self.kdj_calculator.get_latest_values(klines_4h)
-            kdj_4h = kdj_4h_values.get('KDJ_MAX', 0.0)
-
-            # 获取1小时KDJ
-            klines_1h = binance_api.get_klines(self.symbol, '1h', 100)
-            kdj_1h_values = self.kdj_calculator.get_latest_values(klines_1h)
-            kdj_1h = kdj_1h_values.get('KDJ_MAX', 0.0)
-
-            # 检查条件
-            kdj_4h_ok = kdj_4h < self.kdj_threshold
-            kdj_1h_ok = kdj_1h < self.kdj_threshold
-
-            # 两个条件都要满足
-            valid = kdj_4h_ok and kdj_1h_ok
-
-            result = {
-                'valid': valid,
-                'kdj_4h': kdj_4h,
-                'kdj_1h': kdj_1h,
-                'kdj_4h_ok': kdj_4h_ok,
-                'kdj_1h_ok': kdj_1h_ok
-            }
+            if snapshot is not None:
+                kdj_4h_values = {name: snapshot.indicators_for(self.symbol, '4h', name)['kdj'] for name in modes}
+                kdj_1h_values = {name: snapshot.indicators_for(self.symbol, '1h', name)['kdj'] for name in modes}
+            else:
+                # 获取4小时和1小时KDJ（一次计算，两种口径；确认口径与快照相同，取最后一根已收盘的K线）
+                kdj_4h_values = self._latest_kdj('4h')
+                kdj_1h_values = self._latest_kdj('1h')
 
-            logger.debug(f"BTC KDJ条件检查: {result}")
-            return result
+            results = {name: self._kdj_verdict(kdj_4h_values[name], kdj_1h_values[name]) for name in modes}
+            logger.debug(f"BTC KDJ条件检查: {results}")
+            return results if mode == DUAL else results[mode]
 
         except Exception as e:
             logger.error(f"BTC KDJ条件检查失败: {str(e)}")
-            return {
+            failed = {
                 'valid': False,
                 'kdj_4h': 0.0,
                 'kdj_1h': 0.0,
                 'kdj_4h_ok': False,
                 'kdj_1h_ok': False
             }
-
-    def check_all_conditions(self) -> Dict[str, any]:
+            return {name: dict(failed) for name in modes} if mode == DUAL else failed
+
+    def _latest_kdj(self, interval: str) -> Dict[str, Dict[str, float]]:
+        """请求K线并计算两种口径的KDJ值"""
+        klines = binance_api.get_klines(self.symbol, interval, 100)
+        if klines.empty:
+            return {name: {} for name in mode_positions(DUAL)}
+        kdj_df = self.kdj_calculator.calculate(klines)
+        return {name: self.kdj_calculator.values_at(kdj_df, position)
+                for name, position in frame_positions(klines, interval).items()}
+
+    def _kdj_verdict(self, kdj_4h_values: Dict[str, float], kdj_1h_values: Dict[str, float]) -> Dict[str, any]:
+        """由4小时和1小时KDJ值判断KDJ条件"""
+        kdj_4h = kdj_4h_values.get('KDJ_MAX', 0.0)
+        kdj_1h = kdj_1h_values.get('KDJ_MAX', 0.0)
+
+        # 检查条件
+        kdj_4h_ok = kdj_4h < self.kdj_threshold
+        kdj_1h_ok = kdj_1h < self.kdj_threshold
+
+        # 两个条件都要满足
+        return {
+            'valid': kdj_4h_ok and kdj_1h_ok,
+            'kdj_4h': kdj_4h,
+            'kdj_1h': kdj_1h,
+            'kdj_4h_ok': kdj_4h_ok,
+            'kdj_1h_ok': kdj_1h_ok
+        }
+
+    def check_all_conditions(self, snapshot: Optional[MarketSnapshot] = None,
+                             mode: str = REALTIME) -> Dict[str, any]:
         """
         检查所有BTC监控条件
 
+        Args:
+            snapshot: 行情快照，提供时所有条件都基于快照判断
+            mode: 'realtime'、'confirmed'，或 'dual' 同时判断两种口径（24小时条件两者共用）
+
         Returns:
             {
                 'valid': bool,
                 '24h_conditions': dict,
                 'kdj_conditions': dict
             }
+            mode='dual' 时为 {'realtime': {...}, 'confirmed': {...}}
         """
+        modes = list(mode_positions(mode))
         try:
             # 检查24小时条件
-            conditions_24h = self.check_24h_conditions()
+            conditions_24h = self.check_24h_conditions(snapshot)
 
             # 检查KDJ条件
-            kdj_conditions = self.check_kdj_conditions()
-
-            # 所有条件都要满足
-            valid = conditions_24h['valid'] and kdj_conditions['valid']
-
-            result = {
-                'valid': valid,
-                '24h_conditions': conditions_24h,
-                'kdj_conditions': kdj_conditions
-            }
-
-            if valid:
-                logger.info(f"✅ BTC监控条件全部满足")
+            kdj_conditions = self.check_kdj_conditions(snapshot, DUAL)
+
+            results = {}
+            for name in modes:
+                # 所有条件都要满足
+                valid = conditions_24h['valid'] and kdj_conditions[name]['valid']
+                results[name] = {
+                    'valid': valid,
+                    '24h_conditions': conditions_24h,
+                    'kdj_conditions': kdj_conditions[name]
+                }
+
+            # 每次判断只输出一行，各口径的结果写在同一行
+            verdicts = ", ".join(f"{name}: {'满足' if results[name]['valid'] else '不满足'}" for name in modes)
+            if all(results[name]['valid'] for name in modes):
+                logger.info(f"✅ BTC监控条件全部满足（{verdicts}）")
+            elif any(results[name]['valid'] for name in modes):
+                logger.info(f"✅ BTC监控条件部分口径满足（{verdicts}）")
             else:
-                logger.debug(f"❌ BTC监控条件不满足")
+                logger.debug(f"❌ BTC监控条件不满足（{verdicts}）")
 
-            return result
+            return results if mode == DUAL else results[mode]
 
         except Exception as e:
             logger.error(f"BTC监控条件检查失败: {str(e)}")
-            return {
+            failed = {
                 'valid': False,
                 '24h_conditions': {},
                 'kdj_conditions': {}
             }
+            return {name: dict(failed) for name in modes} if mode == DUAL else failed
 
-    def get_status_summary(self) -> str:
+    def get_status_summary(self, snapshot: Optional[MarketSnapshot] = None) -> str:
         """获取BTC监控状态摘要"""
         try:
-            conditions = self.check_all_conditions()
+            conditions = self.check_all_conditions(snapshot)
 
             if not conditions['valid']:
                 return "BTC条件不满足"
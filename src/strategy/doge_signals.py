@@ -1,10 +1,9 @@
 from typing import Dict, List, Optional
-import pandas as pd
 
-from ..data.binance_api import binance_api
-from ..indicators.boll import BOLL
-from ..indicators.kdj import KDJ
 from ..strategy.btc_monitor import btc_monitor
+from .market_snapshot import MarketSnapshot
+from .rules import doge_rules, load_doge_rules
+from ..indicators.modes import CONFIRMED, DUAL, REALTIME, mode_positions
 from ..utils.config import config
 from ..utils.logger import logger
 
@@ -14,345 +13,203 @@ class DOGESignalGenerator:
 
     def __init__(self):
         self.symbol = config.get('symbols.doge', 'DOGEUSDT')
-        strategy_config = config.get_strategy_config()
-        doge_thresholds = strategy_config.get('doge_thresholds', {})
-
-        self.oversold_thresholds = doge_thresholds.get('oversold', [10, 15, 20])
-        self.overbought_threshold = doge_thresholds.get('overbought', 90)
-
-        self.boll_calculator = BOLL()
-        self.kdj_calculator = KDJ()
-
-        # 缓存最近的数据以提高性能
-        self._data_cache = {}
-
-    def _get_market_data(self, interval: str, limit: int = 100) -> pd.DataFrame:
-        """获取市场数据（带缓存）"""
-        cache_key = f"{self.symbol}_{interval}"
-
-        try:
-            # 获取K线数据
-            df = binance_api.get_klines(self.symbol, interval, limit)
-
-            if not df.empty:
-                self._data_cache[cache_key] = df
-
-            return df
-
-        except Exception as e:
-            logger.error(f"获取{self.symbol} {interval}数据失败: {str(e)}")
-            # 返回缓存数据（如果有）
-            return self._data_cache.get(cache_key, pd.DataFrame())
-
-    def _get_indicators(self, df: pd.DataFrame) -> Dict[str, any]:
-        """计算技术指标"""
-        if df.empty:
-            return {'boll': {}, 'kdj': {}}
-
-        try:
-            # 计算BOLL指标
-            boll_values = self.boll_calculator.get_latest_values(df)
-
-            # 计算KDJ指标
-            kdj_values = self.kdj_calculator.get_latest_values(df)
-
-            return {
-                'boll': boll_values,
-                'kdj': kdj_values
+        self.rules = doge_rules
+
+    def reload_rules(self):
+        """配置变更后重新编译买卖规则"""
+        self.rules = load_doge_rules()
+
+    def _timeframe_indicators(self, snapshot: MarketSnapshot,
+                              mode: str = REALTIME) -> Optional[Dict[str, Dict]]:
+        """从快照中取出规则用到的DOGE各时间框架在指定口径下的指标，任一时间框架缺少数据时返回None"""
+        for interval in self.rules.timeframes:
+            if snapshot.klines_for(self.symbol, interval).empty:
+                return None
+
+        return {interval: snapshot.indicators_for(self.symbol, interval, mode)
+                for interval in self.rules.timeframes}
+
+    @staticmethod
+    def _rule_inputs(timeframes: Dict[str, Dict]) -> Dict[str, Dict[str, any]]:
+        """把指标字典转换为规则输入：布林带触及的轨道和KDJ_MAX"""
+        return {
+            interval: {
+                'touch': indicators['boll'].get('touch'),
+                'kdj': indicators['kdj'].get('KDJ_MAX', float('nan'))
             }
+            for interval, indicators in timeframes.items()
+        }
 
-        except Exception as e:
-            logger.error(f"计算技术指标失败: {str(e)}")
-            return {'boll': {}, 'kdj': {}}
-
-    def check_buy_signal_1(self) -> Dict[str, any]:
-        """
-        买入信号1：
-        - BTC条件满足
-        - DOGE 1h触及DN且KDJ<10
-        - DOGE 15m触及DN且KDJ<10
-        - DOGE 1m KDJ<20
-        """
+    def _check_buy_signal(self, signal_id: int, snapshot: Optional[MarketSnapshot],
+                          btc_conditions: Optional[Dict], mode: str) -> Dict[str, any]:
+        """按规则检查单个买入信号"""
         try:
+            snapshot = snapshot or MarketSnapshot.capture()
+
             # 检查BTC条件
-            btc_conditions = btc_monitor.check_all_conditions()
+            if btc_conditions is None:
+                btc_conditions = btc_monitor.check_all_conditions(snapshot, mode)
             if not btc_conditions['valid']:
                 return {'signal': False, 'reason': 'BTC条件不满足'}
 
-            # 获取DOGE各时间框架数据
-            doge_1h = self._get_market_data('1h')
-            doge_15m = self._get_market_data('15m')
-            doge_1m = self._get_market_data('1m')
-
-            if doge_1h.empty or doge_15m.empty or doge_1m.empty:
+            # 取出DOGE各时间框架指标
+            timeframes = self._timeframe_indicators(snapshot, mode)
+            if timeframes is None:
                 return {'signal': False, 'reason': 'DOGE数据获取失败'}
 
-            # 计算指标
-            indicators_1h = self._get_indicators(doge_1h)
-            indicators_15m = self._get_indicators(doge_15m)
-            indicators_1m = self._get_indicators(doge_1m)
-
-            # 检查条件
-            conditions = {
-                'btc_ok': True,
-                'doge_1h_dn': indicators_1h['boll'].get('touch') == 'DN',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 100) < 10,
-                'doge_15m_dn': indicators_15m['boll'].get('touch') == 'DN',
-                'doge_15m_kdj': indicators_15m['kdj'].get('KDJ_MAX', 100) < 10,
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 100) < 20
-            }
-
-            # 所有条件都要满足
-            signal = all(conditions.values())
-
+            verdict = self.rules.evaluate(self._rule_inputs(timeframes))[('buy', signal_id)]
             result = {
-                'signal': signal,
-                'signal_id': 1,
-                'conditions': conditions,
-                'indicators': {
-                    '1h': indicators_1h,
-                    '15m': indicators_15m,
-                    '1m': indicators_1m
-                }
+                'signal': verdict['signal'],
+                'signal_id': signal_id,
+                'mode': mode,
+                'conditions': verdict['conditions'],
+                'indicators': timeframes
             }
 
-            if signal:
-                logger.info("🟢 买入信号1触发")
+            if verdict['signal']:
+                logger.info(f"🟢 买入信号{signal_id}触发（{mode}）")
 
             return result
 
         except Exception as e:
-            logger.error(f"买入信号1检查失败: {str(e)}")
+            logger.error(f"买入信号{signal_id}检查失败: {str(e)}")
             return {'signal': False, 'reason': f'检查失败: {str(e)}'}
 
-    def check_buy_signal_2(self) -> Dict[str, any]:
+    def check_buy_signal_1(self, snapshot: Optional[MarketSnapshot] = None,
+                           btc_conditions: Optional[Dict] = None,
+                           mode: str = REALTIME) -> Dict[str, any]:
         """
-        买入信号2：
+        买入信号1：
         - BTC条件满足
-        - DOGE 1h触及MB且KDJ<15
-        - DOGE 15m触及DN且KDJ<20
-        - DOGE 1m KDJ<20
+        - DOGE 1h触及DN且KDJ<oversold[0]
+        - DOGE 15m触及DN且KDJ<oversold[0]
+        - DOGE 1m KDJ<oversold[3]
         """
-        try:
-            # 检查BTC条件
-            btc_conditions = btc_monitor.check_all_conditions()
-            if not btc_conditions['valid']:
-                return {'signal': False, 'reason': 'BTC条件不满足'}
-
-            # 获取DOGE各时间框架数据
-            doge_1h = self._get_market_data('1h')
-            doge_15m = self._get_market_data('15m')
-            doge_1m = self._get_market_data('1m')
-
-            if doge_1h.empty or doge_15m.empty or doge_1m.empty:
-                return {'signal': False, 'reason': 'DOGE数据获取失败'}
-
-            # 计算指标
-            indicators_1h = self._get_indicators(doge_1h)
-            indicators_15m = self._get_indicators(doge_15m)
-            indicators_1m = self._get_indicators(doge_1m)
-
-            # 检查条件
-            conditions = {
-                'btc_ok': True,
-                'doge_1h_mb': indicators_1h['boll'].get('touch') == 'MB',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 100) < 15,
-                'doge_15m_dn': indicators_15m['boll'].get('touch') == 'DN',
-                'doge_15m_kdj': indicators_15m['kdj'].get('KDJ_MAX', 100) < 20,
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 100) < 20
-            }
-
-            # 所有条件都要满足
-            signal = all(conditions.values())
-
-            result = {
-                'signal': signal,
-                'signal_id': 2,
-                'conditions': conditions,
-                'indicators': {
-                    '1h': indicators_1h,
-                    '15m': indicators_15m,
-                    '1m': indicators_1m
-                }
-            }
-
-            if signal:
-                logger.info("🟢 买入信号2触发")
-
-            return result
+        return self._check_buy_signal(1, snapshot, btc_conditions, mode)
 
-        except Exception as e:
-            logger.error(f"买入信号2检查失败: {str(e)}")
-            return {'signal': False, 'reason': f'检查失败: {str(e)}'}
+    def check_buy_signal_2(self, snapshot: Optional[MarketSnapshot] = None,
+                           btc_conditions: Optional[Dict] = None,
+                           mode: str = REALTIME) -> Dict[str, any]:
+        """
+        买入信号2：
+        - BTC条件满足
+        - DOGE 1h触及MB且KDJ<oversold[1]
+        - DOGE 15m触及DN且KDJ<oversold[2]
+        - DOGE 1m KDJ<oversold[3]
+        """
+        return self._check_buy_signal(2, snapshot, btc_conditions, mode)
 
-    def check_buy_signal_3(self) -> Dict[str, any]:
+    def check_buy_signal_3(self, snapshot: Optional[MarketSnapshot] = None,
+                           btc_conditions: Optional[Dict] = None,
+                           mode: str = REALTIME) -> Dict[str, any]:
         """
         买入信号3：
         - BTC条件满足
-        - DOGE 1h触及MB且KDJ<15
-        - DOGE 15m触及MB且KDJ<20
-        - DOGE 1m KDJ<20
+        - DOGE 1h触及MB且KDJ<oversold[1]
+        - DOGE 15m触及MB且KDJ<oversold[2]
+        - DOGE 1m KDJ<oversold[3]
+        """
+        return self._check_buy_signal(3, snapshot, btc_conditions, mode)
+
+    def check_sell_signals(self, snapshot: Optional[MarketSnapshot] = None,
+                           mode: str = REALTIME) -> List[Dict[str, any]]:
+        """
+        检查所有卖出信号（KDJ阈值为 overbought）：
+        - 卖出信号1: 1h触及UP且KDJ>90, 15m触及MB, 1m KDJ>90
+        - 卖出信号2: 1h触及UP且KDJ>90, 15m触及UP, 1m KDJ>90
+        - 卖出信号3: 1h触及MB且KDJ>90, 15m触及MB, 1m KDJ>90
+        - 卖出信号4: 1h触及MB且KDJ>90, 15m触及UP, 1m KDJ>90
         """
         try:
-            # 检查BTC条件
-            btc_conditions = btc_monitor.check_all_conditions()
-            if not btc_conditions['valid']:
-                return {'signal': False, 'reason': 'BTC条件不满足'}
+            snapshot = snapshot or MarketSnapshot.capture()
 
-            # 获取DOGE各时间框架数据
-            doge_1h = self._get_market_data('1h')
-            doge_15m = self._get_market_data('15m')
-            doge_1m = self._get_market_data('1m')
+            # 取出DOGE各时间框架指标
+            timeframes = self._timeframe_indicators(snapshot, mode)
+            if timeframes is None:
+                return []
 
-            if doge_1h.empty or doge_15m.empty or doge_1m.empty:
-                return {'signal': False, 'reason': 'DOGE数据获取失败'}
+            sell_signals = [
+                {**signal, 'mode': mode}
+                for signal in self.rules.triggered(self._rule_inputs(timeframes))
+                if signal['type'] == 'sell'
+            ]
 
-            # 计算指标
-            indicators_1h = self._get_indicators(doge_1h)
-            indicators_15m = self._get_indicators(doge_15m)
-            indicators_1m = self._get_indicators(doge_1m)
-
-            # 检查条件
-            conditions = {
-                'btc_ok': True,
-                'doge_1h_mb': indicators_1h['boll'].get('touch') == 'MB',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 100) < 15,
-                'doge_15m_mb': indicators_15m['boll'].get('touch') == 'MB',
-                'doge_15m_kdj': indicators_15m['kdj'].get('KDJ_MAX', 100) < 20,
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 100) < 20
-            }
+            if sell_signals:
+                logger.info(f"🔴 检测到{len(sell_signals)}个卖出信号（{mode}）")
 
-            # 所有条件都要满足
-            signal = all(conditions.values())
+            return sell_signals
 
-            result = {
-                'signal': signal,
-                'signal_id': 3,
-                'conditions': conditions,
-                'indicators': {
-                    '1h': indicators_1h,
-                    '15m': indicators_15m,
-                    '1m': indicators_1m
-                }
-            }
+        except Exception as e:
+            logger.error(f"卖出信号检查失败: {str(e)}")
+            return []
 
-            if signal:
-                logger.info("🟢 买入信号3触发")
+    def check_all_signals(self, snapshot: Optional[MarketSnapshot] = None,
+                          mode: str = REALTIME) -> List[Dict[str, any]]:
+        """
+        检查所有买卖信号
 
-            return result
+        Args:
+            snapshot: 行情快照，未提供时获取一次，所有规则共用
+            mode: 'realtime' 预警（形成中的K线），'confirmed' 确认（已收盘的K线），
+                  'dual' 基于同一快照同时判断两种口径
 
+        Returns:
+            触发的信号列表；mode='dual' 时任一口径触发即返回，
+            并带有 'verdicts': {'realtime': bool, 'confirmed': bool}
+        """
+        modes = list(mode_positions(mode))
+
+        try:
+            snapshot = snapshot or MarketSnapshot.capture()
         except Exception as e:
-            logger.error(f"买入信号3检查失败: {str(e)}")
-            return {'signal': False, 'reason': f'检查失败: {str(e)}'}
+            logger.error(f"获取行情快照失败: {str(e)}")
+            return []
 
-    def check_sell_signals(self) -> List[Dict[str, any]]:
-        """检查所有卖出信号"""
-        sell_signals = []
+        # BTC条件只判断一次（两种口径共用同一次计算）
+        btc_conditions = btc_monitor.check_all_conditions(snapshot, DUAL)
 
-        try:
-            # 获取DOGE各时间框架数据
-            doge_1h = self._get_market_data('1h')
-            doge_15m = self._get_market_data('15m')
-            doge_1m = self._get_market_data('1m')
+        by_mode = {name: self._evaluate(snapshot, name, btc_conditions[name]) for name in modes}
+        if mode != DUAL:
+            return by_mode[mode]
 
-            if doge_1h.empty or doge_15m.empty or doge_1m.empty:
-                return []
+        # 合并两种口径：同一信号只保留一条，优先使用确认口径的详情
+        triggered = {name: {(signal['type'], signal['signal_id']) for signal in by_mode[name]} for name in modes}
+        merged = {}
+        for name in (CONFIRMED, REALTIME):
+            for signal in by_mode[name]:
+                merged.setdefault((signal['type'], signal['signal_id']), signal)
 
-            # 计算指标
-            indicators_1h = self._get_indicators(doge_1h)
-            indicators_15m = self._get_indicators(doge_15m)
-            indicators_1m = self._get_indicators(doge_1m)
-
-            # 卖出信号1: 1h触及UP且KDJ>90, 15m触及MB且1hKDJ>90, 1mKDJ>90
-            conditions_1 = {
-                'doge_1h_up': indicators_1h['boll'].get('touch') == 'UP',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 0) > 90,
-                'doge_15m_mb': indicators_15m['boll'].get('touch') == 'MB',
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 0) > 90
-            }
-            if all(conditions_1.values()):
-                sell_signals.append({
-                    'signal': True,
-                    'signal_id': 1,
-                    'type': 'sell',
-                    'conditions': conditions_1
-                })
-
-            # 卖出信号2: 1h触及UP且KDJ>90, 15m触及UP且1hKDJ>90, 1mKDJ>90
-            conditions_2 = {
-                'doge_1h_up': indicators_1h['boll'].get('touch') == 'UP',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 0) > 90,
-                'doge_15m_up': indicators_15m['boll'].get('touch') == 'UP',
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 0) > 90
-            }
-            if all(conditions_2.values()):
-                sell_signals.append({
-                    'signal': True,
-                    'signal_id': 2,
-                    'type': 'sell',
-                    'conditions': conditions_2
-                })
-
-            # 卖出信号3: 1h触及MB且KDJ>90, 15m触及MB且1hKDJ>90, 1mKDJ>90
-            conditions_3 = {
-                'doge_1h_mb': indicators_1h['boll'].get('touch') == 'MB',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 0) > 90,
-                'doge_15m_mb': indicators_15m['boll'].get('touch') == 'MB',
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 0) > 90
-            }
-            if all(conditions_3.values()):
-                sell_signals.append({
-                    'signal': True,
-                    'signal_id': 3,
-                    'type': 'sell',
-                    'conditions': conditions_3
-                })
-
-            # 卖出信号4: 1h触及MB且KDJ>90, 15m触及UP且1hKDJ>90, 1mKDJ>90
-            conditions_4 = {
-                'doge_1h_mb': indicators_1h['boll'].get('touch') == 'MB',
-                'doge_1h_kdj': indicators_1h['kdj'].get('KDJ_MAX', 0) > 90,
-                'doge_15m_up': indicators_15m['boll'].get('touch') == 'UP',
-                'doge_1m_kdj': indicators_1m['kdj'].get('KDJ_MAX', 0) > 90
-            }
-            if all(conditions_4.values()):
-                sell_signals.append({
-                    'signal': True,
-                    'signal_id': 4,
-                    'type': 'sell',
-                    'conditions': conditions_4
-                })
+        signals = []
+        for key in sorted(merged, key=lambda item: (item[0] != 'buy', item[1])):
+            signal = dict(merged[key])
+            signal['verdicts'] = {name: key in triggered[name] for name in (REALTIME, CONFIRMED)}
+            signals.append(signal)
 
-            if sell_signals:
-                logger.info(f"🔴 检测到{len(sell_signals)}个卖出信号")
+        return signals
 
-            return sell_signals
+    def _evaluate(self, snapshot: MarketSnapshot, mode: str, btc_conditions: Dict) -> List[Dict[str, any]]:
+        """按单一口径检查所有买卖信号，规则共用的条件只计算一次"""
+        try:
+            timeframes = self._timeframe_indicators(snapshot, mode)
+            if timeframes is None:
+                return []
 
+            signals = self.rules.triggered(self._rule_inputs(timeframes), btc_conditions['valid'])
         except Exception as e:
-            logger.error(f"卖出信号检查失败: {str(e)}")
+            logger.error(f"信号检查失败: {str(e)}")
             return []
 
-    def check_all_signals(self) -> List[Dict[str, any]]:
-        """检查所有买卖信号"""
-        all_signals = []
-
-        # 检查买入信号
-        buy_signals = [
-            self.check_buy_signal_1(),
-            self.check_buy_signal_2(),
-            self.check_buy_signal_3()
-        ]
-
-        for signal in buy_signals:
-            if signal.get('signal', False):
-                signal['type'] = 'buy'
-                all_signals.append(signal)
+        for signal in signals:
+            signal['mode'] = mode
+            if signal['type'] == 'buy':
+                signal['indicators'] = timeframes
+                logger.info(f"🟢 买入信号{signal['signal_id']}触发（{mode}）")
 
-        # 检查卖出信号
-        sell_signals = self.check_sell_signals()
-        all_signals.extend(sell_signals)
+        sell_count = sum(1 for signal in signals if signal['type'] == 'sell')
+        if sell_count:
+            logger.info(f"🔴 检测到{sell_count}个卖出信号（{mode}）")
 
-        return all_signals
+        return signals
 
 
 # 全局DOGE信号生成器实例
@@ -0,0 +1,117 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from ..data.binance_api import INTERVAL_MS
+from ..data.live_kline_book import LiveKlineBook
+from ..indicators.boll import StreamingBOLL
+from ..indicators.kdj import StreamingKDJ
+from ..indicators.modes import CONFIRMED, REALTIME
+
+# 增量计算的指标：名称 -> 计算器构造函数（参数取配置中的默认值）
+STREAMING_INDICATORS: Dict[str, Callable[[], Any]] = {
+    'boll': StreamingBOLL,
+    'kdj': StreamingKDJ,
+}
+
+
+class _SeriesState:
+    """一个 (交易对, 时间间隔) 的增量指标状态，以及已处理的最后一根K线"""
+
+    def __init__(self, open_time: int, closed: bool, close: float):
+        self.calculators = {name: factory() for name, factory in STREAMING_INDICATORS.items()}
+        self.open_time = open_time
+        self.closed = closed
+        self.close = close
+
+
+class LiveIndicators:
+    """
+    实时K线簿的增量指标
+
+    注册为 LiveKlineBook 的K线事件监听，每个 (交易对, 时间间隔) 维护一组增量计算器：
+    连续的事件O(1)更新；首次收到事件、漏掉收盘事件或数据流重新初始化后，
+    从K线簿的环形缓冲重新初始化。MarketSnapshot 读取这里的值，不再每个tick重算整段序列。
+    """
+
+    _attached = weakref.WeakKeyDictionary()
+    _attach_lock = threading.Lock()
+
+    def __init__(self, book: LiveKlineBook):
+        self.book = book
+        self._states: Dict[Tuple[str, str], _SeriesState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, book: LiveKlineBook) -> 'LiveIndicators':
+        """获取K线簿对应的增量指标，首次调用时创建并注册监听"""
+        with cls._attach_lock:
+            tracker = cls._attached.get(book)
+            if tracker is None:
+                tracker = cls._attached[book] = cls(book)
+                book.add_listener(tracker.on_kline)
+            return tracker
+
+    def on_kline(self, symbol: str, interval: str, kline: Dict[str, Any]):
+        """K线簿的监听回调（事件已写入环形缓冲）"""
+        key = (symbol, interval)
+        open_time = int(kline['t'])
+        closed = bool(kline.get('x'))
+        bar = {'high': float(kline['h']), 'low': float(kline['l']), 'close': float(kline['c'])}
+
+        with self._lock:
+            state = self._states.get(key)
+            # 同一根形成中K线的更新，或上一根已收盘后的下一根
+            continuous = state is not None and (
+                (open_time == state.open_time and not state.closed)
+                or (open_time == state.open_time + INTERVAL_MS[interval] and state.closed))
+            if not continuous:
+                self._seed(key, open_time)
+                return
+
+            for calculator in state.calculators.values():
+                calculator.update(bar, closed)
+            state.open_time, state.closed, state.close = open_time, closed, bar['close']
+
+    def _seed(self, key: Tuple[str, str], open_time: int):
+        """从环形缓冲重新初始化（调用方持有锁）；缓冲与事件不一致（重新初始化中）时丢弃状态"""
+        df = self.book.ring_frame(*key)
+        if df is None or df.empty or int(df.index[-1].value // 1_000_000) != open_time:
+            self._states.pop(key, None)
+            return
+
+        closed = bool(df.attrs.get('last_closed'))
+        state = _SeriesState(open_time, closed, float(df['close'].iloc[-1]))
+        history = df if closed else df.iloc[:-1]
+        for calculator in state.calculators.values():
+            calculator.seed(history)
+            if not closed:
+                calculator.update(df.iloc[-1], closed=False)
+        self._states[key] = state
+
+    def values(self, key: Tuple[str, str], df: pd.DataFrame) -> Optional[Dict[str, Dict[str, Dict]]]:
+        """
+        与K线 df 对应的增量指标
+
+        只有 df 来自K线簿的环形缓冲、且最后一根与已处理的事件一致时才返回，
+        否则（REST回退、状态未初始化或已更新到下一根）返回 None，由调用方批量计算。
+
+        Returns:
+            {'realtime': {名称: {...}}, 'confirmed': {名称: {...}}}
+        """
+        last_closed = df.attrs.get('last_closed')
+        if df.empty or last_closed is None:
+            return None
+
+        with self._lock:
+            state = self._states.get(key)
+            if (state is None or state.closed != last_closed
+                    or state.open_time != int(df.index[-1].value // 1_000_000)
+                    or state.close != float(df['close'].iloc[-1])):
+                return None
+            return {
+                REALTIME: {name: calculator.latest() for name, calculator in state.calculators.items()},
+                CONFIRMED: {name: calculator.committed() for name, calculator in state.calculators.items()},
+            }
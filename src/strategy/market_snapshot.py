@@ -0,0 +1,184 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import pandas as pd
+
+from ..data.async_binance_api import async_binance_api, AsyncBinanceAPI
+from ..data.binance_api import BinanceAPI, INTERVAL_MS
+from ..data.live_kline_book import live_kline_book, LiveKlineBook
+from ..indicators.boll import BOLL
+from ..indicators.kdj import KDJ
+from ..indicators.modes import CONFIRMED, DUAL, MODE_POSITIONS, REALTIME
+from .live_indicators import LiveIndicators
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 每个时间框架获取的K线数量
+DEFAULT_KLINE_LIMIT = 100
+
+
+def default_kline_requests() -> Tuple[Tuple[str, str], ...]:
+    """根据配置生成需要获取的 (交易对, 时间间隔) 列表"""
+    symbols = config.get_symbols()
+    timeframes = config.get_timeframes()
+    btc_symbol = symbols.get('btc', 'BTCUSDT')
+    doge_symbol = symbols.get('doge', 'DOGEUSDT')
+
+    pairs = [(btc_symbol, interval) for interval in timeframes.get('btc', ['4h', '1h'])]
+    pairs += [(doge_symbol, interval) for interval in timeframes.get('doge', ['1h', '15m', '1m'])]
+    return tuple(pairs)
+
+
+def frame_positions(df: pd.DataFrame, interval: str = None, now_ms: int = None) -> Dict[str, int]:
+    """
+    各口径在K线 df 中读取的位置
+
+    实时口径取最后一根K线；确认口径取最后一根已收盘的K线：最后一根已收盘时就是它本身，
+    否则是倒数第二根。来自数据流的K线按 df.attrs['last_closed']（x 标志）判断；
+    REST数据没有该标志，按本地时钟判断：到达收盘时间才视为已收盘，不提前，
+    宁可晚一根也不在仍在形成的K线上给出确认信号。
+
+    Returns:
+        {'realtime': 位置, 'confirmed': 位置}
+    """
+    positions = dict(MODE_POSITIONS)
+    last_closed = df.attrs.get('last_closed')
+    if last_closed is None and interval in INTERVAL_MS and not df.empty:
+        now_ms = now_ms or int(time.time() * 1000)
+        last_closed = int(df.index[-1].value // 1_000_000) + INTERVAL_MS[interval] <= now_ms
+    if last_closed:
+        positions[CONFIRMED] = -1
+    return positions
+
+
+def compute_indicators(df: pd.DataFrame, boll: BOLL, kdj: KDJ,
+                       interval: str = None, now_ms: int = None,
+                       streamed: Optional[Dict[str, Dict[str, Dict]]] = None) -> Dict[str, Dict[str, Dict]]:
+    """
+    计算一个时间框架的BOLL和KDJ，每个指标序列只计算一次，同时取出两种口径的值
+    （读取位置见 frame_positions）
+
+    streamed 为 LiveIndicators 已增量计算的指标（格式同返回值），其中已有的指标不再重算。
+
+    Returns:
+        {'realtime': {'boll': {...}, 'kdj': {...}}, 'confirmed': {'boll': {...}, 'kdj': {...}}}
+    """
+    empty = {mode: {'boll': {}, 'kdj': {}} for mode in MODE_POSITIONS}
+    if df.empty:
+        return empty
+
+    try:
+        positions = frame_positions(df, interval, now_ms)
+        streamed = streamed or {}
+        result = {mode: {} for mode in positions}
+        for name, indicator in (('boll', boll), ('kdj', kdj)):
+            if all(name in streamed.get(mode, {}) for mode in positions):
+                for mode in positions:
+                    result[mode][name] = streamed[mode][name]
+                continue
+            series = indicator.calculate(df)
+            for mode, position in positions.items():
+                result[mode][name] = indicator.values_at(series, position)
+        return result
+    except Exception as e:
+        logger.error(f"计算技术指标失败: {str(e)}")
+        return empty
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    单次检查（tick）的行情快照
+
+    每个 (交易对, 时间间隔) 的K线和每个交易对的24小时统计只获取一次，
+    每个指标只计算一次；所有买卖规则都基于同一个不可变快照判断。
+    """
+
+    timestamp: datetime
+    tickers: Mapping[str, Dict] = field(default_factory=dict)
+    klines: Mapping[Tuple[str, str], pd.DataFrame] = field(default_factory=dict)
+    indicators: Mapping[Tuple[str, str], Dict[str, Dict[str, Dict]]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # 冻结容器，防止规则判断过程中修改快照
+        object.__setattr__(self, 'tickers', MappingProxyType(dict(self.tickers)))
+        object.__setattr__(self, 'klines', MappingProxyType(dict(self.klines)))
+        object.__setattr__(self, 'indicators', MappingProxyType(dict(self.indicators)))
+
+    @classmethod
+    def capture(cls, kline_requests: Optional[Iterable[Tuple[str, str]]] = None,
+                ticker_symbols: Optional[Iterable[str]] = None,
+                limit: int = DEFAULT_KLINE_LIMIT,
+                api: Union[BinanceAPI, AsyncBinanceAPI, LiveKlineBook] = None) -> 'MarketSnapshot':
+        """
+        获取一次行情并计算所有指标
+
+        Args:
+            kline_requests: (交易对, 时间间隔) 列表，默认使用配置中的BTC/DOGE时间框架
+            ticker_symbols: 需要24小时统计的交易对，默认取 kline_requests 中出现的交易对
+            limit: 每个时间框架的K线数量
+            api: BinanceAPI、AsyncBinanceAPI或LiveKlineBook实例，
+                 默认在实时K线簿运行时使用它，否则使用全局异步实例
+
+        Returns:
+            MarketSnapshot
+        """
+        kline_requests = tuple(dict.fromkeys(kline_requests or default_kline_requests()))
+        if ticker_symbols is None:
+            ticker_symbols = dict.fromkeys(symbol for symbol, _ in kline_requests)
+
+        # 实时K线簿运行时直接读取内存，否则所有ticker和K线并发请求
+        if api is None:
+            api = live_kline_book if live_kline_book.running else async_binance_api
+        if isinstance(api, (AsyncBinanceAPI, LiveKlineBook)):
+            tickers, klines = api.fetch_all(kline_requests, ticker_symbols, limit)
+        else:
+            with AsyncBinanceAPI(api) as client:
+                tickers, klines = client.fetch_all(kline_requests, ticker_symbols, limit)
+
+        # 实时K线簿的指标由数据流增量维护，与本次读取的K线一致时直接使用
+        streaming = LiveIndicators.attach(api) if isinstance(api, LiveKlineBook) else None
+        boll = BOLL()
+        kdj = KDJ()
+        now_ms = int(time.time() * 1000)
+        indicators = {
+            key: compute_indicators(klines[key], boll, kdj, key[1], now_ms,
+                                    streamed=streaming.values(key, klines[key]) if streaming else None)
+            for key in kline_requests
+        }
+
+        return cls(timestamp=datetime.now(), tickers=tickers, klines=klines, indicators=indicators)
+
+    def ticker(self, symbol: str) -> Dict:
+        """获取交易对的24小时统计（已转换为浮点数）"""
+        return self.tickers.get(symbol, {})
+
+    def klines_for(self, symbol: str, interval: str) -> pd.DataFrame:
+        """获取交易对某个时间框架的K线"""
+        return self.klines.get((symbol, interval), pd.DataFrame())
+
+    def indicators_for(self, symbol: str, interval: str, mode: str = REALTIME) -> Dict[str, Dict]:
+        """
+        获取交易对某个时间框架的指标
+
+        Args:
+            mode: 'realtime'、'confirmed'，或 'dual' 同时返回两种口径
+
+        Returns:
+            {'boll': {...}, 'kdj': {...}}，mode='dual' 时按口径分组
+        """
+        by_mode = self.indicators.get((symbol, interval))
+        if by_mode is None:
+            by_mode = {name: {'boll': {}, 'kdj': {}} for name in MODE_POSITIONS}
+        if mode == DUAL:
+            return dict(by_mode)
+        if mode not in by_mode:
+            raise ValueError(f"不支持的判断口径: {mode}")
+        return by_mode[mode]
+
+    def stats_24h(self, symbol: str) -> Dict[str, float]:
+        """由快照中的ticker计算24小时振幅和涨幅"""
+        return BinanceAPI.stats_from_ticker(self.ticker(symbol))
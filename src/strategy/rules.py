@@ -0,0 +1,220 @@
+import operator
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.config import config
+
+# 条件比较符
+_OPERATORS = {
+    '==': operator.eq,
+    '<': operator.lt,
+    '>': operator.gt,
+}
+
+# DOGE买卖规则定义：每条规则是若干条件的“且”。
+# 条件为 [名称, 时间框架, 字段, 比较符, 值]，字段 'touch' 为布林带触及的轨道，
+# 'kdj' 为 KDJ_MAX；值为字符串时引用 strategy.doge_thresholds 中的阈值，如 'oversold.0'。
+# 可通过 strategy.doge_rules 覆盖。
+DEFAULT_DOGE_RULES = [
+    {'type': 'buy', 'signal_id': 1, 'btc': True, 'conditions': [
+        ['doge_1h_dn', '1h', 'touch', '==', 'DN'],
+        ['doge_1h_kdj', '1h', 'kdj', '<', 'oversold.0'],
+        ['doge_15m_dn', '15m', 'touch', '==', 'DN'],
+        ['doge_15m_kdj', '15m', 'kdj', '<', 'oversold.0'],
+        ['doge_1m_kdj', '1m', 'kdj', '<', 'oversold.3'],
+    ]},
+    {'type': 'buy', 'signal_id': 2, 'btc': True, 'conditions': [
+        ['doge_1h_mb', '1h', 'touch', '==', 'MB'],
+        ['doge_1h_kdj', '1h', 'kdj', '<', 'oversold.1'],
+        ['doge_15m_dn', '15m', 'touch', '==', 'DN'],
+        ['doge_15m_kdj', '15m', 'kdj', '<', 'oversold.2'],
+        ['doge_1m_kdj', '1m', 'kdj', '<', 'oversold.3'],
+    ]},
+    {'type': 'buy', 'signal_id': 3, 'btc': True, 'conditions': [
+        ['doge_1h_mb', '1h', 'touch', '==', 'MB'],
+        ['doge_1h_kdj', '1h', 'kdj', '<', 'oversold.1'],
+        ['doge_15m_mb', '15m', 'touch', '==', 'MB'],
+        ['doge_15m_kdj', '15m', 'kdj', '<', 'oversold.2'],
+        ['doge_1m_kdj', '1m', 'kdj', '<', 'oversold.3'],
+    ]},
+    {'type': 'sell', 'signal_id': 1, 'btc': False, 'conditions': [
+        ['doge_1h_up', '1h', 'touch', '==', 'UP'],
+        ['doge_1h_kdj', '1h', 'kdj', '>', 'overbought'],
+        ['doge_15m_mb', '15m', 'touch', '==', 'MB'],
+        ['doge_1m_kdj', '1m', 'kdj', '>', 'overbought'],
+    ]},
+    {'type': 'sell', 'signal_id': 2, 'btc': False, 'conditions': [
+        ['doge_1h_up', '1h', 'touch', '==', 'UP'],
+        ['doge_1h_kdj', '1h', 'kdj', '>', 'overbought'],
+        ['doge_15m_up', '15m', 'touch', '==', 'UP'],
+        ['doge_1m_kdj', '1m', 'kdj', '>', 'overbought'],
+    ]},
+    {'type': 'sell', 'signal_id': 3, 'btc': False, 'conditions': [
+        ['doge_1h_mb', '1h', 'touch', '==', 'MB'],
+        ['doge_1h_kdj', '1h', 'kdj', '>', 'overbought'],
+        ['doge_15m_mb', '15m', 'touch', '==', 'MB'],
+        ['doge_1m_kdj', '1m', 'kdj', '>', 'overbought'],
+    ]},
+    {'type': 'sell', 'signal_id': 4, 'btc': False, 'conditions': [
+        ['doge_1h_mb', '1h', 'touch', '==', 'MB'],
+        ['doge_1h_kdj', '1h', 'kdj', '>', 'overbought'],
+        ['doge_15m_up', '15m', 'touch', '==', 'UP'],
+        ['doge_1m_kdj', '1m', 'kdj', '>', 'overbought'],
+    ]},
+]
+
+DEFAULT_DOGE_THRESHOLDS = {'oversold': [10, 15, 20, 20], 'overbought': 90}
+
+
+@dataclass(frozen=True)
+class Condition:
+    """单个原子条件：某时间框架的某字段与值比较"""
+    timeframe: str
+    field: str
+    op: str
+    value: Any
+
+    def evaluate(self, inputs: Mapping[str, Mapping[str, Any]]):
+        """对标量或数组输入求值；缺失的KDJ视为NaN，比较结果为False"""
+        default = np.nan if self.field == 'kdj' else None
+        operand = inputs.get(self.timeframe, {}).get(self.field, default)
+        if isinstance(operand, (list, tuple)):
+            operand = np.asarray(operand)
+        return _OPERATORS[self.op](operand, self.value)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """一条买卖规则：条件名称及其在规则集原子条件中的下标"""
+    type: str
+    signal_id: int
+    requires_btc: bool
+    conditions: Tuple[Tuple[str, int], ...]
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.type, self.signal_id
+
+
+class RuleSet:
+    """
+    编译后的规则集
+
+    所有规则的条件去重为一组原子条件，求值时每个原子条件只计算一次，
+    再按规则组合。输入既可以是实时快照的标量，也可以是回测中按时间对齐的NumPy数组：
+    {时间框架: {'touch': 'DN' 或 数组, 'kdj': 浮点数 或 数组}}
+    """
+
+    def __init__(self, rules: Sequence[Rule], atoms: Sequence[Condition]):
+        self.rules = tuple(rules)
+        self.atoms = tuple(atoms)
+        self.timeframes = tuple(dict.fromkeys(atom.timeframe for atom in self.atoms))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, inputs: Mapping[str, Mapping[str, Any]],
+                 btc_valid: Any = True) -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """
+        对所有规则求值
+
+        Args:
+            inputs: 各时间框架的布林带触及和KDJ_MAX
+            btc_valid: BTC条件是否满足，标量或与输入对齐的布尔数组
+
+        Returns:
+            {(类型, 信号ID): {'signal': 是否触发, 'conditions': {条件名: 结果}}}
+            标量输入时结果为bool，数组输入时为布尔数组
+        """
+        values = [_as_result(atom.evaluate(inputs)) for atom in self.atoms]
+        btc_valid = _as_result(btc_valid)
+
+        results = {}
+        for rule in self.rules:
+            conditions = {}
+            if rule.requires_btc:
+                conditions['btc_ok'] = btc_valid
+            for name, index in rule.conditions:
+                conditions[name] = values[index]
+            results[rule.key] = {
+                'signal': reduce(operator.and_, conditions.values()),
+                'conditions': conditions
+            }
+        return results
+
+    def triggered(self, inputs: Mapping[str, Mapping[str, Any]],
+                  btc_valid: bool = True) -> List[Dict[str, Any]]:
+        """标量输入时返回触发的规则，格式同实时信号 {'signal', 'signal_id', 'type', 'conditions'}"""
+        return [
+            {'signal': True, 'signal_id': key[1], 'type': key[0], 'conditions': result['conditions']}
+            for key, result in self.evaluate(inputs, btc_valid).items() if result['signal']
+        ]
+
+
+def _as_result(value):
+    """标量结果统一为bool，数组结果保持为布尔数组"""
+    if np.ndim(value) == 0:
+        return bool(value)
+    return np.asarray(value, dtype=bool)
+
+
+def _resolve_threshold(value: Any, thresholds: Mapping[str, Any]) -> Any:
+    """把 'oversold.0' 这样的引用解析为阈值"""
+    if not isinstance(value, str):
+        return value
+
+    name, _, index = value.partition('.')
+    if name not in thresholds:
+        raise ValueError(f"未知的阈值引用: {value}")
+    resolved = thresholds[name]
+    if index:
+        resolved = resolved[int(index)]
+    return float(resolved)
+
+
+def compile_rules(rules: Sequence[Mapping[str, Any]],
+                  thresholds: Optional[Mapping[str, Any]] = None) -> RuleSet:
+    """
+    把规则定义编译为规则集
+
+    Args:
+        rules: 规则定义列表，格式见 DEFAULT_DOGE_RULES
+        thresholds: 阈值表，条件值中的字符串引用从这里解析
+    """
+    thresholds = {**DEFAULT_DOGE_THRESHOLDS, **(thresholds or {})}
+    atoms: Dict[Condition, int] = {}
+    compiled = []
+
+    for spec in rules:
+        conditions = []
+        for name, timeframe, field, op, value in spec['conditions']:
+            if op not in _OPERATORS:
+                raise ValueError(f"不支持的比较符: {op}")
+            if field != 'touch':
+                value = _resolve_threshold(value, thresholds)
+            atom = Condition(timeframe, field, op, value)
+            index = atoms.setdefault(atom, len(atoms))
+            conditions.append((name, index))
+
+        compiled.append(Rule(
+            type=spec['type'],
+            signal_id=int(spec['signal_id']),
+            requires_btc=bool(spec.get('btc', spec['type'] == 'buy')),
+            conditions=tuple(conditions)
+        ))
+
+    return RuleSet(compiled, list(atoms))
+
+
+def load_doge_rules() -> RuleSet:
+    """按当前配置编译DOGE买卖规则"""
+    strategy_config = config.get_strategy_config()
+    rules = strategy_config.get('doge_rules', DEFAULT_DOGE_RULES)
+    return compile_rules(rules, strategy_config.get('doge_thresholds', {}))
+
+
+# 全局DOGE规则集
+doge_rules = load_doge_rules()
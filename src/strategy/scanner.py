@@ -0,0 +1,414 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..data.async_binance_api import AsyncBinanceAPI
+from ..data.binance_api import binance_api, BinanceAPI, INTERVAL_MS
+from ..data.rate_limiter import PRIORITY_BULK, request_priority
+from ..data.live_kline_book import PRICE_COLUMNS
+from ..data.resampler import BASE_INTERVAL, KlineResampler
+from ..data.websocket_client import websocket_client, BinanceWebSocket
+from ..indicators.boll import boll_arrays
+from ..indicators.kdj import kdj_arrays
+from .backtest import VectorBacktest, open_times_ms
+from .rules import RuleSet
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 价格列在矩阵第一维中的位置
+_OPEN, _HIGH, _LOW, _CLOSE = (PRICE_COLUMNS.index(name) for name in ('open', 'high', 'low', 'close'))
+
+# BTC过滤条件使用的时间框架，24小时统计由最近24根1小时K线计算
+BTC_TIMEFRAMES = ('4h', '1h')
+_WINDOW_24H = 24
+
+# 扫描进程的追踪器，每次扫描输出一行耗时
+scan_trace = logger.tracer('scanner')
+
+
+class BarMatrix:
+    """
+    一个时间间隔下多个交易对的K线矩阵（交易对 × K线）
+
+    K线按开盘时间定位到第 (开盘时间 // 间隔) % capacity 列，所有交易对的同一根K线
+    在同一列，数据流事件原地写入。读取时按期望的开盘时间取出连续窗口，
+    某交易对缺少窗口内任一根K线时该行无效。
+    """
+
+    def __init__(self, interval: str, symbols: Sequence[str], capacity: int):
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.symbols = list(symbols)
+        self.rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.capacity = capacity
+        self.open_time = np.full((len(self.symbols), capacity), -1, dtype=np.int64)
+        self.values = np.full((len(PRICE_COLUMNS), len(self.symbols), capacity), np.nan)
+        self.last_open = np.full(len(self.symbols), -1, dtype=np.int64)
+
+    def _slots(self, open_time):
+        return (np.asarray(open_time) // self.interval_ms) % self.capacity
+
+    def load(self, symbol: str, df: pd.DataFrame):
+        """用REST获取的K线初始化一行"""
+        row = self.rows[symbol]
+        df = df.iloc[-self.capacity:]
+        open_time = open_times_ms(df)
+        slots = self._slots(open_time)
+        self.open_time[row] = -1
+        self.values[:, row] = np.nan
+        self.open_time[row, slots] = open_time
+        self.values[:, row, slots] = df[list(PRICE_COLUMNS)].to_numpy(dtype=np.float64).T
+        self.last_open[row] = open_time[-1] if len(open_time) else -1
+
+    def apply(self, symbol: str, kline: Mapping[str, Any]) -> bool:
+        """
+        应用一条 @kline 事件中的 k 对象
+
+        Returns:
+            False 表示与已有数据不连续（漏掉了K线），该行需要重新初始化
+        """
+        row = self.rows[symbol]
+        open_time = int(kline['t'])
+        last_open = int(self.last_open[row])
+        if open_time < last_open:
+            return True
+
+        slot = int(self._slots(open_time))
+        self.open_time[row, slot] = open_time
+        self.values[:, row, slot] = (float(kline['o']), float(kline['h']), float(kline['l']),
+                                     float(kline['c']), float(kline['v']))
+        self.last_open[row] = open_time
+        return last_open < 0 or open_time <= last_open + self.interval_ms
+
+    def window(self, last_open: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        取出以 last_open 开盘的K线结尾的连续 count 根K线
+
+        Returns:
+            (values: 价格列 × 交易对 × count, valid: 每个交易对的窗口是否完整)
+        """
+        expected = last_open - self.interval_ms * np.arange(count - 1, -1, -1, dtype=np.int64)
+        slots = self._slots(expected)
+        valid = (self.open_time[:, slots] == expected).all(axis=1)
+        return self.values[:, :, slots], valid
+
+
+class MultiSymbolScanner:
+    """
+    多交易对规则扫描器
+
+    以BTC为市场过滤条件，把DOGE的BOLL/KDJ规则同时应用到多个交易对。
+    通过组合数据流订阅所有交易对的K线，每个时间间隔维护一个（交易对 × K线）矩阵；
+    默认每个交易对只订阅1分钟K线，更高周期由 KlineResampler 聚合；
+    最小时间间隔的K线收盘时，对所有交易对一次向量化计算指标并求值规则
+    （求值与 VectorBacktest 相同，交易对维度相当于回测的时间网格），记录每次扫描的耗时。
+    """
+
+    def __init__(self, symbols: Iterable[str], rules: Optional[RuleSet] = None,
+                 btc_symbol: str = None, window: int = None, settle: float = None,
+                 resample: bool = None, api: BinanceAPI = None, ws: BinanceWebSocket = None):
+        """
+        Args:
+            symbols: 扫描的交易对
+            rules: 规则集，默认使用配置中的DOGE规则
+            btc_symbol: 市场过滤使用的交易对
+            window: 计算指标使用的已收盘K线根数
+            settle: 首个收盘事件到达后等待其余交易对收盘事件的最长时间（秒）
+            resample: 只订阅1分钟K线并聚合出其余时间框架，False 时每个时间框架单独订阅
+        """
+        scanner_config = config.get('scanner', {})
+        self.engine = VectorBacktest(rules)
+        self.rules = self.engine.rules
+        self.symbols = list(dict.fromkeys(symbols))
+        self.btc_symbol = btc_symbol or self.engine.btc_symbol
+        self.window = window or scanner_config.get('window', 200)
+        self.settle = scanner_config.get('settle', 2.0) if settle is None else settle
+        self.api = api or binance_api
+        self.ws = ws or websocket_client
+
+        capacity = self.window + 2  # 形成中的K线占用一列
+        self.trigger_interval = min(self.rules.timeframes, key=INTERVAL_MS.get)
+        self.matrices = {interval: BarMatrix(interval, self.symbols, capacity) for interval in self.rules.timeframes}
+        self.btc = {interval: BarMatrix(interval, [self.btc_symbol], max(capacity, _WINDOW_24H + 2))
+                    for interval in BTC_TIMEFRAMES}
+
+        # (交易对, 时间间隔) -> 需要写入的矩阵
+        self._routes: Dict[Tuple[str, str], List[BarMatrix]] = {}
+        for matrix in list(self.matrices.values()) + list(self.btc.values()):
+            for symbol in matrix.symbols:
+                self._routes.setdefault((symbol, matrix.interval), []).append(matrix)
+
+        self.latencies = deque(maxlen=scanner_config.get('latency_history', 1000))
+        self.resample = scanner_config.get('resample', True) if resample is None else resample
+        self.resampler = KlineResampler(interval for _, interval in self._routes) if self.resample else None
+
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._closed: Dict[int, set] = {}   # 收盘时间 -> 已收到收盘事件的交易对
+        self._first_seen: Dict[int, float] = {}
+        self._last_scanned = 0  # 已扫描的最近收盘时间，迟到的收盘事件不再触发扫描
+        self._stale = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+    def on_scan(self, callback: Callable[[Dict[str, Any]], None]):
+        """注册扫描结果回调，参数为 scan() 的返回值"""
+        self._listeners.append(callback)
+
+    def streams(self) -> List[str]:
+        """需要订阅的 @kline 数据流"""
+        if self.resampler is not None:
+            symbols = dict.fromkeys(symbol for symbol, _ in self._routes)
+            return [f"{symbol.lower()}@kline_{BASE_INTERVAL}" for symbol in symbols]
+        return [f"{symbol.lower()}@kline_{interval}" for symbol, interval in self._routes]
+
+    def bootstrap(self, keys: Iterable[Tuple[str, str]] = None) -> int:
+        """
+        并发通过REST初始化K线矩阵
+
+        Returns:
+            初始化失败的 (交易对, 时间间隔) 数量
+        """
+        keys = list(keys) if keys is not None else list(self._routes)
+        limit = max(matrix.capacity for matrix in self._all_matrices())
+        if self.resampler is not None:
+            # 聚合需要当前周期已收盘的1分钟K线，一并获取
+            keys = list(dict.fromkeys(keys + [(symbol, BASE_INTERVAL) for symbol, _ in keys]))
+            limit = max(limit, self.resampler.seed_limit)
+        with AsyncBinanceAPI(self.api) as client, request_priority(PRIORITY_BULK):
+            _, klines = client.fetch_all(keys, [], limit)
+
+        failed = 0
+        with self._cond:
+            for key, df in klines.items():
+                if df is None or df.empty:
+                    failed += 1
+                    continue
+                for matrix in self._routes.get(key, ()):
+                    matrix.load(key[0], df)
+                if self.resampler is not None and key[1] == BASE_INTERVAL:
+                    self.resampler.seed(key[0], df)
+                self._stale.discard(key)
+        if failed:
+            logger.warning(f"扫描器初始化失败: {failed}/{len(keys)}个K线序列")
+        return failed
+
+    def _all_matrices(self) -> List[BarMatrix]:
+        return list(self.matrices.values()) + list(self.btc.values())
+
+    def start(self):
+        """初始化K线、订阅组合数据流并启动扫描线程"""
+        self.running = True
+        self.bootstrap()
+        self.ws.subscribe_many({stream: self.on_kline for stream in self.streams()})
+        if not self.ws.is_connected:
+            self.ws.connect()
+        self._thread = threading.Thread(target=self._run, name='symbol-scanner', daemon=True)
+        self._thread.start()
+        logger.info(f"多交易对扫描器已启动: {len(self.symbols)}个交易对，{len(self._routes)}个数据流")
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        logger.info("多交易对扫描器已停止")
+
+    def on_kline(self, data: Mapping[str, Any]):
+        """处理组合数据流中的 @kline 事件"""
+        symbol, kline = data['s'], data['k']
+        with self._cond:
+            klines = [kline]
+            if self.resampler is not None and kline['i'] == BASE_INTERVAL:
+                derived = self.resampler.update(symbol, kline)
+                if derived is None:
+                    # 1分钟K线不连续，当前周期的聚合已不完整，该交易对全部重新初始化
+                    self._stale.update(key for key in self._routes if key[0] == symbol)
+                    derived = []
+                klines += derived
+            for kline in klines:
+                self._apply(symbol, kline)
+
+    def _apply(self, symbol: str, kline: Mapping[str, Any]):
+        """写入一根K线，最小时间间隔K线收盘时登记扫描（调用方持有锁）"""
+        key = (symbol, kline['i'])
+        for matrix in self._routes.get(key, ()):
+            if not matrix.apply(symbol, kline):
+                self._stale.add(key)
+
+        if kline.get('x') and key[1] == self.trigger_interval and symbol in self.matrices[key[1]].rows:
+            close_time = int(kline['t']) + INTERVAL_MS[key[1]]
+            if close_time <= self._last_scanned:
+                # settle 超时后才到达的收盘事件：K线已写入，但该收盘时间已扫描过
+                return
+            self._closed.setdefault(close_time, set()).add(symbol)
+            self._first_seen.setdefault(close_time, time.monotonic())
+            self._cond.notify_all()
+
+    def _next_ready(self) -> Optional[int]:
+        """等待最早的一个收盘时间：所有交易对都已收盘，或等待超过 settle 秒"""
+        with self._cond:
+            while self.running:
+                if self._closed:
+                    close_time = min(self._closed)
+                    waited = time.monotonic() - self._first_seen[close_time]
+                    if len(self._closed[close_time]) >= len(self.symbols) or waited >= self.settle:
+                        self._closed.pop(close_time)
+                        self._first_seen.pop(close_time)
+                        self._last_scanned = close_time
+                        return close_time
+                    self._cond.wait(self.settle - waited)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            close_time = self._next_ready()
+            if close_time is None:
+                return
+            try:
+                result = self.scan(close_time)
+                for listener in self._listeners:
+                    listener(result)
+            except Exception as e:
+                logger.error(f"多交易对扫描失败: {str(e)}")
+
+            # 数据流不连续的序列在扫描之后重新初始化，不占用本次扫描的时间
+            with self._cond:
+                stale = list(self._stale)
+            if stale:
+                logger.warning(f"K线数据流不连续，重新初始化: {len(stale)}个序列")
+                self.bootstrap(stale)
+
+    def _latest_indicators(self, matrix: BarMatrix, last_open: int) -> Dict[str, np.ndarray]:
+        """每个交易对以 last_open 开盘的已收盘K线上的 KDJ_MAX 和布林带触及，窗口不完整时为NaN/''"""
+        values, valid = matrix.window(last_open, self.window)
+        high, low, close = values[_HIGH], values[_LOW], values[_CLOSE]
+        kdj, boll = self.engine.kdj, self.engine.boll
+
+        with np.errstate(invalid='ignore'):
+            kdj_max = kdj_arrays(high, low, close, kdj.k_period, kdj.k_smooth, kdj.d_smooth)['KDJ_MAX'][:, -1]
+            touch = boll_arrays(high[:, -boll.period:], low[:, -boll.period:], close[:, -boll.period:],
+                                boll.period, boll.std_dev)['touch'][:, -1]
+
+        kdj_max[~valid] = np.nan
+        touch[~valid] = ''
+        return {'kdj': kdj_max, 'touch': touch, 'valid': valid, 'price': close[:, -1]}
+
+    def _btc_values(self, close_time: int) -> Dict[str, float]:
+        """BTC过滤条件的输入：各时间框架已收盘K线的 KDJ_MAX，最近24根1小时K线的振幅和涨幅"""
+        result = {}
+        for interval, matrix in self.btc.items():
+            last_open = _last_closed_open(close_time, matrix.interval_ms)
+            result[f'kdj_{interval}'] = float(self._latest_indicators(matrix, last_open)['kdj'][0])
+
+        hour = self.btc['1h']
+        values, valid = hour.window(_last_closed_open(close_time, hour.interval_ms), _WINDOW_24H)
+        result['volatility'] = result['change_percent'] = np.nan
+        if valid[0]:
+            high, low = values[_HIGH, 0].max(), values[_LOW, 0].min()
+            open_, close = values[_OPEN, 0, 0], values[_CLOSE, 0, -1]
+            result['volatility'] = (high - low) / low
+            result['change_percent'] = (close - open_) / open_
+        return result
+
+    def scan_arrays(self, close_time: int) -> Dict[str, np.ndarray]:
+        """
+        构造 VectorBacktest.evaluate() 的输入：每个数组的长度为交易对数量
+
+        只使用在 close_time 时刻已收盘的K线。
+        """
+        size = len(self.symbols)
+        btc = self._btc_values(close_time)
+        arrays = {
+            'time': np.full(size, close_time, dtype=np.int64),
+            'btc_volatility': np.full(size, btc['volatility']),
+            'btc_change_percent': np.full(size, btc['change_percent']),
+            'btc_kdj_4h': np.full(size, btc['kdj_4h']),
+            'btc_kdj_1h': np.full(size, btc['kdj_1h']),
+            'valid': np.ones(size, dtype=bool),
+        }
+        for interval, matrix in self.matrices.items():
+            latest = self._latest_indicators(matrix, _last_closed_open(close_time, matrix.interval_ms))
+            arrays[f'{interval}_kdj'] = latest['kdj']
+            arrays[f'{interval}_touch'] = latest['touch']
+            arrays['valid'] &= latest['valid']
+            if interval == self.trigger_interval:
+                arrays['price'] = latest['price']
+        return arrays
+
+    def scan(self, close_time: int = None) -> Dict[str, Any]:
+        """
+        对所有交易对求值一次规则
+
+        Args:
+            close_time: 最小时间间隔K线的收盘时间（毫秒），默认为最近一次收盘
+
+        Returns:
+            {
+                'time': close_time,
+                'btc_valid': BTC条件是否满足,
+                'signals': [{'symbol', 'type', 'signal_id', 'price'}],
+                'masks': {(类型, 信号ID): 每个交易对的布尔数组},
+                'valid': 数据完整的交易对布尔数组,
+                'latency': {'compute_ms': 计算耗时, 'lag_ms': 收盘到扫描完成的延迟, 'symbols', 'ready'}
+            }
+        """
+        if close_time is None:
+            close_time = _last_closed_open(int(time.time() * 1000), INTERVAL_MS[self.trigger_interval]) \
+                + INTERVAL_MS[self.trigger_interval]
+
+        started = time.perf_counter()
+        with self._cond:
+            arrays = self.scan_arrays(close_time)
+        evaluation = self.engine.evaluate(arrays)
+        masks = {key: np.asarray(mask) & arrays['valid'] for key, mask in evaluation['masks'].items()}
+
+        signals = []
+        for (signal_type, signal_id), mask in masks.items():
+            for row in np.flatnonzero(mask):
+                signals.append({'symbol': self.symbols[row], 'type': signal_type, 'signal_id': signal_id,
+                                'price': float(arrays['price'][row])})
+
+        latency = {
+            'compute_ms': (time.perf_counter() - started) * 1000,
+            'lag_ms': time.time() * 1000 - close_time,
+            'symbols': len(self.symbols),
+            'ready': int(arrays['valid'].sum()),
+        }
+        self.latencies.append(latency)
+        scan_trace.info("扫描%d个交易对(%d个数据完整): 信号%d个, 计算%.1fms, 收盘后%.0fms",
+                        latency['symbols'], latency['ready'], len(signals), latency['compute_ms'], latency['lag_ms'])
+
+        return {
+            'time': close_time,
+            'btc_valid': bool(np.all(evaluation['btc_valid'])) if len(self.symbols) else False,
+            'signals': signals,
+            'masks': masks,
+            'valid': arrays['valid'],
+            'latency': latency,
+        }
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """最近若干次扫描的耗时统计（毫秒）：{'scans', 'compute_ms': {...}, 'lag_ms': {...}}"""
+        summary = {'scans': len(self.latencies)}
+        for name in ('compute_ms', 'lag_ms'):
+            values = np.array([latency[name] for latency in self.latencies])
+            summary[name] = {
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'max': float(values.max()),
+            } if len(values) else {}
+        return summary
+
+
+def _last_closed_open(close_time: int, interval_ms: int) -> int:
+    """close_time 时刻已收盘的最后一根K线的开盘时间"""
+    return (close_time // interval_ms) * interval_ms - interval_ms
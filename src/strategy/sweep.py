@@ -0,0 +1,169 @@
+import itertools
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backtest import VectorBacktest, rising_edges, trade_pnl
+from .rules import DEFAULT_DOGE_RULES, compile_rules
+from ..utils.config import config
+from ..utils.logger import logger
+
+# 可扫描的参数：BTC条件阈值和DOGE KDJ阈值
+BTC_PARAMS = ('kdj_threshold', 'volatility_threshold', 'growth_threshold')
+DOGE_PARAMS = ('oversold', 'overbought')
+
+# 每个任务包含的参数组合数，减少进程间往返
+_CHUNK_SIZE = 16
+
+# 工作进程中挂载的共享数组和规则定义
+_worker_state: Dict[str, Any] = {}
+
+
+def expand_grid(grid: Mapping[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    把参数网格展开为参数组合列表
+
+    Args:
+        grid: {参数名: 取值列表}，参数名见 BTC_PARAMS、DOGE_PARAMS
+    """
+    unknown = set(grid) - set(BTC_PARAMS) - set(DOGE_PARAMS)
+    if unknown:
+        raise ValueError(f"不支持的扫描参数: {sorted(unknown)}")
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _share_arrays(arrays: Mapping[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], Dict[str, tuple]]:
+    """把数组复制到共享内存，返回共享内存块和 {名称: (块名, 形状, dtype)} 描述"""
+    blocks = []
+    layout = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        layout[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, layout
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """在工作进程中挂载共享内存块，释放由主进程负责"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13 之前没有 track 参数；进程池的工作进程与主进程共用资源跟踪器，重复登记无副作用
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(layout: Mapping[str, tuple], rule_specs: Sequence[Mapping], thresholds: Mapping[str, Any]):
+    """工作进程初始化：挂载共享数组（零拷贝）"""
+    blocks = {}
+    arrays = {}
+    for name, (block_name, shape, dtype) in layout.items():
+        block = _attach(block_name)
+        blocks[name] = block
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        arrays[name].flags.writeable = False
+
+    _worker_state.update(blocks=blocks, arrays=arrays, rule_specs=rule_specs, thresholds=thresholds)
+
+
+def evaluate_params(arrays: Mapping[str, np.ndarray], params: Mapping[str, Any],
+                    rule_specs: Sequence[Mapping] = DEFAULT_DOGE_RULES,
+                    thresholds: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    用一组参数对已对齐的数组求值
+
+    Returns:
+        {'params', 'buy_signals', 'sell_signals', 'trades', 'wins', 'pnl'}
+    """
+    doge_thresholds = dict(thresholds or {})
+    doge_thresholds.update({name: params[name] for name in DOGE_PARAMS if name in params})
+
+    engine = VectorBacktest(compile_rules(rule_specs, doge_thresholds))
+    for name in BTC_PARAMS:
+        if name in params:
+            setattr(engine, name, params[name])
+
+    masks = engine.evaluate(arrays)['masks']
+    counts = {'buy': 0, 'sell': 0}
+    for (signal_type, _), mask in masks.items():
+        counts[signal_type] = counts.get(signal_type, 0) + len(rising_edges(mask))
+
+    return {
+        'params': dict(params),
+        'buy_signals': counts['buy'],
+        'sell_signals': counts['sell'],
+        **trade_pnl(arrays['price'], masks)
+    }
+
+
+def _evaluate_chunk(chunk: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """工作进程任务：对一批参数组合求值"""
+    state = _worker_state
+    return [evaluate_params(state['arrays'], params, state['rule_specs'], state['thresholds']) for params in chunk]
+
+
+class ParameterSweep:
+    """
+    策略阈值的并行参数扫描
+
+    指标数组由 VectorBacktest.prepare() 只计算一次，放入共享内存，
+    工作进程直接挂载为只读的NumPy数组，不在进程间传递DataFrame；
+    每个参数组合只重新编译规则并按布尔数组求值。
+    """
+
+    def __init__(self, arrays: Mapping[str, np.ndarray], processes: Optional[int] = None,
+                 rule_specs: Optional[Sequence[Mapping]] = None):
+        """
+        Args:
+            arrays: VectorBacktest.prepare() 的结果
+            processes: 工作进程数，默认CPU核数；为1时在当前进程中执行
+            rule_specs: 规则定义，默认使用配置中的 strategy.doge_rules
+        """
+        strategy_config = config.get_strategy_config()
+        self.arrays = dict(arrays)
+        self.processes = processes or os.cpu_count() or 1
+        self.rule_specs = rule_specs or strategy_config.get('doge_rules', DEFAULT_DOGE_RULES)
+        self.thresholds = strategy_config.get('doge_thresholds', {})
+
+    def run(self, grid: Mapping[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+        """
+        扫描参数网格
+
+        Args:
+            grid: {参数名: 取值列表}，如 {'kdj_threshold': [40, 50], 'oversold': [[10, 15, 20, 20]]}
+
+        Returns:
+            每个参数组合的结果，按 pnl 从高到低排序
+        """
+        combinations = expand_grid(grid)
+        if not combinations:
+            return []
+
+        processes = min(self.processes, max(1, len(combinations) // _CHUNK_SIZE))
+        if processes <= 1:
+            results = [evaluate_params(self.arrays, params, self.rule_specs, self.thresholds)
+                       for params in combinations]
+        else:
+            results = self._run_parallel(combinations, processes)
+
+        logger.info(f"参数扫描完成: {len(results)}组参数")
+        return sorted(results, key=lambda result: result['pnl'], reverse=True)
+
+    def _run_parallel(self, combinations: List[Dict[str, Any]], processes: int) -> List[Dict[str, Any]]:
+        """把数组放入共享内存，分批交给进程池"""
+        blocks, layout = _share_arrays(self.arrays)
+        chunks = [combinations[i:i + _CHUNK_SIZE] for i in range(0, len(combinations), _CHUNK_SIZE)]
+        try:
+            with multiprocessing.Pool(processes, initializer=_init_worker,
+                                      initargs=(layout, self.rule_specs, self.thresholds)) as pool:
+                return [result for batch in pool.imap_unordered(_evaluate_chunk, chunks) for result in batch]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
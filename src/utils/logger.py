@@ -1,19 +1,267 @@
+import atexit
 import logging
 import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Any, Dict, List, Optional, Sequence
 
 from .config import config
 
 
+class TickBuffer:
+    """
+    最近N个tick的调试数据环形缓冲区
+
+    热路径只追加一个字典引用，不格式化也不输出；需要时通过接口按需读取。
+    """
+
+    def __init__(self, maxlen: int = 50):
+        self._ticks = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, subsystem: str, data: Dict[str, Any]):
+        """记录一个tick的调试数据"""
+        with self._lock:
+            self._ticks.append({'time': time.time(), 'subsystem': subsystem, 'data': data})
+
+    def recent(self, limit: Optional[int] = None, subsystem: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的tick（从旧到新），可按子系统过滤"""
+        with self._lock:
+            ticks = list(self._ticks)
+        if subsystem:
+            ticks = [tick for tick in ticks if tick['subsystem'] == subsystem]
+        return ticks[-limit:] if limit else ticks
+
+    def clear(self):
+        with self._lock:
+            self._ticks.clear()
+
+
+class Tracer:
+    """
+    子系统调试追踪
+
+    消息使用 logging 的 % 参数延迟格式化：级别未开启时不会拼接字符串，
+    也不会对参数（如指标字典）调用 str()。每个子系统对应一个子日志器，级别可单独配置。
+    """
+
+    def __init__(self, subsystem: str, parent: logging.Logger, ticks: TickBuffer):
+        self.subsystem = subsystem
+        self.logger = parent.getChild(subsystem)
+        self.ticks = ticks
+
+    def set_level(self, level: str):
+        """设置本子系统的日志级别（如 'DEBUG'、'WARNING'）"""
+        self.logger.setLevel(getattr(logging, level.upper()))
+
+    def enabled(self, level: int = logging.DEBUG) -> bool:
+        """级别是否开启，用于跳过只为日志准备数据的代码"""
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, message: str, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args)
+
+    def info(self, message: str, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args)
+
+    def warning(self, message: str, *args):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(message, *args)
+
+    def capture(self, data: Dict[str, Any]):
+        """把本tick的调试数据存入环形缓冲区"""
+        self.ticks.record(self.subsystem, data)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """写入当前的 sys.stderr：日志线程写出时，stderr 可能已被替换或恢复"""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """写入后不立即刷盘，由日志线程在每批之后或按间隔调用 flush_batch()"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class DuplicateSuppressor:
+    """
+    限速的重复消息抑制
+
+    同一日志器、同一级别、同一内容的消息在 window 秒内只输出第一条，
+    其余计数；窗口结束时输出一条 "(repeated N times)" 汇总。window<=0 时不抑制。
+    """
+
+    def __init__(self, window: float = 0.0):
+        self.window = window
+        self._seen: Dict[tuple, list] = {}  # key -> [窗口开始时间, 抑制次数, 最后一条被抑制的记录]
+
+    def process(self, record: logging.LogRecord) -> List[logging.LogRecord]:
+        """返回需要输出的记录（可能含上一窗口的汇总）"""
+        if self.window <= 0:
+            return [record]
+
+        key = (record.name, record.levelno, record.getMessage())
+        state = self._seen.get(key)
+        if state and record.created - state[0] < self.window:
+            state[1] += 1
+            state[2] = record
+            return []
+
+        output = [self._summary(state)] if state and state[1] else []
+        self._seen[key] = [record.created, 0, None]
+        output.append(record)
+        return output
+
+    def expire(self, now: Optional[float] = None) -> List[logging.LogRecord]:
+        """结束已过期的窗口并返回其汇总；now 为 None 时结束全部窗口"""
+        output = []
+        for key, state in list(self._seen.items()):
+            if now is None or now - state[0] >= self.window:
+                if state[1]:
+                    output.append(self._summary(state))
+                del self._seen[key]
+        return output
+
+    @staticmethod
+    def _summary(state: list) -> logging.LogRecord:
+        last = state[2]
+        return logging.makeLogRecord({**last.__dict__, 'msg': f"{last.getMessage()} (repeated {state[1]} times)",
+                                      'args': None})
+
+
+class QueueLogListener:
+    """
+    日志写入线程
+
+    业务线程只把记录放入队列（QueueHandler），由本线程成批取出、去重后交给
+    控制台/文件处理器；文件按批次或 flush_interval 刷盘，业务线程不会阻塞在磁盘上。
+    重复消息的过期窗口每 dedup_window 秒结束一次，持续有日志时也会按时输出汇总。
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue, handlers: Sequence[logging.Handler], batch_size: int = 64,
+                 flush_interval: float = 1.0, dedup_window: float = 0.0):
+        self.queue = log_queue
+        self.handlers = list(handlers)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.suppressor = DuplicateSuppressor(dedup_window)
+        intervals = [value for value in (flush_interval, dedup_window) if value > 0]
+        self._idle_timeout = min(intervals) if intervals else None
+        self._last_flush = time.monotonic()
+        self._last_expire = time.monotonic()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """处理完队列中剩余的记录并输出所有未完成的重复汇总"""
+        if self._thread is not None:
+            self.queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前入队的记录全部写出并刷盘"""
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self._idle_timeout)]
+            except queue.Empty:
+                self._expire_windows()
+                self._flush_handlers()
+                continue
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            waiters = []
+            for item in batch:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    self._emit(self.suppressor.process(item))
+
+            if stop:
+                self._emit(self.suppressor.expire())
+            elif time.monotonic() - self._last_expire >= self.suppressor.window > 0:
+                self._expire_windows()
+            if stop or waiters or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_handlers()
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _expire_windows(self):
+        """结束已过期的重复窗口并输出汇总"""
+        self._emit(self.suppressor.expire(time.time()))
+        self._last_expire = time.monotonic()
+
+    def _emit(self, records: List[logging.LogRecord]):
+        for record in records:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def _flush_handlers(self):
+        # 其他处理器（如控制台）在每条记录后已自行刷新
+        for handler in self.handlers:
+            if isinstance(handler, BatchedRotatingFileHandler):
+                handler.flush_batch()
+        self._last_flush = time.monotonic()
+
+
 class TradingLogger:
     """交易信号日志记录器"""
 
     def __init__(self, name: str = "binance_quant"):
         self.name = name
         self.logger = logging.getLogger(name)
+        self._tracers: Dict[str, Tracer] = {}
+        self.listener: Optional[QueueLogListener] = None
         self._setup_logger()
+        self.ticks = TickBuffer(config.get_logging_config().get('tick_buffer', 50))
+        atexit.register(self.shutdown)
 
     def _setup_logger(self):
         """设置日志记录器"""
@@ -23,34 +271,71 @@ class TradingLogger:
 
         # 清除现有处理器
         self.logger.handlers.clear()
+        self.shutdown()
 
         # 控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(level)
+        # 处理器不过滤级别，由各日志器（含子系统追踪）的级别决定输出
+        console_handler = ConsoleHandler()
         console_format = logging.Formatter(
             '%(asctime)s | %(levelname)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         console_handler.setFormatter(console_format)
-        self.logger.addHandler(console_handler)
 
         # 文件处理器
         log_file = log_config.get('file', 'logs/trading_signals.log')
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
-        file_handler = RotatingFileHandler(
+        file_handler = BatchedRotatingFileHandler(
             log_file,
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5,
             encoding='utf-8'
         )
-        file_handler.setLevel(level)
         file_format = logging.Formatter(
             '%(asctime)s | %(levelname)s | %(funcName)s:%(lineno)d | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_format)
-        self.logger.addHandler(file_handler)
+
+        # 业务线程只入队，由日志线程成批写入
+        async_config = log_config.get('async', {})
+        log_queue = queue.SimpleQueue()
+        self.listener = QueueLogListener(
+            log_queue,
+            [console_handler, file_handler],
+            batch_size=async_config.get('batch_size', 64),
+            flush_interval=async_config.get('flush_interval', 1.0),
+            dedup_window=async_config.get('dedup_window', 0.0)
+        )
+        self.logger.addHandler(QueueHandler(log_queue))
+        self.listener.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待已记录的日志全部写出"""
+        return self.listener.flush(timeout) if self.listener else False
+
+    def shutdown(self):
+        """停止日志线程，写出剩余日志和重复汇总"""
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+    def tracer(self, subsystem: str) -> Tracer:
+        """
+        获取子系统追踪器
+
+        级别取配置 logging.subsystems.<subsystem>，未配置时沿用全局级别。
+        """
+        if subsystem not in self._tracers:
+            tracer = Tracer(subsystem, self.logger, self.ticks)
+            level = config.get_logging_config().get('subsystems', {}).get(subsystem)
+            if level:
+                tracer.set_level(level)
+            self._tracers[subsystem] = tracer
+        return self._tracers[subsystem]
 
     def info(self, message: str):
         """记录信息日志"""
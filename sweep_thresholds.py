@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+策略阈值参数扫描
+对BTC条件阈值和DOGE KDJ阈值的组合并行回测，输出信号数量和收益
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data.binance_api import binance_api
+from src.strategy.backtest import VectorBacktest
+from src.strategy.sweep import ParameterSweep
+
+# 默认扫描网格
+DEFAULT_GRID = {
+    'kdj_threshold': [30, 40, 50, 60],
+    'volatility_threshold': [0.02, 0.03, 0.04, 0.05],
+    'growth_threshold': [0.005, 0.01, 0.02],
+    'oversold': [
+        [10, 15, 20, 20],
+        [15, 20, 25, 25],
+        [20, 25, 30, 30],
+        [5, 10, 15, 15],
+    ],
+    'overbought': [80, 85, 90, 95],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='策略阈值参数扫描')
+    parser.add_argument('--days', type=int, default=30, help='回测天数')
+    parser.add_argument('--processes', type=int, default=None, help='工作进程数，默认CPU核数')
+    parser.add_argument('--top', type=int, default=20, help='显示收益最高的组合数')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"策略阈值参数扫描 - 最近{args.days}天历史数据")
+    print("=" * 80)
+
+    engine = VectorBacktest()
+
+    # 多取3天数据用于指标预热
+    start_time = datetime.utcnow() - timedelta(days=args.days + 3)
+    klines = {}
+    for symbol, interval in engine.required_klines():
+        print(f"获取{symbol} {interval}数据...")
+        klines[(symbol, interval)] = binance_api.get_klines_range(symbol, interval, start_time)
+        if klines[(symbol, interval)].empty:
+            print(f"❌ {symbol} {interval}数据获取失败")
+            return
+
+    # 指标只计算一次，所有参数组合共用
+    started = time.perf_counter()
+    arrays = engine.prepare(klines, start=datetime.utcnow() - timedelta(days=args.days))
+    print(f"\n指标计算完成: {len(arrays['time'])}个检查点，用时{time.perf_counter() - started:.2f}秒")
+
+    sweep = ParameterSweep(arrays, processes=args.processes)
+    started = time.perf_counter()
+    results = sweep.run(DEFAULT_GRID)
+    print(f"扫描完成: {len(results)}组参数，{sweep.processes}个进程，用时{time.perf_counter() - started:.2f}秒")
+
+    print(f"\n收益最高的{min(args.top, len(results))}组参数:")
+    for rank, result in enumerate(results[:args.top], 1):
+        params = result['params']
+        print(f"{rank:3d}. 收益{result['pnl']*100:7.2f}%  交易{result['trades']:3d}次 盈利{result['wins']:3d}次  "
+              f"买入信号{result['buy_signals']:4d} 卖出信号{result['sell_signals']:4d}")
+        print(f"     BTC KDJ<{params['kdj_threshold']} 振幅<{params['volatility_threshold']:.1%} "
+              f"涨幅>{params['growth_threshold']:.1%}  超卖{params['oversold']} 超买{params['overbought']}")
+
+
+if __name__ == "__main__":
+    main()
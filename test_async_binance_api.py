@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+AsyncBinanceAPI测试：并发获取多时间框架K线和ticker（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import threading
+import time
+
+from src.data.async_binance_api import AsyncBinanceAPI
+from test_binance_api import FakeKlineAPI
+
+DELAY = 0.2
+
+
+class SlowAPI(FakeKlineAPI):
+    """每个请求耗时 DELAY 秒，并记录同时进行的最大请求数"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.kline_cache = None
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _make_request(self, endpoint, params=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(DELAY)
+            if endpoint == '/api/v3/ticker/24hr':
+                return [{'symbol': symbol, 'lastPrice': '1.0', 'highPrice': '1.1',
+                         'lowPrice': '0.9', 'priceChangePercent': '2.0'}
+                        for symbol in json.loads(params['symbols'])]
+            return super()._make_request(endpoint, params)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+REQUESTS = [('BTCUSDT', '4h'), ('BTCUSDT', '1h'),
+            ('DOGEUSDT', '1h'), ('DOGEUSDT', '15m'), ('DOGEUSDT', '1m')]
+
+
+def test_fetch_all_is_concurrent():
+    """5个时间框架和批量ticker同时请求，总耗时约为一次请求"""
+    api = SlowAPI()
+    with AsyncBinanceAPI(api, max_concurrency=8) as client:
+        start = time.perf_counter()
+        tickers, klines = client.fetch_all(REQUESTS, ['BTCUSDT', 'DOGEUSDT'], limit=100)
+        elapsed = time.perf_counter() - start
+
+    assert api.peak == 6
+    assert elapsed < DELAY * 3
+    assert list(klines) == REQUESTS
+    assert tickers['DOGEUSDT']['lastPrice'] == 1.0
+
+
+def test_concurrency_cap():
+    """同时进行的请求数不超过 max_concurrency"""
+    api = SlowAPI()
+    with AsyncBinanceAPI(api, max_concurrency=2) as client:
+        client.fetch_all(REQUESTS, [], limit=50)
+
+    assert api.peak == 2
+
+
+def test_same_shapes_as_sync():
+    """异步结果与同步接口返回相同的DataFrame"""
+    api = FakeKlineAPI()
+    api.kline_cache = None
+    with AsyncBinanceAPI(api) as client:
+        _, klines = client.fetch_all(REQUESTS[:2], [], limit=100)
+
+    for symbol, interval in REQUESTS[:2]:
+        assert klines[(symbol, interval)].equals(api.get_klines(symbol, interval, 100))
+
+
+if __name__ == "__main__":
+    test_fetch_all_is_concurrent()
+    test_concurrency_cap()
+    test_same_shapes_as_sync()
+    print("✅ AsyncBinanceAPI测试通过")
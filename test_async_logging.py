@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+异步日志测试：队列写入不阻塞调用方、批量刷盘、重复消息汇总（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueHandler
+
+from src.utils.logger import BatchedRotatingFileHandler, DuplicateSuppressor, QueueLogListener
+
+
+class ListHandler(logging.Handler):
+    """把格式化后的消息收集到列表，可选地模拟慢速磁盘"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.messages = []
+        self.delay = delay
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def make_record(message: str, created: float) -> logging.LogRecord:
+    record = logging.makeLogRecord({'name': 'binance_quant', 'levelno': logging.INFO, 'levelname': 'INFO',
+                                    'msg': message})
+    record.created = created
+    return record
+
+
+def make_logger(name: str, listener_kwargs: dict, delay: float = 0.0):
+    log_queue = queue.SimpleQueue()
+    handler = ListHandler(delay)
+    listener = QueueLogListener(log_queue, [handler], **listener_kwargs)
+    test_logger = logging.getLogger(name)
+    test_logger.handlers.clear()
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return test_logger, listener, handler
+
+
+def test_duplicate_suppressor():
+    """窗口内的重复消息只输出第一条，窗口结束时输出汇总"""
+    suppressor = DuplicateSuppressor(window=60)
+    output = []
+    for second in range(0, 50, 2):
+        output += suppressor.process(make_record('BTC监控条件全部满足', 1000 + second))
+    output += suppressor.process(make_record('DOGE价格更新', 1049))
+    assert [record.getMessage() for record in output] == ['BTC监控条件全部满足', 'DOGE价格更新']
+
+    # 窗口结束后再次出现：先输出汇总，再输出本条并开启新窗口
+    output = suppressor.process(make_record('BTC监控条件全部满足', 1061))
+    assert [record.getMessage() for record in output] == [
+        'BTC监控条件全部满足 (repeated 24 times)', 'BTC监控条件全部满足']
+    assert output[0].created == 1048
+
+    suppressor.process(make_record('BTC监控条件全部满足', 1062))
+    assert suppressor.expire(1100) == []
+    assert [record.getMessage() for record in suppressor.expire(1121)] == ['BTC监控条件全部满足 (repeated 1 times)']
+    assert suppressor.expire() == []
+
+    assert len(DuplicateSuppressor(window=0).process(make_record('x', 0))) == 1
+
+
+def test_callers_do_not_block_on_slow_handler():
+    """处理器很慢时调用方仍立即返回，停止时写出全部记录"""
+    test_logger, listener, handler = make_logger('test_async_slow', {'batch_size': 8}, delay=0.01)
+
+    started = time.perf_counter()
+    for n in range(50):
+        test_logger.info("tick %d", n)
+    assert time.perf_counter() - started < 0.25
+
+    listener.stop()
+    assert handler.messages == [f"tick {n}" for n in range(50)]
+
+
+def test_listener_suppresses_and_flushes():
+    test_logger, listener, handler = make_logger('test_async_dedup', {'dedup_window': 60})
+    for _ in range(10):
+        test_logger.info("BTC监控条件全部满足")
+    test_logger.warning("BTC监控条件全部满足")
+    assert listener.flush()
+    assert handler.messages == ['BTC监控条件全部满足', 'BTC监控条件全部满足']
+
+    listener.stop()
+    assert handler.messages[-1] == 'BTC监控条件全部满足 (repeated 9 times)'
+
+
+def test_windows_expire_under_continuous_logging():
+    """队列一直不空时也按窗口输出汇总，已过期的窗口不会累积"""
+    test_logger, listener, handler = make_logger('test_async_busy', {'dedup_window': 0.1})
+    deadline = time.time() + 0.5
+    n = 0
+    while time.time() < deadline:
+        test_logger.info("K线数据流不连续")
+        test_logger.info(f"检查 {n}")
+        n += 1
+        time.sleep(0.002)
+    assert listener.flush()
+
+    assert any(message.startswith('K线数据流不连续 (repeated') for message in handler.messages)
+    assert len(listener.suppressor._seen) < n
+    listener.stop()
+
+
+def test_batched_file_handler_defers_disk_flush():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'test.log')
+        handler = BatchedRotatingFileHandler(path, encoding='utf-8')
+        handler.handle(make_record('第一行', time.time()))
+        assert os.path.getsize(path) == 0
+
+        handler.flush_batch()
+        assert os.path.getsize(path) > 0
+        handler.close()
+
+
+def test_flush_interval_flushes_when_idle():
+    """空闲时按 flush_interval 刷盘，无需等到下一批"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'test.log')
+        file_handler = BatchedRotatingFileHandler(path, encoding='utf-8')
+        listener = QueueLogListener(queue.SimpleQueue(), [file_handler], flush_interval=0.05)
+        listener._last_flush = time.monotonic()
+        listener.start()
+        listener.queue.put(make_record('第一行', time.time()))
+
+        deadline = time.time() + 2
+        while os.path.getsize(path) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert os.path.getsize(path) > 0
+
+        listener.stop()
+        file_handler.close()
+
+
+if __name__ == "__main__":
+    test_duplicate_suppressor()
+    test_callers_do_not_block_on_slow_handler()
+    test_listener_suppresses_and_flushes()
+    test_windows_expire_under_continuous_logging()
+    test_batched_file_handler_defers_disk_flush()
+    test_flush_interval_flushes_when_idle()
+    print("✅ 异步日志测试通过")
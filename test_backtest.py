@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+向量化回测测试：与逐时点的参考实现一致，高周期对齐不使用未来数据（离线，合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.data.binance_api import INTERVAL_MS
+from src.indicators.boll import BOLL, boll_arrays
+from src.indicators.kdj import KDJ
+from src.strategy.backtest import VectorBacktest, align_closed
+from src.strategy.rules import DEFAULT_DOGE_RULES, compile_rules
+
+START = pd.Timestamp('2024-09-01')
+END = pd.Timestamp('2024-09-06')
+
+FREQ = {'1m': 'min', '15m': '15min', '1h': 'h', '4h': '4h'}
+
+
+def make_series(interval: str, seed: int) -> pd.DataFrame:
+    """生成覆盖 [START, END) 的随机游走K线"""
+    index = pd.date_range(START, END, freq=FREQ[interval], inclusive='left')
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.4, len(index)))
+    spread = rng.random(len(index)) * 0.6
+    return pd.DataFrame({
+        'open': np.concatenate(([close[0]], close[:-1])),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': 1.0
+    }, index=index)
+
+
+def make_klines():
+    return {
+        ('BTCUSDT', '4h'): make_series('4h', 1),
+        ('BTCUSDT', '1h'): make_series('1h', 2),
+        ('DOGEUSDT', '1h'): make_series('1h', 3),
+        ('DOGEUSDT', '15m'): make_series('15m', 4),
+        ('DOGEUSDT', '1m'): make_series('1m', 5),
+    }
+
+
+def make_engine() -> VectorBacktest:
+    """放宽阈值，让合成数据上各类信号都有机会触发"""
+    rules = compile_rules(DEFAULT_DOGE_RULES, {'oversold': [40, 45, 50, 50], 'overbought': 60})
+    engine = VectorBacktest(rules, BOLL(20, 2), KDJ(9, 3, 3))
+    engine.btc_symbol, engine.doge_symbol = 'BTCUSDT', 'DOGEUSDT'
+    engine.volatility_threshold = 0.05
+    engine.growth_threshold = 0.0
+    engine.kdj_threshold = 80
+    return engine
+
+
+def reference_point(engine: VectorBacktest, klines, grid_ms: int):
+    """逐时点参考实现：只使用 grid_ms 时刻已收盘的K线重新计算指标"""
+    inputs = {}
+    kdj_max = {}
+    for (symbol, interval), df in klines.items():
+        close_ms = df.index.to_numpy(dtype='datetime64[ms]').astype(np.int64) + INTERVAL_MS[interval]
+        prefix = df[close_ms <= grid_ms]
+        kdj_max[(symbol, interval)] = engine.kdj.get_latest_values(prefix).get('KDJ_MAX', np.nan)
+        if symbol == 'DOGEUSDT':
+            inputs[interval] = {
+                'touch': engine.boll.get_latest_values(prefix).get('touch', ''),
+                'kdj': kdj_max[(symbol, interval)]
+            }
+        if (symbol, interval) == ('BTCUSDT', '1h'):
+            window = prefix.tail(24)
+            volatility = change = np.nan
+            if len(window) == 24:
+                volatility = (window['high'].max() - window['low'].min()) / window['low'].min()
+                change = (window['close'].iloc[-1] - window['open'].iloc[0]) / window['open'].iloc[0]
+
+    btc_valid = bool(
+        (volatility < engine.volatility_threshold or change > engine.growth_threshold)
+        and kdj_max[('BTCUSDT', '4h')] < engine.kdj_threshold
+        and kdj_max[('BTCUSDT', '1h')] < engine.kdj_threshold
+    )
+    return btc_valid, engine.rules.evaluate(inputs, btc_valid)
+
+
+def test_align_closed_has_no_lookahead():
+    """网格时刻只能看到已经收盘的高周期K线"""
+    hour = INTERVAL_MS['1h']
+    close_times = np.array([1, 2, 3]) * hour
+    grid = np.array([hour - 1, hour, hour + 1, 2 * hour - 1, 3 * hour])
+
+    assert list(align_closed(close_times, grid)) == [-1, 0, 0, 0, 2]
+
+
+def test_boll_arrays_match_touch_condition():
+    """向量化的布林带触及与逐根判断一致"""
+    df = make_series('15m', 9)
+    boll = BOLL(20, 2)
+    arrays = boll_arrays(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+    calc = boll.calculate(df)
+
+    expected = [boll.values_at(calc, i)['touch'] for i in range(len(calc))]
+    assert list(arrays['touch'][19:]) == expected
+    assert np.allclose(arrays['MB'][19:], calc['MB'].to_numpy())
+
+
+def test_vectorized_matches_point_in_time_reference():
+    """抽样时点上，向量化结果与只用已收盘K线逐点重算的结果一致"""
+    engine = make_engine()
+    klines = make_klines()
+    start = START + pd.Timedelta(days=2)
+    result = engine.run(klines, start=start)
+
+    grid_ms = result['index'].to_numpy(dtype='datetime64[ms]').astype(np.int64) + INTERVAL_MS['1m']
+    assert result['index'][0] == start
+
+    fired = np.flatnonzero(np.logical_or.reduce(list(result['masks'].values())))
+    assert len(fired) > 0
+    assert result['btc']['valid'].any() and not result['btc']['valid'].all()
+
+    rng = np.random.default_rng(11)
+    samples = np.unique(np.concatenate([
+        rng.choice(len(grid_ms), 120, replace=False),
+        rng.choice(fired, min(60, len(fired)), replace=False),
+        [0, len(grid_ms) - 1]
+    ]))
+    for i in samples:
+        btc_valid, verdicts = reference_point(engine, klines, grid_ms[i])
+        assert result['btc']['valid'][i] == btc_valid
+        for key, verdict in verdicts.items():
+            assert result['masks'][key][i] == verdict['signal'], (key, result['index'][i])
+
+
+def test_signal_events_are_rising_edges():
+    """连续满足的一段只记一次"""
+    index = pd.date_range(START, periods=6, freq='min')
+    masks = {('buy', 1): np.array([False, True, True, False, True, True])}
+    events = VectorBacktest.signal_events(index, np.arange(6.0), masks)
+
+    assert list(events['timestamp']) == [index[1], index[4]]
+    assert list(events['price']) == [1.0, 4.0]
+
+
+if __name__ == "__main__":
+    test_align_closed_has_no_lookahead()
+    test_boll_arrays_match_touch_condition()
+    test_vectorized_matches_point_in_time_reference()
+    test_signal_events_are_rising_edges()
+    print("✅ 向量化回测测试通过")
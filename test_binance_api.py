@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+BinanceAPI数据层测试（离线，使用本地生成的K线代替真实接口）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from src.data.binance_api import BinanceAPI, KlineCache, INTERVAL_MS, to_millis
+
+
+def synthetic_kline(open_time: int, interval_ms: int, revision: int = 0) -> list:
+    """按开盘时间确定性生成一根K线，revision用于模拟形成中K线的变化"""
+    base = 100 + (open_time // interval_ms) % 50
+    close = base + 0.5 + revision * 0.01
+    return [open_time, str(base), str(base + 1), str(base - 1), str(close), '10',
+            open_time + interval_ms - 1, '1000', 5, '5', '500', '0']
+
+
+class FakeKlineAPI(BinanceAPI):
+    """记录请求参数的BinanceAPI，K线由 synthetic_kline 生成"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+        self.revision = 0
+
+    def _make_request(self, endpoint, params=None):
+        self.requests.append((endpoint, dict(params or {})))
+        interval_ms = INTERVAL_MS[params['interval']]
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms // interval_ms * interval_ms
+        limit = params['limit']
+
+        if 'startTime' in params:
+            first = params['startTime'] // interval_ms * interval_ms
+        else:
+            first = current_open - (limit - 1) * interval_ms
+
+        rows = []
+        open_time = first
+        while open_time <= current_open and len(rows) < limit:
+            revision = self.revision if open_time == current_open else 0
+            rows.append(synthetic_kline(open_time, interval_ms, revision))
+            open_time += interval_ms
+        return rows
+
+
+def test_kline_cache_serves_within_ttl():
+    """形成中K线的刷新间隔内直接命中缓存"""
+    api = FakeKlineAPI()
+    api.forming_ttl = 60
+    first = api.get_klines('DOGEUSDT', '1h', 100)
+    second = api.get_klines('DOGEUSDT', '1h', 100)
+
+    assert len(api.requests) == 1
+    assert first.equals(second)
+
+
+def test_kline_cache_refreshes_only_forming_bar():
+    """过期后只用startTime拉取最后一根K线，结果与全量获取一致"""
+    api = FakeKlineAPI()
+    api.forming_ttl = 0
+    api.get_klines('DOGEUSDT', '15m', 100)
+
+    api.revision = 3
+    refreshed = api.get_klines('DOGEUSDT', '15m', 100)
+
+    endpoint, params = api.requests[-1]
+    assert 'startTime' in params
+    assert params['limit'] <= 3
+
+    expected = FakeKlineAPI()
+    expected.revision = 3
+    assert refreshed.equals(expected.get_klines('DOGEUSDT', '15m', 100))
+    assert len(refreshed) == 100
+
+
+def test_kline_cache_lru_byte_budget():
+    """超出字节预算时淘汰最久未使用的条目"""
+    api = FakeKlineAPI()
+    one_entry = api.get_klines('BTCUSDT', '1m', 200).memory_usage(index=True).sum()
+
+    cache = KlineCache(max_bytes=int(one_entry * 2.5))
+    api.kline_cache = cache
+    api.forming_ttl = 60
+    api.get_klines('BTCUSDT', '1m', 200)
+    api.get_klines('BTCUSDT', '1h', 200)
+    api.get_klines('BTCUSDT', '1m', 200)  # 标记为最近使用
+    api.get_klines('BTCUSDT', '4h', 200)
+
+    assert len(cache) == 2
+    assert cache.get(('BTCUSDT', '1h', 200)) is None
+    assert cache.get(('BTCUSDT', '1m', 200)) is not None
+    assert cache.nbytes <= cache.max_bytes
+
+
+class FakeTickerAPI(BinanceAPI):
+    """记录请求参数的BinanceAPI，按 symbols 参数返回24小时统计"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def _make_request(self, endpoint, params=None):
+        self.requests.append((endpoint, dict(params or {})))
+        return [{'symbol': symbol, 'lastPrice': '110', 'openPrice': '100', 'highPrice': '120',
+                 'lowPrice': '100', 'priceChangePercent': '10', 'volume': '5'}
+                for symbol in json.loads(params['symbols'])]
+
+
+def test_batched_tickers_shared_within_ttl():
+    """两个交易对一次请求，之后单个ticker和24小时统计都复用同一响应"""
+    api = FakeTickerAPI()
+    api.ticker_ttl = 60
+    tickers = api.get_24hr_tickers(['BTCUSDT', 'DOGEUSDT'])
+    btc = api.get_24hr_ticker('BTCUSDT')
+    stats = api.calculate_24h_stats('DOGEUSDT')
+
+    assert len(api.requests) == 1
+    assert api.requests[0] == ('/api/v3/ticker/24hr', {'symbols': '["BTCUSDT","DOGEUSDT"]'})
+    assert tickers['DOGEUSDT']['lastPrice'] == 110.0
+    assert btc['highPrice'] == 120.0
+    assert abs(stats['volatility'] - 0.2) < 1e-12
+
+    # 返回副本，调用方修改不影响缓存
+    btc['lastPrice'] = 0
+    assert api.get_24hr_ticker('BTCUSDT')['lastPrice'] == 110.0
+
+    api.ticker_ttl = 0
+    api._ticker_memo.clear()
+    api.get_24hr_ticker('DOGEUSDT')
+    assert api.requests[-1][1] == {'symbols': '["DOGEUSDT"]'}
+
+
+class FakeBinanceServer:
+    """本地HTTP服务，按Binance的 startTime/endTime/limit 语义返回合成K线；delay 模拟网络往返"""
+
+    def __init__(self, delay: float = 0.0):
+        self.requests = []
+        self.delay = delay
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                server.requests.append((url.path, params))
+                time.sleep(server.delay)
+                body = json.dumps(server.handle(url.path, params)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def handle(self, path, params):
+        if path == '/api/v3/ticker/24hr':
+            return [{'symbol': symbol, 'lastPrice': '110', 'highPrice': '120', 'lowPrice': '100',
+                     'priceChangePercent': '10'} for symbol in json.loads(params['symbols'])]
+        if path != '/api/v3/klines':
+            return {}
+        interval_ms = INTERVAL_MS[params['interval']]
+        limit = int(params.get('limit', 500))
+        now_ms = int(time.time() * 1000)
+        start = int(params.get('startTime', now_ms // interval_ms * interval_ms - (limit - 1) * interval_ms))
+        end = int(params.get('endTime', time.time() * 1000))
+        first = -(-start // interval_ms) * interval_ms
+        return [synthetic_kline(open_time, interval_ms)
+                for open_time in range(first, end + 1, interval_ms)][:limit]
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_get_klines_range_pages_beyond_limit():
+    """超过1000根的时间范围被分页并发获取，结果连续且无重复"""
+    start = datetime(2024, 9, 12)
+    start_ms = to_millis(start)
+    end_ms = start_ms + 2499 * 60_000
+
+    with FakeBinanceServer() as server:
+        api = BinanceAPI(base_url=server.url)
+        api.max_workers = 3
+        df = api.get_klines_range('DOGEUSDT', '1m', start, end_ms)
+
+    assert len(server.requests) == 3
+    assert all(int(params['limit']) == 1000 for _, params in server.requests)
+    assert len(df) == 2500
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+    assert (np.diff(df.index.asi8) == np.diff(df.index.asi8)[0]).all()
+    assert df.index[0] == start
+
+
+def test_concurrent_identical_requests_coalesce():
+    """同时发出的相同K线和ticker请求只到达服务器一次，调用方拿到各自的副本"""
+    with FakeBinanceServer(delay=0.2) as server:
+        api = BinanceAPI(base_url=server.url)
+        api.ticker_ttl = 0
+        barrier = threading.Barrier(6)
+        frames, tickers = [], []
+
+        def check():
+            barrier.wait()
+            frames.append(api.get_klines('DOGEUSDT', '1m', 50))
+            tickers.append(api.get_24hr_ticker('DOGEUSDT'))
+
+        threads = [threading.Thread(target=check) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    paths = [path for path, _ in server.requests]
+    assert paths.count('/api/v3/klines') == 1 and paths.count('/api/v3/ticker/24hr') == 1
+    assert api._inflight.shared == 10
+    assert len(frames) == 6 and all(frame.equals(frames[0]) and len(frame) == 50 for frame in frames)
+    assert all(ticker['lastPrice'] == 110.0 for ticker in tickers)
+    tickers[0]['lastPrice'] = 0
+    assert tickers[1]['lastPrice'] == 110.0
+
+
+def test_coalesced_callers_share_errors():
+    """进行中的请求失败时，等待的调用方得到同一个异常；之后的调用重新请求"""
+    from src.data.binance_api import SingleFlight
+
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=call) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader] + followers:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1 and len(errors) == 4 and all(error is errors[0] for error in errors)
+    assert flight.do('key', lambda: 42) == 42
+
+
+if __name__ == "__main__":
+    test_kline_cache_serves_within_ttl()
+    test_kline_cache_refreshes_only_forming_bar()
+    test_kline_cache_lru_byte_budget()
+    test_batched_tickers_shared_within_ttl()
+    test_get_klines_range_pages_beyond_limit()
+    test_concurrent_identical_requests_coalesce()
+    test_coalesced_callers_share_errors()
+    print("✅ BinanceAPI数据层测试通过")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+信号日志测试：按UTC日期分区追加、时间索引查询、只记录新出现的信号（离线，临时目录）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.data.journal import INDEX_DTYPE, Journal, SIGNALS, TICKS
+
+HOUR = 3600 * 1000
+DAY1 = 1758412800000  # 2025-09-21 00:00 UTC
+
+
+def make_journal(directory: str) -> Journal:
+    journal = Journal(root=directory, enabled=True)
+    for hour in range(48):
+        now = DAY1 + hour * HOUR
+        journal.record_tick('DOGEUSDT', {'price': 0.25 + hour / 1000}, time_ms=now)
+        if hour % 6 == 0:
+            journal.record_signal('DOGEUSDT', 'buy', hour // 6 % 3 + 1, time_ms=now, stage='确认')
+        if hour % 12 == 5:
+            journal.record_signal('DOGEUSDT', 'sell', 1, time_ms=now)
+    return journal
+
+
+def test_partitions_and_query():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = make_journal(directory)
+        assert sorted(os.listdir(os.path.join(directory, SIGNALS))) == [
+            '2025-09-21.idx', '2025-09-21.jsonl', '2025-09-22.idx', '2025-09-22.jsonl']
+
+        buys = journal.query(symbol='DOGEUSDT', signal_type='buy')
+        assert [record['time'] for record in buys] == [DAY1 + hour * HOUR for hour in range(0, 48, 6)]
+        assert buys[0] == {'time': DAY1, 'symbol': 'DOGEUSDT', 'type': 'buy', 'signal_id': 1, 'stage': '确认'}
+
+        # 时间范围含两端，跨日期分区；datetime 按UTC处理
+        window = journal.query(signal_id=2, start=datetime(2025, 9, 21, 6), end=DAY1 + 30 * HOUR)
+        assert [record['time'] for record in window] == [DAY1 + 6 * HOUR, DAY1 + 24 * HOUR]
+
+        assert journal.last_signal(signal_id=2, signal_type='buy')['time'] == DAY1 + 42 * HOUR
+        assert journal.last_signal(signal_id=9) is None
+        assert [record['time'] for record in journal.query(signal_type='buy', limit=3)] == [
+            DAY1 + 30 * HOUR, DAY1 + 36 * HOUR, DAY1 + 42 * HOUR]
+
+        ticks = journal.ticks('DOGEUSDT', start=DAY1 + 23 * HOUR, end=DAY1 + 24 * HOUR)
+        assert [record['data']['price'] for record in ticks] == [0.273, 0.274]
+        assert journal.query(symbol='BTCUSDT') == []
+        assert Journal(root=os.path.join(directory, 'missing')).query() == []
+
+
+def test_unindexed_tail_is_ignored():
+    """数据行写了一半而索引未写入时，查询不受影响"""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = make_journal(directory)
+        with open(os.path.join(directory, SIGNALS, '2025-09-22.jsonl'), 'ab') as f:
+            f.write(b'{"time":17584')
+
+        assert len(journal.query(start=DAY1 + 24 * HOUR)) == 6
+
+
+def test_corrupt_line_is_skipped():
+    """索引范围内的损坏行被跳过，其余记录照常返回"""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = make_journal(directory)
+        path = os.path.join(directory, SIGNALS, '2025-09-21.jsonl')
+        index = np.fromfile(os.path.join(directory, SIGNALS, '2025-09-21.idx'), dtype=INDEX_DTYPE)
+        with open(path, 'r+b') as f:
+            f.seek(int(index['offset'][1]))
+            f.write(b'#' * (int(index['size'][1]) - 1))
+
+        records = journal.query(end=DAY1 + 24 * HOUR - 1)
+        assert len(records) == len(index) - 1
+        assert len(journal.query(limit=len(index) + 6)) == len(index) + 5
+
+
+def test_prune_removes_old_partitions():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = make_journal(directory)
+        assert journal.prune(TICKS, 1, now_ms=DAY1 + 36 * HOUR) == 0
+        assert journal.prune(TICKS, 1, now_ms=DAY1 + 60 * HOUR) == 1
+        assert sorted(os.listdir(os.path.join(directory, TICKS))) == ['2025-09-22.idx', '2025-09-22.jsonl']
+        assert journal.ticks()[0]['time'] == DAY1 + 24 * HOUR
+        assert len(journal.query()) == 12
+
+
+def test_disabled_journal_writes_nothing():
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(root=directory, enabled=False)
+        assert not journal.record_signal('DOGEUSDT', 'buy', 1)
+        assert os.listdir(directory) == []
+
+
+def test_query_uses_time_index():
+    """一天8万多条tick中按时间窗口查询，只读取窗口内的行"""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(root=directory, enabled=True)
+        lines = b''.join(b'{"time":%d,"symbol":"DOGEUSDT","data":{"price":0.25}}\n' % (DAY1 + n * 1000)
+                         for n in range(86400))
+        os.makedirs(os.path.join(directory, 'ticks'))
+        size = len(lines) // 86400
+        index = np.zeros(86400, dtype=INDEX_DTYPE)
+        index['time'] = DAY1 + np.arange(86400) * 1000
+        index['offset'] = np.arange(86400) * size
+        index['size'] = size
+        with open(os.path.join(directory, 'ticks', '2025-09-21.jsonl'), 'wb') as f:
+            f.write(lines)
+        index.tofile(os.path.join(directory, 'ticks', '2025-09-21.idx'))
+
+        started = time.perf_counter()
+        ticks = journal.ticks(start=DAY1 + 3600 * 1000, end=DAY1 + 3660 * 1000)
+        elapsed = time.perf_counter() - started
+        assert len(ticks) == 61 and ticks[0]['time'] == DAY1 + 3600 * 1000
+        assert elapsed < 0.05, elapsed
+
+        # 不带过滤条件的 limit 查询只读取索引末尾的行
+        started = time.perf_counter()
+        latest = journal.ticks(limit=5)
+        elapsed = time.perf_counter() - started
+        assert [tick['time'] for tick in latest] == [DAY1 + n * 1000 for n in range(86395, 86400)]
+        assert elapsed < 0.01, elapsed
+
+
+def test_web_records_new_signals_once():
+    import web_app
+
+    with tempfile.TemporaryDirectory() as directory:
+        original = web_app.journal
+        web_app.journal = Journal(root=directory, enabled=True)
+        monitor = web_app.WebMonitor()
+        try:
+            market = {
+                'status': 'running',
+                'btc': {'price': 115000.0, 'change_percent': 1.2, 'valid': True,
+                        'indicators': {'kdj_4h': {'k': 40.0, 'd': 42.0, 'j': 36.0}}},
+                'doge': {'price': 0.25, 'change_percent': -0.5, 'indicators': {}},
+                'signals': {'list': [{'type': 'buy', 'signal_id': 2, 'mode': 'dual',
+                                      'verdicts': {'realtime': True, 'confirmed': False}}]}
+            }
+            closed = {'type': 'confirmed', 'closed': [('DOGEUSDT', '1m')]}
+            monitor.record_journal(market)
+            monitor.record_journal(market)
+            monitor.record_journal({**market, 'signals': {'list': []}})
+            monitor.record_journal(market, closed)
+
+            signals = web_app.journal.query(signal_id=2)
+            assert len(signals) == 2
+            assert signals[0]['verdicts'] == {'realtime': True, 'confirmed': False}
+            assert signals[0]['price'] == 0.25
+            ticks = web_app.journal.ticks('BTCUSDT')
+            # tick只在首次（超过间隔）和K线收盘时写入
+            assert len(ticks) == 2 and ticks[0]['data'] == {'price': 115000.0, 'change_percent': 1.2,
+                                                            'valid': True, 'kdj_4h': 42.0}
+
+            response = web_app.app.test_client().get('/api/journal/signals?signal_id=2&limit=1').get_json()
+            assert response['count'] == 1 and response['signals'][0]['type'] == 'buy'
+        finally:
+            web_app.journal = original
+
+
+if __name__ == "__main__":
+    test_partitions_and_query()
+    test_unindexed_tail_is_ignored()
+    test_corrupt_line_is_skipped()
+    test_prune_removes_old_partitions()
+    test_disabled_journal_writes_nothing()
+    test_query_uses_time_index()
+    test_web_records_new_signals_once()
+    print("✅ 信号日志测试通过")
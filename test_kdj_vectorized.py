@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+KDJ向量化实现与逐行参考实现的一致性测试（离线，使用合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.kdj import KDJ, calculate_kdj
+
+
+def make_klines(n: int = 300, seed: int = 7) -> pd.DataFrame:
+    """生成随机游走K线，并插入一段横盘（最高价=最低价）以覆盖除零分支"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+    df = pd.DataFrame({
+        'open': close,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': 1.0
+    }, index=pd.date_range('2024-09-12', periods=n, freq='min'))
+    df.iloc[50:62, :4] = 42.0
+    return df
+
+
+def test_vectorized_matches_reference():
+    """默认的向量化路径与原逐行实现结果一致"""
+    df = make_klines()
+    kdj = KDJ(9, 3, 3)
+
+    fast = kdj.calculate(df)
+    reference = kdj._calculate_reference(df)
+
+    assert list(fast.columns) == list(reference.columns)
+    assert fast.index.equals(reference.index)
+    for column in ['RSV', 'K', 'D', 'J', 'KDJ_MAX']:
+        np.testing.assert_allclose(fast[column], reference[column], rtol=0, atol=1e-9)
+
+
+def test_calculate_kdj_uses_vectorized_path():
+    """便捷函数与类方法输出相同"""
+    df = make_klines(120)
+    np.testing.assert_allclose(
+        calculate_kdj(df)['KDJ_MAX'],
+        KDJ(9, 3, 3)._calculate_reference(df)['KDJ_MAX'],
+        rtol=0, atol=1e-9
+    )
+
+
+def test_short_input_returns_empty():
+    """数据不足一个周期时返回空DataFrame"""
+    assert KDJ(9, 3, 3).calculate(make_klines(8)).empty
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_reference()
+    test_calculate_kdj_uses_vectorized_path()
+    test_short_input_returns_empty()
+    print("✅ KDJ向量化一致性测试通过")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+K线解码测试：数组解码与原DataFrame转换结果一致、预分配数组、无 orjson 时回退（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.data import kline_decoder
+from src.data.kline_decoder import PRICE_COLUMNS, decode_klines, decode_klines_frame, klines_frame
+from test_binance_api import FakeKlineAPI
+from bench_kline_decode import legacy_frame, make_payload
+
+
+def test_decode_matches_legacy_frame():
+    """数组解码构造的DataFrame与逐列 pd.to_numeric 的结果完全相同"""
+    payload = make_payload(1000)
+    expected = legacy_frame(json.loads(payload))
+
+    for source in (payload, payload.decode(), json.loads(payload)):
+        df = decode_klines_frame(source)
+        pd.testing.assert_frame_equal(df, expected)
+
+    open_time, values = decode_klines(payload)
+    assert open_time.dtype == np.int64 and values.dtype == np.float64 and values.shape == (1000, 5)
+    assert (open_time == expected.index.to_numpy(dtype='datetime64[ms]').astype(np.int64)).all()
+
+
+def test_decode_into_preallocated_arrays():
+    payload = make_payload(300)
+    buffers = (np.zeros(500, dtype=np.int64), np.zeros((500, len(PRICE_COLUMNS))))
+    open_time, values = decode_klines(payload, out=buffers)
+    assert len(open_time) == 300 and np.shares_memory(values, buffers[1])
+    assert (buffers[1][:300] == decode_klines(payload)[1]).all() and (buffers[1][300:] == 0).all()
+
+    try:
+        decode_klines(make_payload(600), out=buffers)
+        assert False, '容量不足时应报错'
+    except ValueError:
+        pass
+
+    # 不连续的预分配数组（更大数组的列切片）同样写入原内存
+    table = np.zeros((300, 8))
+    open_time, values = decode_klines(payload, out=(np.zeros(300, dtype=np.int64), table[:, 1:6]))
+    assert not table[:, 1:6].flags.c_contiguous and np.shares_memory(values, table)
+    assert (table[:, 1:6] == decode_klines(payload)[1]).all() and (table[:, [0, 6, 7]] == 0).all()
+
+    for bad in ((np.zeros(300), buffers[1]), (buffers[0], np.zeros((300, 5), dtype=np.float32)),
+                (buffers[0], np.zeros((300, 4)))):
+        try:
+            decode_klines(payload, out=bad)
+            assert False, '类型或形状不符时应报错'
+        except ValueError:
+            pass
+
+    open_time, values = decode_klines(b'[]')
+    assert open_time.shape == (0,) and values.shape == (0, 5)
+    assert decode_klines_frame([]).empty and list(klines_frame(open_time, values).columns) == list(PRICE_COLUMNS)
+
+
+def test_stdlib_fallback_without_orjson():
+    payload = make_payload(50)
+    original = kline_decoder.orjson
+    kline_decoder.orjson = None
+    try:
+        open_time, values = decode_klines(payload)
+    finally:
+        kline_decoder.orjson = original
+    assert (values == decode_klines(payload)[1]).all()
+
+
+def test_api_array_and_frame_paths_agree():
+    api = FakeKlineAPI()
+    api.kline_cache = None
+    open_time, values = api.get_kline_arrays('DOGEUSDT', '1m', 50)
+    df = api.get_klines('DOGEUSDT', '1m', 50)
+    assert len(open_time) == 50
+
+    # 两次请求可能跨过分钟边界，只比较共同的K线
+    common, left, right = np.intersect1d(open_time, df.index.to_numpy(dtype='datetime64[ms]').astype(np.int64),
+                                         return_indices=True)
+    assert len(common) >= 49
+    assert (values[left] == df.to_numpy()[right]).all()
+
+
+if __name__ == "__main__":
+    test_decode_matches_legacy_frame()
+    test_decode_into_preallocated_arrays()
+    test_stdlib_fallback_without_orjson()
+    test_api_array_and_frame_paths_agree()
+    print("✅ K线解码测试通过")
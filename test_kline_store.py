@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+本地K线列式存储测试（离线，使用临时目录和本地假服务）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import tempfile
+import time
+
+import numpy as np
+
+from src.data.binance_api import BinanceAPI, INTERVAL_MS
+from src.data.store import KlineStore
+from test_binance_api import FakeBinanceServer, FakeKlineAPI
+from test_kdj_vectorized import make_klines
+
+
+def test_append_and_memmap_load():
+    """追加后按列内存映射读取，重复追加只写入新K线，跨越初始容量时自动扩容"""
+    df = make_klines(1500)
+    with tempfile.TemporaryDirectory() as root:
+        store = KlineStore(root)
+        assert store.append('DOGEUSDT', '1m', df.iloc[:1000]) == 1000
+        assert store.append('DOGEUSDT', '1m', df.iloc[900:]) == 500
+        assert store.append('DOGEUSDT', '1m', df) == 0
+
+        columns = store.load('DOGEUSDT', '1m')
+        assert isinstance(columns['close'], np.memmap)
+        assert columns['close'].flags['C_CONTIGUOUS']
+        assert len(columns['open_time']) == 1500
+
+        loaded = store.load_frame('DOGEUSDT', '1m')
+        assert loaded.index.equals(df.index)
+        np.testing.assert_array_equal(loaded['close'].to_numpy(), df['close'].to_numpy())
+
+        window = store.load_frame('DOGEUSDT', '1m', start=df.index[100].to_pydatetime(),
+                                  end=df.index[199].to_pydatetime())
+        assert len(window) == 100 and window.index[0] == df.index[100]
+
+
+def test_append_new_fetches_only_after_last_bar():
+    """append_new 只下载最后一根已保存K线之后的已收盘K线"""
+    interval_ms = INTERVAL_MS['1m']
+    now_ms = int(time.time() * 1000)
+    start_ms = (now_ms // interval_ms - 1500) * interval_ms
+
+    with tempfile.TemporaryDirectory() as root, FakeBinanceServer() as server:
+        store = KlineStore(root, api=BinanceAPI(base_url=server.url))
+        first = store.append_new('DOGEUSDT', '1m', start=start_ms)
+        pages = len(server.requests)
+
+        server.requests.clear()
+        again = store.append_new('DOGEUSDT', '1m')
+
+        assert first >= 1499
+        assert pages == 2
+        assert again <= 1 and len(server.requests) <= 1
+        open_time = store.load('DOGEUSDT', '1m')['open_time']
+        assert (np.diff(open_time) == interval_ms).all()
+        # 不保存形成中的K线
+        assert open_time[-1] + interval_ms <= int(time.time() * 1000)
+
+
+class ListedKlineAPI(FakeKlineAPI):
+    """按 endTime 截断、且没有上市时间之前数据的假K线接口"""
+
+    def __init__(self, listed_ms: int = 0):
+        super().__init__()
+        self.listed_ms = listed_ms
+
+    def _make_request(self, endpoint, params=None):
+        rows = super()._make_request(endpoint, params)
+        end = params.get('endTime', float('inf'))
+        return [row for row in rows if self.listed_ms <= row[0] <= end]
+
+
+def test_load_recent_prepends_missing_range():
+    """本地数据起点晚于所需范围时只下载缺少的前段，不删除已保存的数据"""
+    interval_ms = INTERVAL_MS['1m']
+    now_ms = int(time.time() * 1000)
+    start_ms = (now_ms // interval_ms - 300) * interval_ms
+
+    with tempfile.TemporaryDirectory() as root:
+        api = ListedKlineAPI()
+        store = KlineStore(root, api=api)
+        store.append_new('DOGEUSDT', '1m', start=start_ms + 200 * interval_ms)
+        first = store.first_open_time('DOGEUSDT', '1m')
+
+        api.requests.clear()
+        df = store.load_recent('DOGEUSDT', '1m', 300)
+        assert len(df) == 300
+        assert df.index.is_monotonic_increasing and (np.diff(df.index.asi8) > 0).all()
+        backfill = [params for _, params in api.requests if params['startTime'] == start_ms]
+        assert len(backfill) == 1 and backfill[0]['endTime'] == first
+        assert store.listing_start('DOGEUSDT', '1m') is None
+
+
+def test_listing_start_recorded_once():
+    """上市晚于所需起点的交易对记录上市时间，之后不再向前补齐"""
+    interval_ms = INTERVAL_MS['1m']
+    now_ms = int(time.time() * 1000)
+    listed_ms = (now_ms // interval_ms - 50) * interval_ms
+
+    with tempfile.TemporaryDirectory() as root:
+        api = ListedKlineAPI(listed_ms)
+        store = KlineStore(root, api=api)
+        assert len(store.load_recent('NEWUSDT', '1m', 200)) == 50
+        assert store.listing_start('NEWUSDT', '1m') == listed_ms
+
+        # 扩容重写后仍保留上市时间
+        path = store.path('NEWUSDT', '1m')
+        capacity, length, _ = store._read_header(path)
+        store._grow(path, capacity, length, capacity * 2)
+        assert store.listing_start('NEWUSDT', '1m') == listed_ms
+
+        api.requests.clear()
+        assert len(store.load_recent('NEWUSDT', '1m', 300)) >= 50
+        assert all(params['startTime'] > listed_ms for _, params in api.requests)
+        assert store.listing_start('NEWUSDT', '1m') == listed_ms
+
+
+if __name__ == "__main__":
+    test_append_and_memmap_load()
+    test_append_new_fetches_only_after_last_bar()
+    test_load_recent_prepends_missing_range()
+    test_listing_start_recorded_once()
+    print("✅ K线存储测试通过")
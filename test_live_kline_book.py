@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+实时K线簿测试：REST初始化一次，之后只应用WebSocket事件（离线，使用假数据流）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data.binance_api import INTERVAL_MS
+from src.data.live_kline_book import LiveKlineBook, KlineRing
+from src.data.websocket_client import BinanceWebSocket
+from src.indicators import BOLL, KDJ, REALTIME, CONFIRMED
+from src.strategy import market_snapshot
+from src.strategy.live_indicators import LiveIndicators
+from src.strategy.market_snapshot import MarketSnapshot, compute_indicators
+from test_binance_api import FakeKlineAPI, FakeTickerAPI
+
+
+class FakeWebSocket:
+    """记录订阅并可手动推送事件的假WebSocket客户端"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.is_connected = True
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def subscribe_kline(self, symbol, interval, callback):
+        self.callbacks[f"{symbol.lower()}@kline_{interval}"] = callback
+
+    def subscribe_ticker(self, symbol, callback):
+        self.callbacks[f"{symbol.lower()}@ticker"] = callback
+
+    def push_kline(self, symbol, interval, open_time, close, closed=False):
+        self.callbacks[f"{symbol.lower()}@kline_{interval}"]({'k': {
+            't': open_time, 'o': '1', 'h': str(close + 1), 'l': '0.5',
+            'c': str(close), 'v': '10', 'x': closed
+        }})
+
+
+class FakeAPI(FakeKlineAPI):
+    """K线使用 FakeKlineAPI，ticker使用 FakeTickerAPI；failing 为真时K线请求失败"""
+
+    failing = False
+
+    def _make_request(self, endpoint, params=None):
+        if self.failing and endpoint == '/api/v3/klines':
+            self.requests.append((endpoint, dict(params or {})))
+            raise ConnectionError('offline')
+        if endpoint == '/api/v3/ticker/24hr':
+            return FakeTickerAPI._make_request(self, endpoint, params)
+        return super()._make_request(endpoint, params)
+
+
+def make_book(capacity=50):
+    api = FakeAPI()
+    api.kline_cache = None
+    ws = FakeWebSocket()
+    book = LiveKlineBook(capacity=capacity, api=api, ws=ws)
+    book.start([('DOGEUSDT', '1m')])
+    return book, api, ws
+
+
+def test_forming_bar_replaced_in_place():
+    """同一开盘时间的事件覆盖最后一根K线，读取不产生网络请求"""
+    book, api, ws = make_book()
+    requests_after_bootstrap = len(api.requests)
+    last_open = book._rings[('DOGEUSDT', '1m')].last_open_time
+
+    ws.push_kline('DOGEUSDT', '1m', last_open, close=123.0)
+    df = book.get_klines('DOGEUSDT', '1m', 50)
+
+    assert len(df) == 50
+    assert df['close'].iloc[-1] == 123.0
+    assert len(api.requests) == requests_after_bootstrap
+
+
+def test_rollover_and_wraparound():
+    """新开盘时间的事件滚动到下一根，满容量时覆盖最旧的一根"""
+    book, api, ws = make_book(capacity=50)
+    ring = book._rings[('DOGEUSDT', '1m')]
+    first_open = ring.last_open_time
+
+    for step in range(1, 11):
+        ws.push_kline('DOGEUSDT', '1m', first_open + step * 60_000, close=200.0 + step, closed=True)
+
+    df = book.get_klines('DOGEUSDT', '1m', 50)
+    assert len(df) == 50
+    assert ring.last_closed and df.attrs['last_closed']
+    assert df['close'].iloc[-1] == 210.0
+    assert df.index.is_monotonic_increasing
+    assert df.index[-1].value // 1_000_000 == first_open + 10 * 60_000
+
+
+def test_gap_triggers_rest_resync():
+    """数据流漏掉K线时重新用REST初始化"""
+    book, api, ws = make_book()
+    requests_before = len(api.requests)
+    last_open = book._rings[('DOGEUSDT', '1m')].last_open_time
+
+    ws.push_kline('DOGEUSDT', '1m', last_open + 5 * 60_000, close=1.0)
+
+    # 重新初始化在独立线程执行，等待其完成
+    book._resync_executor.submit(lambda: None).result(timeout=5)
+    assert len(api.requests) == requests_before + 1
+    assert book.is_live('DOGEUSDT', '1m')
+
+
+def test_failed_resync_backs_off():
+    """重新初始化失败后，退避时间内的数据流事件不再请求REST"""
+    book, api, ws = make_book()
+    key = ('DOGEUSDT', '1m')
+    last_open = book._rings[key].last_open_time
+    api.failing = True
+    requests_before = len(api.requests)
+
+    for step in range(5, 10):
+        ws.push_kline('DOGEUSDT', '1m', last_open + step * 60_000, close=1.0)
+        book._resync_executor.submit(lambda: None).result(timeout=5)
+    assert len(api.requests) == requests_before + 1
+    assert not book.is_live('DOGEUSDT', '1m') and book._failures[key] == 1
+    # 失败的序列不会在读取时同步重试
+    book.get_klines('DOGEUSDT', '1m', 50)
+    assert key not in book._pending
+
+    # 退避结束后的下一个事件重试，成功后清除失败记录
+    api.failing = False
+    book._retry_at[key] = 0.0
+    ws.push_kline('DOGEUSDT', '1m', last_open + 10 * 60_000, close=1.0)
+    book._resync_executor.submit(lambda: None).result(timeout=5)
+    assert book.is_live('DOGEUSDT', '1m') and key not in book._failures
+
+
+def test_ring_matches_rest_frame():
+    """初始化后的环形缓冲与REST数据一致"""
+    api = FakeKlineAPI()
+    df = api.get_klines('BTCUSDT', '1h', 30)
+    ring = KlineRing('1h', 20)
+    ring.load(df)
+
+    assert ring.frame().equals(df.iloc[-20:].astype(float))
+    assert ring.interval_ms == INTERVAL_MS['1h']
+    # REST数据无法判断最后一根是否收盘
+    assert ring.frame().attrs['last_closed'] is None
+
+
+def test_snapshot_reads_from_book():
+    """运行中的K线簿作为快照数据源：ticker来自数据流，K线来自内存"""
+    book, api, ws = make_book(capacity=120)
+    snapshot_requests = [('DOGEUSDT', '1m'), ('DOGEUSDT', '15m')]
+    MarketSnapshot.capture(snapshot_requests, ['DOGEUSDT'], api=book)
+    ws.callbacks['dogeusdt@ticker']({'s': 'DOGEUSDT', 'c': '0.25', 'h': '0.3', 'l': '0.2', 'P': '5'})
+
+    requests_before = len(api.requests)
+    snapshot = MarketSnapshot.capture(snapshot_requests, ['DOGEUSDT'], api=book)
+
+    assert len(api.requests) == requests_before
+    assert snapshot.ticker('DOGEUSDT')['lastPrice'] == 0.25
+    assert len(snapshot.klines_for('DOGEUSDT', '15m')) == 100
+
+    book.stop()
+    assert not book.running
+
+
+def test_stale_stream_falls_back_to_rest():
+    """连接断开或数据流长时间无事件时读取回退到REST，恢复后重新使用内存数据"""
+    book, api, ws = make_book()
+    book.track_ticker('DOGEUSDT')
+    ws.callbacks['dogeusdt@ticker']({'s': 'DOGEUSDT', 'c': '0.25', 'h': '0.3', 'l': '0.2', 'P': '5'})
+    requests_before = len(api.requests)
+
+    ws.is_connected = False
+    book.get_klines('DOGEUSDT', '1m', 50)
+    assert book.get_24hr_ticker('DOGEUSDT')['lastPrice'] != 0.25
+    assert len(api.requests) == requests_before + 2
+
+    ws.is_connected = True
+    assert book.get_24hr_ticker('DOGEUSDT')['lastPrice'] == 0.25
+    book.get_klines('DOGEUSDT', '1m', 50)
+    assert len(api.requests) == requests_before + 2
+
+    # 连接正常但超过一个周期没有K线事件
+    book._updated[('DOGEUSDT', '1m')] -= 61
+    book.get_klines('DOGEUSDT', '1m', 50)
+    assert len(api.requests) == requests_before + 3
+    last_open = book._rings[('DOGEUSDT', '1m')].last_open_time
+    ws.push_kline('DOGEUSDT', '1m', last_open, close=123.0)
+    assert book.get_klines('DOGEUSDT', '1m', 50)['close'].iloc[-1] == 123.0
+    assert len(api.requests) == requests_before + 3
+
+
+def test_snapshot_uses_streaming_indicators():
+    """快照读取数据流增量维护的指标，不重算整段序列，结果与批量计算一致"""
+    book, api, ws = make_book(capacity=120)
+    key = ('DOGEUSDT', '1m')
+    tracker = LiveIndicators.attach(book)
+    assert LiveIndicators.attach(book) is tracker
+
+    calls = []
+
+    class CountingKDJ(KDJ):
+        def calculate(self, df):
+            calls.append('kdj')
+            return super().calculate(df)
+
+    class CountingBOLL(BOLL):
+        def calculate(self, df):
+            calls.append('boll')
+            return super().calculate(df)
+
+    original = market_snapshot.KDJ, market_snapshot.BOLL
+    market_snapshot.KDJ, market_snapshot.BOLL = CountingKDJ, CountingBOLL
+    try:
+        last_open = book._rings[key].last_open_time
+        events = [(last_open, 0.31, False), (last_open, 0.32, True), (last_open + 60_000, 0.30, False),
+                  (last_open + 60_000, 0.29, False)]
+        for open_time, close, closed in events:
+            ws.push_kline('DOGEUSDT', '1m', open_time, close=close, closed=closed)
+            snapshot = MarketSnapshot.capture([key], ['DOGEUSDT'], api=book)
+            expected = compute_indicators(snapshot.klines_for(*key), BOLL(), KDJ(), '1m')
+            for mode in (REALTIME, CONFIRMED):
+                actual = snapshot.indicators_for(*key, mode)
+                kdj, boll = expected[mode]['kdj'], expected[mode]['boll']
+                assert all(abs(actual['kdj'][name] - kdj[name]) < 1e-6 for name in kdj), mode
+                assert actual['boll']['touch'] == boll['touch']
+                assert all(abs(actual['boll'][name] - boll[name]) < 1e-9 for name in ('MB', 'UP', 'DN', 'close'))
+        assert calls == []
+
+        # 从REST回退读取的K线与增量状态不一致时批量计算
+        ws.is_connected = False
+        MarketSnapshot.capture([key], ['DOGEUSDT'], api=book)
+        assert sorted(calls) == ['boll', 'kdj']
+    finally:
+        market_snapshot.KDJ, market_snapshot.BOLL = original
+        book.remove_listener(tracker.on_kline)
+
+
+def test_close_disables_reconnect():
+    """主动关闭后 on_close 不再安排重连"""
+    ws = BinanceWebSocket()
+    ws.close()
+    ws.on_close(None, None, None)
+    assert ws.closing and ws.reconnect_attempts == 0
+
+
+if __name__ == "__main__":
+    test_forming_bar_replaced_in_place()
+    test_rollover_and_wraparound()
+    test_gap_triggers_rest_resync()
+    test_failed_resync_backs_off()
+    test_ring_matches_rest_frame()
+    test_snapshot_reads_from_book()
+    test_stale_stream_falls_back_to_rest()
+    test_snapshot_uses_streaming_indicators()
+    test_close_disables_reconnect()
+    print("✅ 实时K线簿测试通过")
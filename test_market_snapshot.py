@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+行情快照测试：一次检查只请求一次每个 (交易对, 时间框架)（离线，使用假API）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from collections import Counter
+
+from src.strategy.btc_monitor import btc_monitor
+from src.strategy.doge_signals import doge_signal_generator
+from src.strategy.market_snapshot import MarketSnapshot
+from test_kdj_vectorized import make_klines
+
+
+class CountingAPI:
+    """记录调用次数的假BinanceAPI"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def get_klines(self, symbol, interval, limit=500):
+        self.calls[('klines', symbol, interval)] += 1
+        return make_klines(limit, seed=len(symbol) + len(interval))
+
+    def get_24hr_tickers(self, symbols):
+        self.calls[('tickers',) + tuple(symbols)] += 1
+        return {symbol: {'lastPrice': 1.0, 'highPrice': 1.01, 'lowPrice': 1.0,
+                         'openPrice': 1.0, 'priceChangePercent': 0.5, 'volume': 10.0}
+                for symbol in symbols}
+
+
+def test_snapshot_fetches_each_series_once():
+    """快照对每个时间框架请求一次、ticker批量请求一次，所有规则共用"""
+    api = CountingAPI()
+    snapshot = MarketSnapshot.capture(api=api)
+
+    doge_signal_generator.check_all_signals(snapshot)
+    btc_monitor.check_all_conditions(snapshot)
+
+    assert sum(api.calls.values()) == 6
+    assert all(count == 1 for count in api.calls.values())
+    assert set(snapshot.tickers) == {'BTCUSDT', 'DOGEUSDT'}
+
+
+def test_snapshot_is_immutable():
+    """快照容器只读"""
+    snapshot = MarketSnapshot.capture(api=CountingAPI())
+    try:
+        snapshot.klines[('BTCUSDT', '1m')] = None
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("快照应当不可修改")
+
+
+def test_btc_conditions_from_snapshot():
+    """BTC条件直接使用快照中的ticker和KDJ"""
+    snapshot = MarketSnapshot.capture(api=CountingAPI())
+    result = btc_monitor.check_all_conditions(snapshot)
+
+    assert abs(result['24h_conditions']['volatility'] - 0.01) < 1e-12
+    assert result['kdj_conditions']['kdj_4h'] == snapshot.indicators_for('BTCUSDT', '4h')['kdj']['KDJ_MAX']
+
+
+if __name__ == "__main__":
+    test_snapshot_fetches_each_series_once()
+    test_snapshot_is_immutable()
+    test_btc_conditions_from_snapshot()
+    print("✅ 行情快照测试通过")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+请求权重控制测试：令牌桶限速、按优先级排队、响应头同步、429/418 暂停（离线，本地HTTP服务）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.data.async_binance_api import AsyncBinanceAPI
+from src.data.binance_api import BinanceAPI
+from src.data import rate_limiter
+from src.data.rate_limiter import (PRIORITY_BACKFILL, PRIORITY_BULK, PRIORITY_LIVE, RateLimitError,
+                                   WeightGovernor, request_priority, request_weight)
+
+
+class RecordingGovernor(WeightGovernor):
+    """记录每次请求的优先级"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.priorities = []
+
+    def acquire(self, weight, priority=None, max_wait=None):
+        self.priorities.append(rate_limiter._priority.get() if priority is None else priority)
+        super().acquire(weight, priority, max_wait)
+
+
+class WeightServer:
+    """本地HTTP服务：返回空K线，响应头带累计权重；status 可改为 429/418"""
+
+    def __init__(self):
+        self.requests = 0
+        self.status = 200
+        self.retry_after = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps([] if server.status == 200 else {'code': -1003}).encode()
+                self.send_response(server.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-MBX-USED-WEIGHT-1m', str(server.requests * 2))
+                if server.retry_after is not None:
+                    self.send_header('Retry-After', str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_request_weights():
+    assert request_weight('/api/v3/klines', {'limit': 1000}) == 2
+    assert request_weight('/api/v3/ticker/24hr', {'symbols': '["BTCUSDT","DOGEUSDT"]'}) == 2
+    assert request_weight('/api/v3/ticker/24hr', {'symbols': json.dumps([str(n) for n in range(50)])}) == 40
+    assert request_weight('/api/v3/ticker/24hr') == 80
+    assert request_weight('/api/v3/ping') == 1
+
+
+def test_bucket_paces_requests():
+    """令牌用完后按补充速度等待"""
+    governor = WeightGovernor(weight_limit=20, reserve=0, window=1.0)
+    started = time.monotonic()
+    governor.acquire(20)
+    assert time.monotonic() - started < 0.05
+    governor.acquire(10)
+    assert 0.4 < time.monotonic() - started < 0.8
+    assert governor.headroom()['headroom'] < 0.1
+
+
+def test_live_requests_jump_the_queue():
+    """历史下载先排队，后到的实时请求先获得权重"""
+    governor = WeightGovernor(weight_limit=10, reserve=0, window=0.5)
+    governor.acquire(10)
+    order = []
+
+    def request(name, priority):
+        governor.acquire(10, priority=priority)
+        order.append(name)
+
+    backfill = threading.Thread(target=request, args=('backfill', PRIORITY_BACKFILL))
+    backfill.start()
+    time.sleep(0.05)
+    live = threading.Thread(target=request, args=('live', PRIORITY_LIVE))
+    live.start()
+    time.sleep(0.05)
+    assert governor.headroom()['waiting'] == 2
+    backfill.join(timeout=5)
+    live.join(timeout=5)
+    assert order == ['live', 'backfill']
+
+
+def test_server_weight_and_backoff():
+    governor = WeightGovernor(weight_limit=6000, reserve=0.1)
+    governor.observe(200, {'X-MBX-USED-WEIGHT-1m': '5000'})
+    headroom = governor.headroom()
+    assert headroom['server_used'] == 5000 and headroom['tokens'] <= 401
+
+    # 429：按 Retry-After 暂停，超过等待上限的请求立即失败
+    governor.observe(429, {'Retry-After': '0.3'})
+    started = time.monotonic()
+    try:
+        governor.acquire(1, max_wait=0.1)
+        assert False, '暂停期间应拒绝请求'
+    except RateLimitError:
+        pass
+    assert time.monotonic() - started < 0.05
+    assert governor.headroom()['blocked_for'] > 0 and governor.rejected == 1
+
+    # 418 且没有 Retry-After：指数退避
+    governor.observe(418, {})
+    assert 1.5 < governor.headroom()['blocked_for'] <= 4
+
+
+def test_binance_api_honours_governor():
+    """429 之后不再请求服务器，直到暂停结束；历史下载和批量初始化带上各自的优先级"""
+    with WeightServer() as server:
+        governor = RecordingGovernor(weight_limit=6000, reserve=0.1, max_wait=0.5)
+        api = BinanceAPI(base_url=server.url, governor=governor)
+        api.kline_cache = None
+
+        api.get_klines('DOGEUSDT', '1m', 10)
+        assert governor.server_used == 2 and governor.priorities == [PRIORITY_LIVE]
+
+        api.get_klines_range('DOGEUSDT', '1m', 0, 2_500 * 60_000)
+        assert governor.priorities[1:] == [PRIORITY_BACKFILL] * 3
+
+        with request_priority(PRIORITY_BULK), AsyncBinanceAPI(api) as client:
+            client.fetch_all([('BTCUSDT', '1h'), ('DOGEUSDT', '1h')], [], 10)
+        assert governor.priorities[4:] == [PRIORITY_BULK] * 2
+
+        server.status, server.retry_after = 429, 60
+        assert api.get_klines('DOGEUSDT', '1m', 10).empty
+        requests = server.requests
+        assert api.get_klines('DOGEUSDT', '1m', 10).empty
+        assert server.requests == requests
+        assert governor.headroom()['blocked_for'] > 50
+
+
+if __name__ == "__main__":
+    test_request_weights()
+    test_bucket_paces_requests()
+    test_live_requests_jump_the_queue()
+    test_server_weight_and_backoff()
+    test_binance_api_honours_governor()
+    print("✅ 请求权重控制测试通过")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+K线聚合测试：按UTC整点对齐的周期边界、数据流聚合与批量聚合一致（离线，合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.data.binance_api import INTERVAL_MS
+from src.data.resampler import KlineResampler, bucket_start, compare_klines, resample_klines
+
+INTERVALS = ('15m', '1h', '4h')
+MINUTE = INTERVAL_MS['1m']
+
+
+def make_minutes(start: str, count: int, seed: int = 7) -> pd.DataFrame:
+    index = pd.date_range(start, periods=count, freq='1min')
+    index.name = 'timestamp'
+    rng = np.random.default_rng(seed)
+    close = 0.25 + np.cumsum(rng.normal(0, 0.001, count))
+    spread = rng.random(count) * 0.002
+    return pd.DataFrame({
+        'open': np.concatenate(([close[0]], close[:-1])),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.random(count) * 1000,
+    }, index=index)
+
+
+def event(df: pd.DataFrame, n: int, closed: bool, volume_share: float = 1.0) -> dict:
+    row = df.iloc[n]
+    return {'t': int(df.index[n].value // 1_000_000), 'i': '1m', 'x': closed, 'o': row['open'],
+            'h': row['high'], 'l': row['low'], 'c': row['close'], 'v': row['volume'] * volume_share}
+
+
+def as_row(kline: dict) -> list:
+    return [kline['o'], kline['h'], kline['l'], kline['c'], kline['v']]
+
+
+def test_buckets_align_to_utc():
+    """从非整点开始的1分钟K线，4小时K线仍从 00:00/04:00/08:00 UTC 开始"""
+    minutes = make_minutes('2024-09-01 02:37', 600)
+    bars = resample_klines(minutes, '4h')
+    assert list(bars.index) == [pd.Timestamp('2024-09-01 00:00'), pd.Timestamp('2024-09-01 04:00'),
+                                pd.Timestamp('2024-09-01 08:00'), pd.Timestamp('2024-09-01 12:00')]
+
+    expected = minutes.resample('4h').agg({'open': 'first', 'high': 'max', 'low': 'min',
+                                           'close': 'last', 'volume': 'sum'})
+    assert compare_klines(bars, expected)['mismatched'] == []
+    assert bucket_start(1725158220000, '1d') == 1725148800000  # 2024-09-01 02:37 -> 00:00 UTC
+
+    try:
+        bucket_start(0, '1w')
+        assert False, '周线从周一开始，不能按纪元对齐聚合'
+    except ValueError:
+        pass
+
+
+def test_stream_matches_batch_including_forming_bar():
+    """每条事件之后各周期的K线（含形成中的一根）都等于对已收到数据的批量聚合"""
+    minutes = make_minutes('2024-09-01 03:50', 140)
+    resampler = KlineResampler(INTERVALS)
+    resampler.seed('DOGEUSDT', minutes.iloc[:30])
+
+    for n in range(30, len(minutes)):
+        forming = resampler.update('DOGEUSDT', event(minutes, n, closed=False, volume_share=0.5))
+        partial = minutes.iloc[:n + 1].copy()
+        partial.iloc[-1, partial.columns.get_loc('volume')] *= 0.5
+        for kline in forming:
+            expected = resample_klines(partial, kline['i']).iloc[-1]
+            assert np.allclose(as_row(kline), expected.to_numpy()) and not kline['x']
+
+        final = resampler.update('DOGEUSDT', event(minutes, n, closed=True))
+        close_time = minutes.index[n] + pd.Timedelta(minutes=1)
+        for kline in final:
+            expected = resample_klines(minutes.iloc[:n + 1], kline['i'])
+            assert kline['t'] == int(expected.index[-1].value // 1_000_000)
+            assert np.allclose(as_row(kline), expected.iloc[-1].to_numpy())
+            assert kline['x'] == (close_time.value // 1_000_000 % INTERVAL_MS[kline['i']] == 0)
+
+        # 重复的收盘事件不再计入
+        assert resampler.update('DOGEUSDT', event(minutes, n, closed=True)) == []
+
+
+def test_missed_close_event_and_gap():
+    minutes = make_minutes('2024-09-01 00:00', 20)
+    resampler = KlineResampler(['15m'])
+    resampler.seed('DOGEUSDT', minutes.iloc[:5])
+
+    # 没收到收盘事件，下一根开始时上一根计入聚合
+    resampler.update('DOGEUSDT', event(minutes, 5, closed=False))
+    kline = resampler.update('DOGEUSDT', event(minutes, 6, closed=True))[0]
+    assert np.allclose(as_row(kline), resample_klines(minutes.iloc[:7], '15m').iloc[-1].to_numpy())
+
+    # 漏掉K线后返回 None，直到重新初始化
+    assert resampler.update('DOGEUSDT', event(minutes, 9, closed=True)) is None
+    assert resampler.update('DOGEUSDT', event(minutes, 10, closed=True)) is None
+    resampler.seed('DOGEUSDT', minutes.iloc[:11])
+    assert len(resampler.update('DOGEUSDT', event(minutes, 11, closed=True))) == 1
+    assert resampler.seed_limit == 16 and KlineResampler(INTERVALS).seed_limit == 241
+
+
+if __name__ == "__main__":
+    test_buckets_align_to_utc()
+    test_stream_matches_batch_including_forming_bar()
+    test_missed_close_event_and_gap()
+    print("✅ K线聚合测试通过")
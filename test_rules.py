@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+规则引擎测试：规则由配置编译，标量和数组输入结果一致（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+from src.strategy.rules import DEFAULT_DOGE_RULES, compile_rules
+
+
+def make_inputs(touch_1h, kdj_1h, touch_15m, kdj_15m, kdj_1m):
+    return {
+        '1h': {'touch': touch_1h, 'kdj': kdj_1h},
+        '15m': {'touch': touch_15m, 'kdj': kdj_15m},
+        '1m': {'kdj': kdj_1m}
+    }
+
+
+def test_shared_conditions_compiled_once():
+    """规则间相同的条件只编译为一个原子条件"""
+    rules = compile_rules(DEFAULT_DOGE_RULES)
+    total = sum(len(spec['conditions']) for spec in DEFAULT_DOGE_RULES)
+
+    assert len(rules) == 7
+    assert len(rules.atoms) == len(set(rules.atoms))
+    assert len(rules.atoms) < total
+    assert rules.timeframes == ('1h', '15m', '1m')
+
+
+def test_thresholds_come_from_config():
+    """阈值引用按传入的阈值表解析"""
+    inputs = make_inputs('DN', 12.0, 'DN', 12.0, 5.0)
+
+    default = compile_rules(DEFAULT_DOGE_RULES, {'oversold': [10, 15, 20, 20]})
+    assert not default.evaluate(inputs)[('buy', 1)]['signal']
+
+    relaxed = compile_rules(DEFAULT_DOGE_RULES, {'oversold': [15, 15, 20, 20]})
+    verdict = relaxed.evaluate(inputs)[('buy', 1)]
+    assert verdict['signal'] is True
+    assert verdict['conditions'] == {
+        'btc_ok': True, 'doge_1h_dn': True, 'doge_1h_kdj': True,
+        'doge_15m_dn': True, 'doge_15m_kdj': True, 'doge_1m_kdj': True
+    }
+
+
+def test_scalar_verdicts():
+    """标量输入：BTC条件只约束买入，缺失的KDJ不触发"""
+    rules = compile_rules(DEFAULT_DOGE_RULES)
+
+    buy = make_inputs('DN', 5.0, 'DN', 5.0, 5.0)
+    assert [s['signal_id'] for s in rules.triggered(buy)] == [1]
+    assert rules.triggered(buy, btc_valid=False) == []
+
+    sell = make_inputs('UP', 95.0, 'UP', 50.0, 95.0)
+    assert [(s['type'], s['signal_id']) for s in rules.triggered(sell, btc_valid=False)] == [('sell', 2)]
+
+    missing = {'1h': {'touch': 'UP'}, '15m': {'touch': 'UP'}, '1m': {}}
+    assert rules.triggered(missing) == []
+
+
+def test_array_inputs_match_scalars():
+    """数组输入逐元素与标量结果一致"""
+    rules = compile_rules(DEFAULT_DOGE_RULES)
+    rng = np.random.default_rng(7)
+    size = 500
+    bands = np.array(['UP', 'MB', 'DN', None], dtype=object)
+
+    arrays = make_inputs(
+        bands[rng.integers(0, 4, size)], rng.uniform(0, 100, size),
+        bands[rng.integers(0, 4, size)], rng.uniform(0, 100, size),
+        rng.uniform(0, 100, size)
+    )
+    arrays['1h']['kdj'][:50] = rng.uniform(0, 12, 50)
+    arrays['15m']['kdj'][:50] = rng.uniform(0, 12, 50)
+    arrays['1m']['kdj'][:50] = rng.uniform(0, 12, 50)
+    btc_valid = rng.random(size) < 0.8
+
+    vectorized = rules.evaluate(arrays, btc_valid)
+    for i in range(size):
+        scalar = make_inputs(
+            arrays['1h']['touch'][i], arrays['1h']['kdj'][i],
+            arrays['15m']['touch'][i], arrays['15m']['kdj'][i],
+            arrays['1m']['kdj'][i]
+        )
+        expected = rules.evaluate(scalar, bool(btc_valid[i]))
+        for key, result in expected.items():
+            assert vectorized[key]['signal'][i] == result['signal']
+
+
+if __name__ == "__main__":
+    test_shared_conditions_compiled_once()
+    test_thresholds_come_from_config()
+    test_scalar_verdicts()
+    test_array_inputs_match_scalars()
+    print("✅ 规则引擎测试通过")
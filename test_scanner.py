@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+多交易对扫描测试：K线矩阵按开盘时间定位、一次扫描与逐交易对参考实现一致（离线，合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.binance_api import INTERVAL_MS
+from src.data.resampler import resample_klines
+from src.strategy.backtest import open_times_ms
+from src.strategy.scanner import BarMatrix, MultiSymbolScanner
+from test_backtest import END, make_engine, make_series, reference_point
+
+SYMBOLS = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT', 'DDDUSDT']
+WINDOW = 24
+MINUTE = INTERVAL_MS['1m']
+
+
+def make_market():
+    klines = {('BTCUSDT', '4h'): make_series('4h', 1), ('BTCUSDT', '1h'): make_series('1h', 2),
+              ('BTCUSDT', '1m'): make_series('1m', 3)}
+    for n, symbol in enumerate(SYMBOLS):
+        for interval in ('1h', '15m', '1m'):
+            klines[(symbol, interval)] = make_series(interval, 10 * n + len(interval))
+    return klines
+
+
+class FakeAPI:
+    """返回截至 now 的K线（含形成中的K线）"""
+
+    def __init__(self, klines):
+        self.klines = klines
+        self.now = None
+
+    def get_klines(self, symbol, interval, limit=500):
+        df = self.klines[(symbol, interval)]
+        return df[open_times_ms(df) < self.now].iloc[-limit:]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.callbacks = {}
+        self.is_connected = True
+
+    def subscribe_many(self, callbacks):
+        self.callbacks.update(callbacks)
+
+    def connect(self):
+        pass
+
+
+def make_scanner(klines, resample=True):
+    engine = make_engine()
+    scanner = MultiSymbolScanner(SYMBOLS, rules=engine.rules, btc_symbol='BTCUSDT', window=WINDOW,
+                                 settle=5.0, resample=resample, api=FakeAPI(klines), ws=FakeWebSocket())
+    scanner.engine = engine
+    return scanner
+
+
+def kline_event(symbol, df, open_time, closed=True):
+    bar = df.loc[pd.Timestamp(open_time, unit='ms')]
+    return {'s': symbol, 'k': {'t': open_time, 'i': '1m', 'x': closed, 'o': bar['open'], 'h': bar['high'],
+                               'l': bar['low'], 'c': bar['close'], 'v': bar['volume']}}
+
+
+def closed_tail(df, interval, close_time):
+    """close_time 时刻已收盘的最近 WINDOW 根K线"""
+    return df[open_times_ms(df) + INTERVAL_MS[interval] <= close_time].tail(WINDOW)
+
+
+def test_bar_matrix_slots_and_window():
+    matrix = BarMatrix('1m', ['A', 'B'], capacity=5)
+    for n in range(7):
+        matrix.apply('A', {'t': n * MINUTE, 'o': n, 'h': n, 'l': n, 'c': n, 'v': 1})
+    for n in range(4, 7):
+        matrix.apply('B', {'t': n * MINUTE, 'o': n, 'h': n, 'l': n, 'c': n, 'v': 1})
+
+    values, valid = matrix.window(6 * MINUTE, 3)
+    assert list(valid) == [True, True]
+    assert values[3].tolist() == [[4, 5, 6], [4, 5, 6]]
+
+    # B 缺少更早的K线；覆盖旧列后窗口只能取最近 capacity 根
+    assert list(matrix.window(6 * MINUTE, 5)[1]) == [True, False]
+
+    # 漏掉K线时报告不连续
+    assert not matrix.apply('A', {'t': 9 * MINUTE, 'o': 9, 'h': 9, 'l': 9, 'c': 9, 'v': 1})
+
+
+def test_scan_matches_per_symbol_reference():
+    """一次向量化扫描与逐交易对、只用已收盘K线的参考实现一致"""
+    klines = make_market()
+    scanner = make_scanner(klines, resample=False)
+    end_ms = int(pd.Timestamp(END).value // 1_000_000)
+
+    fired = set()
+    for step in range(0, 720, 37):
+        close_time = end_ms - 12 * 3600 * 1000 + step * MINUTE
+        scanner.api.now = close_time
+        assert scanner.bootstrap() == 0
+        result = scanner.scan(close_time)
+        assert result['valid'].all()
+
+        for row, symbol in enumerate(SYMBOLS):
+            reference_klines = {
+                ('BTCUSDT', '4h'): closed_tail(klines[('BTCUSDT', '4h')], '4h', close_time),
+                ('BTCUSDT', '1h'): closed_tail(klines[('BTCUSDT', '1h')], '1h', close_time),
+            }
+            for interval in ('1h', '15m', '1m'):
+                reference_klines[('DOGEUSDT', interval)] = closed_tail(klines[(symbol, interval)], interval,
+                                                                      close_time)
+            btc_valid, verdicts = reference_point(scanner.engine, reference_klines, close_time)
+
+            assert result['btc_valid'] == btc_valid
+            for key, verdict in verdicts.items():
+                assert bool(result['masks'][key][row]) == verdict['signal'], (close_time, symbol, key)
+                if verdict['signal']:
+                    fired.add(key[0])
+
+        expected = {(signal['symbol'], signal['type'], signal['signal_id']) for signal in result['signals']}
+        assert expected == {(SYMBOLS[row], key[0], key[1]) for key, mask in result['masks'].items()
+                            for row in np.flatnonzero(mask)}
+
+    assert fired, '采样时刻没有触发任何信号'
+
+
+def test_closed_candles_trigger_one_scan():
+    """所有交易对的收盘事件到齐后立即扫描一次，并记录耗时"""
+    klines = make_market()
+    scanner = make_scanner(klines)
+    end_ms = int(pd.Timestamp(END).value // 1_000_000)
+    open_time = end_ms - 3600 * 1000
+    scanner.api.now = open_time
+    scanner.bootstrap()
+
+    results = []
+    done = threading.Event()
+    scanner.on_scan(lambda result: (results.append(result), done.set()))
+    scanner.bootstrap = lambda keys=None: 0
+    scanner.start()
+    try:
+        # 每个交易对只订阅1分钟K线
+        assert len(scanner.ws.callbacks) == len(SYMBOLS) + 1
+        for symbol in SYMBOLS:
+            scanner.on_kline(kline_event(symbol, klines[(symbol, '1m')], open_time))
+        assert done.wait(timeout=3)
+    finally:
+        scanner.stop()
+
+    assert len(results) == 1
+    assert results[0]['time'] == open_time + MINUTE
+    assert results[0]['valid'].all()
+    summary = scanner.latency_summary()
+    assert summary['scans'] == 1 and summary['compute_ms']['max'] > 0
+
+
+def test_late_close_is_not_rescanned():
+    """settle 超时后才到达的收盘事件不会让同一收盘时间再扫描一次"""
+    klines = make_market()
+    scanner = make_scanner(klines)
+    scanner.settle = 0.3
+    end_ms = int(pd.Timestamp(END).value // 1_000_000)
+    open_time = end_ms - 3600 * 1000
+    scanner.api.now = open_time
+    scanner.bootstrap()
+
+    results = []
+    done = threading.Event()
+    scanner.on_scan(lambda result: (results.append(result), done.set()))
+    scanner.bootstrap = lambda keys=None: 0
+    scanner.start()
+    try:
+        for symbol in SYMBOLS[:-1]:
+            scanner.on_kline(kline_event(symbol, klines[(symbol, '1m')], open_time))
+        assert done.wait(timeout=3)
+        late = SYMBOLS[-1]
+        scanner.on_kline(kline_event(late, klines[(late, '1m')], open_time))
+        time.sleep(scanner.settle + 0.2)
+    finally:
+        scanner.stop()
+
+    assert [result['time'] for result in results] == [open_time + MINUTE]
+    assert not scanner._closed
+    # 迟到的K线仍然写入矩阵
+    assert scanner.matrices['1m'].window(open_time, 1)[1].all()
+
+
+def test_resampled_timeframes_follow_1m_stream():
+    """聚合模式下15分钟和1小时K线由1分钟数据流生成，收盘后与1分钟K线的聚合一致"""
+    klines = make_market()
+    scanner = make_scanner(klines)
+    assert len(make_scanner(klines, resample=False).streams()) == len(SYMBOLS) * 3 + 2
+
+    end_ms = int(pd.Timestamp(END).value // 1_000_000)
+    start = end_ms - 3 * 3600 * 1000 - 20 * MINUTE
+    scanner.api.now = start
+    assert scanner.bootstrap() == 0
+
+    for open_time in range(start, end_ms - 3600 * 1000, MINUTE):
+        for symbol in SYMBOLS + ['BTCUSDT']:
+            scanner.on_kline(kline_event(symbol, klines[(symbol, '1m')], open_time, closed=False))
+            scanner.on_kline(kline_event(symbol, klines[(symbol, '1m')], open_time))
+    assert not scanner._stale
+
+    for interval, bars in (('15m', 8), ('1h', 2)):
+        matrix = scanner.matrices[interval]
+        last_open = end_ms - 3600 * 1000 - INTERVAL_MS[interval]
+        values, valid = matrix.window(last_open, bars)
+        assert valid.all()
+        for row, symbol in enumerate(SYMBOLS):
+            minutes = klines[(symbol, '1m')]
+            expected = resample_klines(minutes[minutes.index < pd.Timestamp(last_open + INTERVAL_MS[interval],
+                                                                            unit='ms')], interval).tail(bars)
+            assert np.allclose(values[:, row].T, expected.to_numpy()), (symbol, interval)
+
+    # 1分钟K线不连续时该交易对全部重新初始化
+    scanner.on_kline(kline_event('AAAUSDT', klines[('AAAUSDT', '1m')], end_ms - 30 * MINUTE))
+    assert scanner._stale == {key for key in scanner._routes if key[0] == 'AAAUSDT'}
+
+
+if __name__ == "__main__":
+    test_bar_matrix_slots_and_window()
+    test_scan_matches_per_symbol_reference()
+    test_closed_candles_trigger_one_scan()
+    test_late_close_is_not_rescanned()
+    test_resampled_timeframes_follow_1m_stream()
+    print("✅ 多交易对扫描测试通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+事件驱动信号调度测试：K线收盘时确认，形成中的K线节流预警（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import threading
+
+from src.core.scheduler import SignalScheduler, CONFIRMED, REALTIME
+from src.strategy.market_snapshot import MarketSnapshot
+from test_live_kline_book import make_book
+
+REQUESTS = [('DOGEUSDT', '1m'), ('DOGEUSDT', '15m')]
+
+
+def test_closes_in_one_batch_confirm_once():
+    """同时到达的多个收盘事件合并为一次确认"""
+    book, _, _ = make_book()
+    scheduler = SignalScheduler(REQUESTS, realtime_cooldown=60, book=book)
+    events = []
+    done = threading.Event()
+    scheduler.on_confirmed(lambda event: (events.append(event), done.set()))
+
+    scheduler.notify('DOGEUSDT', '1m', {'x': True})
+    scheduler.notify('DOGEUSDT', '15m', {'x': True})
+    scheduler.notify('BTCUSDT', '1m', {'x': True})  # 未订阅，忽略
+    scheduler.start()
+    assert done.wait(5)
+    scheduler.stop()
+
+    assert len(events) == 1
+    assert events[0]['type'] == CONFIRMED
+    assert events[0]['closed'] == REQUESTS
+
+
+def test_realtime_throttled_by_cooldown():
+    """冷却时间内形成中K线的推送只触发一次预警，非预警交易对忽略"""
+    book, _, _ = make_book()
+    scheduler = SignalScheduler(REQUESTS + [('BTCUSDT', '1h')], realtime_cooldown=60,
+                                realtime_symbols=['DOGEUSDT'], book=book)
+
+    for _ in range(5):
+        scheduler.notify('DOGEUSDT', '1m', {'x': False})
+    scheduler.notify('BTCUSDT', '1h', {'x': False})
+
+    assert scheduler._events.qsize() == 1
+    assert scheduler._events.get_nowait()['type'] == REALTIME
+
+
+def test_stream_close_triggers_evaluation():
+    """数据流的 x=true 事件触发确认，回调中的快照已包含收盘的K线"""
+    book, api, ws = make_book(capacity=120)
+    scheduler = SignalScheduler([('DOGEUSDT', '1m')], realtime_cooldown=60, book=book)
+    closes = []
+    done = threading.Event()
+
+    def evaluate(event):
+        snapshot = MarketSnapshot.capture([('DOGEUSDT', '1m')], [], api=book)
+        closes.append(snapshot.klines_for('DOGEUSDT', '1m')['close'].iloc[-1])
+        done.set()
+
+    scheduler.on_confirmed(evaluate)
+    scheduler.start()
+    last_open = book._rings[('DOGEUSDT', '1m')].last_open_time
+    ws.push_kline('DOGEUSDT', '1m', last_open, close=321.0, closed=True)
+
+    assert done.wait(5)
+    scheduler.stop()
+    assert closes == [321.0]
+
+
+if __name__ == "__main__":
+    test_closes_in_one_batch_confirm_once()
+    test_realtime_throttled_by_cooldown()
+    test_stream_close_triggers_evaluation()
+    print("✅ 信号调度测试通过")
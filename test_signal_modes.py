@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+预警/确认双口径测试：同一次指标计算同时给出形成中K线和已收盘K线的判断（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import importlib
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from src.indicators import BOLL, KDJ, REALTIME, CONFIRMED, DUAL
+from src.strategy.btc_monitor import btc_monitor
+from src.strategy.doge_signals import doge_signal_generator
+from src.strategy.market_snapshot import MarketSnapshot, compute_indicators
+from test_kdj_vectorized import make_klines
+
+
+class CountingKDJ(KDJ):
+    """记录 calculate 调用次数"""
+
+    def __init__(self):
+        super().__init__(9, 3, 3)
+        self.calls = 0
+
+    def calculate(self, df):
+        self.calls += 1
+        return super().calculate(df)
+
+
+def test_dual_values_from_one_pass():
+    """dual口径只计算一次序列，确认口径等于去掉最后一根后的实时口径"""
+    df = make_klines(200)
+    kdj = CountingKDJ()
+    values = kdj.get_latest_values(df, DUAL)
+
+    assert kdj.calls == 1
+    assert values[REALTIME] == KDJ(9, 3, 3).get_latest_values(df)
+    assert values[CONFIRMED] == KDJ(9, 3, 3).get_latest_values(df.iloc[:-1])
+
+    boll = BOLL(20, 2)
+    boll_values = boll.get_latest_values(df, DUAL)
+    assert boll_values[CONFIRMED] == boll.get_latest_values(df, CONFIRMED)
+    assert boll_values[CONFIRMED] == boll.get_latest_values(df.iloc[:-1])
+
+
+def test_confirmed_uses_last_closed_bar():
+    """最后一根仍在形成时确认口径取倒数第二根；已到收盘时间时取最后一根"""
+    df = make_klines(100)
+    boll, kdj = BOLL(20, 2), KDJ(9, 3, 3)
+
+    # 合成数据的时间在过去，最后一根已收盘
+    closed = compute_indicators(df, boll, kdj, '1m')
+    assert closed[CONFIRMED] == closed[REALTIME]
+
+    # 把时间平移到当前，最后一根正在形成
+    now_ms = int(time.time() * 1000) // 60_000 * 60_000
+    forming_df = df.set_axis(pd.date_range(end=pd.Timestamp(now_ms, unit='ms'), periods=len(df), freq='min'))
+    forming = compute_indicators(forming_df, boll, kdj, '1m', now_ms + 30_000)
+    assert forming[CONFIRMED]['kdj'] == kdj.get_latest_values(forming_df, CONFIRMED)
+    assert forming[CONFIRMED]['kdj'] != forming[REALTIME]['kdj']
+
+    # REST数据：距收盘不足1秒仍视为形成中，到达收盘时间才视为已收盘
+    almost = compute_indicators(forming_df, boll, kdj, '1m', now_ms + 59_500)
+    assert almost[CONFIRMED] == forming[CONFIRMED]
+    at_close = compute_indicators(forming_df, boll, kdj, '1m', now_ms + 60_000)
+    assert at_close[CONFIRMED] == at_close[REALTIME]
+
+
+def test_confirmed_follows_stream_closed_flag():
+    """数据流K线按 x 标志选择确认口径，不看本地时钟"""
+    df = make_klines(100)
+    boll, kdj = BOLL(20, 2), KDJ(9, 3, 3)
+    now_ms = int(time.time() * 1000) // 60_000 * 60_000
+    forming_df = df.set_axis(pd.date_range(end=pd.Timestamp(now_ms, unit='ms'), periods=len(df), freq='min'))
+
+    # 本地时钟认为最后一根还在形成，但数据流已推送 x=true
+    forming_df.attrs['last_closed'] = True
+    closed = compute_indicators(forming_df, boll, kdj, '1m', now_ms + 1_000)
+    assert closed[CONFIRMED] == closed[REALTIME]
+
+    # 时钟认为已收盘，但数据流尚未推送 x=true
+    df.attrs['last_closed'] = False
+    forming = compute_indicators(df, boll, kdj, '1m')
+    assert forming[CONFIRMED]['kdj'] == kdj.get_latest_values(df, CONFIRMED)
+    assert forming[CONFIRMED]['kdj'] != forming[REALTIME]['kdj']
+
+
+def test_btc_without_snapshot_uses_same_confirmed_bar():
+    """不传快照时BTC的确认口径与快照一样取最后一根已收盘的K线"""
+    class FakeAPI:
+        def get_klines(self, symbol, interval, limit=500):
+            return make_klines(100)
+
+    # src.strategy 导出了同名实例，按模块路径取得模块
+    btc_monitor_module = importlib.import_module('src.strategy.btc_monitor')
+    original = btc_monitor_module.binance_api
+    btc_monitor_module.binance_api = FakeAPI()
+    try:
+        result = btc_monitor.check_kdj_conditions(mode=DUAL)
+    finally:
+        btc_monitor_module.binance_api = original
+
+    # 合成数据的时间在过去，最后一根已收盘：确认口径就是最后一根
+    expected = compute_indicators(make_klines(100), BOLL(), KDJ(), '4h')
+    assert result[CONFIRMED]['kdj_4h'] == expected[CONFIRMED]['kdj']['KDJ_MAX']
+    assert result[CONFIRMED] == result[REALTIME]
+
+
+def test_btc_verdict_logged_once_per_evaluation():
+    """双口径判断每次只输出一行BTC条件日志，包含两种口径的结果"""
+    class RecordingLogger:
+        def __init__(self):
+            self.lines = []
+
+        def info(self, message):
+            self.lines.append(message)
+
+        debug = error = warning = info
+
+    btc_monitor_module = importlib.import_module('src.strategy.btc_monitor')
+    original = btc_monitor_module.logger
+    btc_monitor_module.logger = recorder = RecordingLogger()
+    try:
+        btc_monitor.check_all_conditions(make_snapshot(5.0, 5.0), DUAL)
+    finally:
+        btc_monitor_module.logger = original
+
+    verdict_lines = [line for line in recorder.lines if 'BTC监控条件' in line]
+    assert len(verdict_lines) == 1
+    assert REALTIME in verdict_lines[0] and CONFIRMED in verdict_lines[0]
+
+
+def make_snapshot(realtime_kdj: float, confirmed_kdj: float) -> MarketSnapshot:
+    """构造只在指定口径下满足买入信号1的快照"""
+    df = make_klines(50)
+    btc = {'boll': {}, 'kdj': {'KDJ_MAX': 30.0}}
+
+    def doge(kdj_max_by_mode):
+        return {mode: {'boll': {'touch': 'DN'}, 'kdj': {'KDJ_MAX': value}}
+                for mode, value in kdj_max_by_mode.items()}
+
+    indicators = {
+        ('BTCUSDT', '4h'): {REALTIME: btc, CONFIRMED: btc},
+        ('BTCUSDT', '1h'): {REALTIME: btc, CONFIRMED: btc},
+        ('DOGEUSDT', '1h'): doge({REALTIME: realtime_kdj, CONFIRMED: confirmed_kdj}),
+        ('DOGEUSDT', '15m'): doge({REALTIME: realtime_kdj, CONFIRMED: confirmed_kdj}),
+        ('DOGEUSDT', '1m'): doge({REALTIME: realtime_kdj, CONFIRMED: confirmed_kdj}),
+    }
+    ticker = {'highPrice': 1.01, 'lowPrice': 1.0, 'priceChangePercent': 0.5, 'lastPrice': 1.0}
+    return MarketSnapshot(
+        timestamp=datetime.now(),
+        tickers={'BTCUSDT': ticker, 'DOGEUSDT': ticker},
+        klines={key: df for key in indicators},
+        indicators=indicators
+    )
+
+
+def test_dual_signals_carry_both_verdicts():
+    """dual口径返回的信号同时带有预警和确认的判断"""
+    warning_only = make_snapshot(realtime_kdj=5.0, confirmed_kdj=60.0)
+    assert doge_signal_generator.check_all_signals(warning_only, CONFIRMED) == []
+
+    signals = doge_signal_generator.check_all_signals(warning_only, DUAL)
+    buy_1 = [signal for signal in signals if signal['type'] == 'buy' and signal['signal_id'] == 1]
+    assert len(buy_1) == 1
+    assert buy_1[0]['verdicts'] == {REALTIME: True, CONFIRMED: False}
+    assert buy_1[0]['mode'] == REALTIME
+
+    both = doge_signal_generator.check_all_signals(make_snapshot(5.0, 5.0), DUAL)
+    buy_1 = [signal for signal in both if signal['type'] == 'buy' and signal['signal_id'] == 1][0]
+    assert buy_1['verdicts'] == {REALTIME: True, CONFIRMED: True}
+    assert buy_1['mode'] == CONFIRMED
+
+
+if __name__ == "__main__":
+    test_dual_values_from_one_pass()
+    test_confirmed_uses_last_closed_bar()
+    test_confirmed_follows_stream_closed_flag()
+    test_btc_without_snapshot_uses_same_confirmed_bar()
+    test_dual_signals_carry_both_verdicts()
+    test_btc_verdict_logged_once_per_evaluation()
+    print("✅ 预警/确认双口径测试通过")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+版本化状态存储测试：HTTP接口只读取最新版本，不触发上游请求（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import threading
+
+import numpy as np
+
+from src.core.state_store import StateStore, apply_delta, diff_state
+
+
+def test_publish_versions_and_payload():
+    """每次发布版本号加一，JSON只在发布时编码一次"""
+    store = StateStore()
+    assert store.latest().version == 0 and store.latest().data is None
+
+    first = store.publish({'price': np.float64(0.25), 'ok': np.bool_(True)})
+    second = store.publish({'price': 0.26})
+
+    assert (first.version, second.version) == (1, 2)
+    assert json.loads(first.payload) == {'price': 0.25, 'ok': True}
+    assert store.latest() is second
+
+
+def test_wait_for_wakes_on_publish():
+    """等待中的消费者在生产者发布后立即返回"""
+    store = StateStore()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(store.wait_for(1, timeout=5)))
+    waiter.start()
+    store.publish({'n': 1})
+    waiter.join(timeout=5)
+
+    assert results and results[0].version == 1
+    assert store.wait_for(5, timeout=0.01).version == 1
+
+
+def test_endpoints_read_store_only():
+    """/api/data 和 /api/status 不请求上游，多次读取返回同一版本"""
+    import web_app
+
+    def fail(*args, **kwargs):
+        raise AssertionError("消费者不应触发上游请求")
+
+    monitor = web_app.web_monitor
+    original_store = monitor.store
+    monitor.get_market_data = fail
+    web_app.binance_api.test_connection = fail
+    monitor.store = StateStore()
+    try:
+        monitor.store.publish({'status': 'running', 'doge': {'price': 0.25}})
+        monitor.store.set_status(api_connected=True)
+        client = web_app.app.test_client()
+
+        for _ in range(3):
+            response = client.get('/api/data')
+            assert response.status_code == 200
+            assert response.get_json() == {'status': 'running', 'doge': {'price': 0.25}}
+            assert response.headers['X-Data-Version'] == '1'
+
+        status = client.get('/api/status').get_json()
+        assert status['api_connected'] is True
+        assert status['data_version'] == 1
+    finally:
+        del monitor.get_market_data
+        del web_app.binance_api.test_connection
+        monitor.store = original_store
+
+
+def make_market(price: float, kdj_1h: float) -> dict:
+    return {
+        'timestamp': f'12:00:{int(price) % 60:02d}',
+        'btc': {
+            'price': price,
+            'indicators': {
+                'kdj_4h': {'k': 40.0, 'd': 41.0, 'j': 38.0},
+                'kdj_1h': {'k': kdj_1h, 'd': 30.0, 'j': 20.0},
+                'market_stats': {'amplitude_24h': 2.5, 'volume_24h': 1e9}
+            },
+            'error_hint': 'stale'
+        },
+        'signals': {'count': 0, 'list': []}
+    }
+
+
+def test_diff_and_apply_delta():
+    """增量只含变化字段，合并后与新状态一致"""
+    old = make_market(100.0, 25.0)
+    new = make_market(101.0, 26.0)
+    del new['btc']['error_hint']
+    new['doge'] = {'price': 0.25}
+
+    delta = diff_state(old, new)
+    assert delta['changed'] == {
+        'timestamp': new['timestamp'],
+        'btc': {'price': 101.0, 'indicators': {'kdj_1h': {'k': 26.0}}},
+        'doge': {'price': 0.25}
+    }
+    assert delta['removed'] == [['btc', 'error_hint']]
+    assert apply_delta(old, delta) == new
+    assert diff_state(new, new) == {'changed': {}, 'removed': []}
+
+
+def test_publish_computes_delta():
+    """第二个版本起带有相对上一版本的增量，且明显小于全量"""
+    store = StateStore()
+    assert store.publish(make_market(100.0, 25.0)).delta is None
+
+    latest = store.publish(make_market(101.0, 25.0))
+    assert latest.delta['changed'] == {'timestamp': '12:00:41', 'btc': {'price': 101.0}}
+    assert len(json.dumps(latest.delta)) < len(latest.payload) / 3
+
+
+def test_socket_full_then_delta():
+    """连接时收到带序号的全量，之后收到增量；出现缺口时可请求全量"""
+    import web_app
+
+    monitor = web_app.web_monitor
+    original_store = monitor.store
+    monitor.store = StateStore()
+    monitor._auto_started = True  # 不启动后台生产者
+    markets = iter([make_market(100.0, 25.0), make_market(101.0, 25.0)])
+    monitor.get_market_data = lambda: next(markets)
+    try:
+        monitor.push_update()
+        client = web_app.socketio.test_client(web_app.app)
+        received = client.get_received()
+        full = [item['args'][0] for item in received if item['name'] == 'market_update']
+        assert full[0]['seq'] == 1 and full[0]['btc']['price'] == 100.0
+
+        monitor.push_update()
+        deltas = [item['args'][0] for item in client.get_received() if item['name'] == 'market_delta']
+        assert deltas == [{'seq': 2, 'base': 1, 'changed': {'timestamp': '12:00:41', 'btc': {'price': 101.0}},
+                           'removed': []}]
+
+        client.emit('request_snapshot')
+        full = [item['args'][0] for item in client.get_received() if item['name'] == 'market_update']
+        assert full[0]['seq'] == 2 and full[0]['btc']['price'] == 101.0
+        client.disconnect()
+    finally:
+        del monitor.get_market_data
+        monitor.store = original_store
+
+
+if __name__ == "__main__":
+    test_publish_versions_and_payload()
+    test_wait_for_wakes_on_publish()
+    test_endpoints_read_store_only()
+    test_diff_and_apply_delta()
+    test_publish_computes_delta()
+    test_socket_full_then_delta()
+    print("✅ 状态存储测试通过")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+增量指标与批量计算的一致性测试（离线，使用合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.boll import BOLL, StreamingBOLL
+from src.indicators.kdj import KDJ, StreamingKDJ
+from test_kdj_vectorized import make_klines
+
+
+def test_streaming_kdj_matches_batch():
+    """逐根推入（含形成中K线的多次更新）后，每一步都与批量计算的最新值一致"""
+    df = make_klines(80)
+    batch = KDJ(9, 3, 3)
+    stream = StreamingKDJ(9, 3, 3)
+
+    for i in range(len(df)):
+        bar = df.iloc[i]
+        # 形成中的K线先推一个中间状态，再以收盘状态提交
+        partial = {'high': bar['high'], 'low': bar['low'], 'close': (bar['high'] + bar['low']) / 2}
+        stream.update(partial, closed=False)
+        values = stream.update(bar, closed=True)
+
+        if i + 1 >= 9:
+            expected = batch.get_latest_values(df.iloc[:i + 1])
+            for key in ['K', 'D', 'J', 'KDJ_MAX']:
+                assert abs(values[key] - expected[key]) < 1e-9
+
+
+def test_streaming_kdj_forming_bar_is_provisional():
+    """形成中的K线不改变已提交状态"""
+    df = make_klines(60)
+    stream = StreamingKDJ(9, 3, 3)
+    committed = stream.seed(df.iloc[:-1])
+
+    forming = stream.update(df.iloc[-1], closed=False)
+    expected = KDJ(9, 3, 3).get_latest_values(df)
+    assert abs(forming['KDJ_MAX'] - expected['KDJ_MAX']) < 1e-9
+    assert stream.latest() == forming
+
+    # 同一根K线的后续更新基于同一个已提交状态
+    stream.update(df.iloc[-2], closed=False)
+    again = stream.update(df.iloc[-1], closed=False)
+    assert again == forming
+    assert committed['K'] != forming['K']
+
+
+def test_streaming_boll_matches_batch():
+    """逐根推入后，每一步的MB/UP/DN与触及状态都与rolling计算一致"""
+    df = make_klines(120)
+    batch = BOLL(20, 2)
+    stream = StreamingBOLL(20, 2)
+    stream.RESYNC_INTERVAL = 25  # 覆盖重算分支
+
+    for i in range(len(df)):
+        bar = df.iloc[i]
+        stream.update({'high': bar['high'], 'low': bar['low'], 'close': bar['open'] + 0.5}, closed=False)
+        values = stream.update(bar, closed=True)
+
+        if i + 1 < 20:
+            assert values == {}
+            continue
+
+        expected = batch.get_latest_values(df.iloc[:i + 1])
+        for key in ['MB', 'UP', 'DN']:
+            assert abs(values[key] - expected[key]) < 1e-9
+        assert values['touch'] == expected['touch']
+
+
+def test_streaming_boll_stable_at_large_offset():
+    """价格基数很大、波动很小时，滑动Welford不会出现负方差或明显漂移"""
+    rng = np.random.default_rng(3)
+    closes = 1e8 + rng.normal(0, 1e-3, 5000)
+    stream = StreamingBOLL(20, 2)
+    for close in closes:
+        values = stream.update({'high': close, 'low': close, 'close': close}, closed=True)
+
+    expected_std = closes[-20:].std(ddof=1)
+    assert abs((values['UP'] - values['MB']) / 2 - expected_std) < 1e-6
+
+
+def test_streaming_boll_forming_bar():
+    """形成中的K线与包含该K线的批量计算一致，且不影响已提交状态"""
+    df = make_klines(60)
+    stream = StreamingBOLL(20, 2)
+    committed = stream.seed(df.iloc[:-1])
+
+    forming = stream.update(df.iloc[-1], closed=False)
+    expected = BOLL(20, 2).get_latest_values(df)
+    assert abs(forming['MB'] - expected['MB']) < 1e-9
+    assert forming['touch'] == expected['touch']
+    assert stream.latest() == forming
+    assert stream.update(df.iloc[-1], closed=False) == forming
+    assert abs(committed['MB'] - BOLL(20, 2).get_latest_values(df.iloc[:-1])['MB']) < 1e-9
+
+
+if __name__ == "__main__":
+    test_streaming_kdj_matches_batch()
+    test_streaming_kdj_forming_bar_is_provisional()
+    test_streaming_boll_matches_batch()
+    test_streaming_boll_stable_at_large_offset()
+    test_streaming_boll_forming_bar()
+    print("✅ 增量指标一致性测试通过")
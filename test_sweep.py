@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+参数扫描测试：共享内存的多进程结果与单进程一致（离线，合成K线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+from src.strategy.backtest import trade_pnl
+from src.strategy.sweep import ParameterSweep, evaluate_params, expand_grid
+from test_backtest import make_engine, make_klines
+
+GRID = {
+    'kdj_threshold': [60, 80],
+    'volatility_threshold': [0.03, 0.05],
+    'growth_threshold': [0.0, 0.01],
+    'oversold': [[40, 45, 50, 50], [10, 15, 20, 20]],
+    'overbought': [60, 90],
+}
+
+
+def test_expand_grid():
+    combinations = expand_grid(GRID)
+    assert len(combinations) == 32
+    assert combinations[0] == {'kdj_threshold': 60, 'volatility_threshold': 0.03, 'growth_threshold': 0.0,
+                               'oversold': [40, 45, 50, 50], 'overbought': 60}
+
+    try:
+        expand_grid({'unknown': [1]})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未知参数应报错")
+
+
+def test_trade_pnl():
+    """空仓时买入，持仓时遇卖出平仓，期末持仓按最后价格计"""
+    price = np.array([10.0, 11.0, 12.0, 9.0, 10.0, 15.0])
+    masks = {
+        ('buy', 1): np.array([True, True, False, True, False, False]),
+        ('buy', 2): np.array([False, True, False, False, False, False]),
+        ('sell', 1): np.array([False, False, True, False, False, False]),
+    }
+    result = trade_pnl(price, masks)
+
+    assert result['trades'] == 2
+    assert result['wins'] == 2
+    assert abs(result['pnl'] - (12.0 / 10.0 - 1 + 15.0 / 9.0 - 1)) < 1e-12
+
+
+def test_parallel_sweep_matches_inline():
+    """多进程共享内存扫描与单进程逐组求值结果一致"""
+    engine = make_engine()
+    arrays = engine.prepare(make_klines())
+
+    parallel = ParameterSweep(arrays, processes=2).run(GRID)
+    inline = ParameterSweep(arrays, processes=1).run(GRID)
+
+    assert len(parallel) == 32
+    key = lambda result: repr(result['params'])
+    assert sorted(parallel, key=key) == sorted(inline, key=key)
+    assert [result['pnl'] for result in parallel] == sorted((result['pnl'] for result in parallel), reverse=True)
+    assert any(result['buy_signals'] for result in parallel)
+    assert any(result['sell_signals'] for result in parallel)
+
+    # 与单独用引擎求值一致
+    params = {'kdj_threshold': 80, 'volatility_threshold': 0.05, 'growth_threshold': 0.0,
+              'oversold': [40, 45, 50, 50], 'overbought': 60}
+    single = evaluate_params(arrays, params)
+    assert single == next(result for result in inline if result['params'] == params)
+
+
+if __name__ == "__main__":
+    test_expand_grid()
+    test_trade_pnl()
+    test_parallel_sweep_matches_inline()
+    print("✅ 参数扫描测试通过")
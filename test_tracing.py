@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+调试追踪测试：延迟格式化、子系统级别、最近tick环形缓冲区（离线）
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import io
+import logging
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+from src.utils.logger import TickBuffer, logger
+
+
+class CountingValue:
+    """记录被格式化次数的参数"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'value'
+
+
+class FakeSnapshot:
+    """只提供行情和已计算指标的快照"""
+
+    def ticker(self, symbol):
+        return {'highPrice': '0.27', 'lowPrice': '0.26', 'priceChangePercent': '1.5', 'volume': '1000'}
+
+    def klines_for(self, symbol, timeframe):
+        return None if timeframe == '1m' else pd.DataFrame({'close': [0.265] * 30})
+
+    def indicators_for(self, symbol, timeframe):
+        return {'kdj': {'K': 20.0, 'D': 25.0, 'J': 10.0},
+                'boll': {'close': 0.265, 'UP': 0.27, 'MB': 0.265, 'DN': 0.26}}
+
+
+def test_lazy_formatting_and_levels():
+    """级别未开启时不格式化参数；子系统级别独立于全局级别"""
+    tracer = logger.tracer('test_lazy')
+    assert logger.tracer('test_lazy') is tracer
+    value = CountingValue()
+
+    tracer.set_level('INFO')
+    tracer.debug("指标: %s", value)
+    assert value.formatted == 0 and not tracer.enabled()
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    tracer.logger.addHandler(handler)
+    try:
+        tracer.set_level('DEBUG')
+        tracer.debug("指标: %s", value)
+        assert tracer.enabled()
+        assert [record.getMessage() for record in records] == ['指标: value']
+        # 其他子系统不受影响
+        assert not logger.tracer('test_other').enabled()
+    finally:
+        tracer.logger.removeHandler(handler)
+        tracer.set_level('INFO')
+
+
+def test_tick_buffer_keeps_last_n():
+    ticks = TickBuffer(maxlen=3)
+    for n in range(5):
+        ticks.record('web' if n % 2 else 'btc', {'n': n})
+
+    assert [tick['data']['n'] for tick in ticks.recent()] == [2, 3, 4]
+    assert [tick['data']['n'] for tick in ticks.recent(limit=1)] == [4]
+    assert [tick['data']['n'] for tick in ticks.recent(subsystem='web')] == [3]
+
+
+def test_detailed_indicators_capture_instead_of_print():
+    """指标计算不再输出到stdout，本tick的指标和异常可通过接口读取"""
+    import web_app
+
+    logger.ticks.clear()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        indicators = web_app.WebMonitor().get_doge_detailed_indicators(FakeSnapshot())
+    assert output.getvalue() == ''
+    assert indicators['kdj_15m'] == {'k': 20.0, 'd': 25.0, 'j': 10.0}
+    assert 'kdj_1m' not in indicators
+
+    client = web_app.app.test_client()
+    result = client.get('/api/debug/ticks?subsystem=web&limit=5').get_json()
+    assert result['count'] == 1
+    tick = result['ticks'][0]
+    assert tick['data']['symbol'] == 'DOGEUSDT'
+    assert tick['data']['errors'] == ['1m: K线为None']
+    assert tick['data']['indicators']['boll_1h']['position'] == 'inside'
+
+
+def test_failed_indicators_return_no_data():
+    """指标计算整体失败时不返回假数据，错误记录在追踪中"""
+    import web_app
+
+    class FailingSnapshot:
+        @staticmethod
+        def capture():
+            raise RuntimeError('行情获取失败')
+
+    original = web_app.MarketSnapshot
+    web_app.MarketSnapshot = FailingSnapshot
+    logger.ticks.clear()
+    try:
+        monitor = web_app.WebMonitor()
+        assert monitor.get_btc_detailed_indicators() == {}
+        assert monitor.get_doge_detailed_indicators() == {}
+    finally:
+        web_app.MarketSnapshot = original
+
+    ticks = logger.ticks.recent(subsystem='web')
+    assert [tick['data']['symbol'] for tick in ticks] == ['BTCUSDT', 'DOGEUSDT']
+    assert all(tick['data']['errors'] == ['行情获取失败'] for tick in ticks)
+
+
+if __name__ == "__main__":
+    test_lazy_formatting_and_levels()
+    test_tick_buffer_keeps_last_n()
+    test_detailed_indicators_capture_instead_of_print()
+    test_failed_indicators_return_no_data()
+    print("✅ 调试追踪测试通过")
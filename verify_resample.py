@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+验证K线聚合
+从REST获取1分钟K线聚合为更高周期，与REST直接获取的同周期K线逐根对比
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data.binance_api import binance_api, INTERVAL_MS
+from src.data.resampler import compare_klines, resample_klines
+
+
+def verify(symbol: str, interval: str, bars: int) -> bool:
+    interval_ms = INTERVAL_MS[interval]
+    now_ms = int(time.time() * 1000)
+    # 从 bars 根之前的周期起点开始，保证每根聚合K线都有完整的1分钟数据
+    start = (now_ms // interval_ms - bars) * interval_ms
+    # 只对比已收盘的K线：两次请求之间形成中的K线还会变化
+    end = now_ms // interval_ms * interval_ms - 1
+    minutes = binance_api.get_klines_range(symbol, '1m', start, end)
+    reference = binance_api.get_klines_range(symbol, interval, start, end)
+    if minutes.empty or reference.empty:
+        print(f"❌ {symbol} {interval}: 获取K线失败")
+        return False
+
+    result = compare_klines(resample_klines(minutes, interval), reference)
+    passed = not result['mismatched'] and not result['missing']
+    worst = max(result['max_diff'].values())
+    print(f"{'✅' if passed else '❌'} {symbol} {interval}: 对比{result['compared']}根, "
+          f"缺失{result['missing']}根, 不一致{len(result['mismatched'])}根, 最大相对误差{worst:.2e}")
+    for timestamp in result['mismatched'][:5]:
+        print(f"    不一致: {timestamp}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比1分钟K线聚合结果与REST K线')
+    parser.add_argument('--symbols', nargs='*', default=['BTCUSDT', 'DOGEUSDT'])
+    parser.add_argument('--intervals', nargs='*', default=['15m', '1h', '4h'])
+    parser.add_argument('--bars', type=int, default=48, help='每个周期对比的已收盘K线根数')
+    args = parser.parse_args()
+
+    results = [verify(symbol, interval, args.bars) for symbol in args.symbols for interval in args.intervals]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ class TradingMonitor {
         this.isMonitoring = false;
         this.lastSignals = [];
 
+        // 增量推送：本地保存的完整市场状态及其序号
+        this.marketState = null;
+        this.marketSeq = null;
+
         this.init();
     }
 
@@ -40,9 +44,14 @@ class TradingMonitor {
                 this.handleStatusUpdate(data);
             });
 
-            // 市场数据更新
+            // 市场数据全量（连接时或请求全量后）
             this.socket.on('market_update', (data) => {
-                this.handleMarketUpdate(data);
+                this.handleMarketSnapshot(data);
+            });
+
+            // 市场数据增量（只含变化的字段）
+            this.socket.on('market_delta', (delta) => {
+                this.handleMarketDelta(delta);
             });
 
         } catch (error) {
@@ -123,9 +132,17 @@ class TradingMonitor {
         if (this.isConnected) {
             // 通过API获取当前数据
             fetch('/api/data')
-                .then(response => response.json())
+                .then(response => {
+                    const version = response.headers.get('X-Data-Version');
+                    return response.json().then(data => {
+                        if (version !== null) {
+                            data.seq = parseInt(version, 10);
+                        }
+                        return data;
+                    });
+                })
                 .then(data => {
-                    this.handleMarketUpdate(data);
+                    this.handleMarketSnapshot(data);
                     this.addLog('🔄 数据已刷新', 'info');
                 })
                 .catch(error => {
@@ -145,25 +162,81 @@ class TradingMonitor {
         }
     }
 
-    handleMarketUpdate(data) {
+    handleMarketSnapshot(data) {
+        const { seq, ...state } = data;
+
+        // 旧于本地序号的全量（如刷新请求晚于推送返回）直接忽略
+        if (seq !== undefined && this.marketSeq !== null && seq < this.marketSeq) {
+            return;
+        }
+
+        this.marketState = state;
+        this.marketSeq = seq !== undefined ? seq : null;
+        this.handleMarketUpdate(state);
+    }
+
+    handleMarketDelta(delta) {
+        // 本地没有基准状态或序号不连续：丢弃增量并请求全量
+        if (this.marketState === null || delta.base !== this.marketSeq) {
+            if (delta.seq > (this.marketSeq ?? -1)) {
+                this.socket.emit('request_snapshot');
+            }
+            return;
+        }
+
+        this.mergeDelta(this.marketState, delta.changed || {});
+        (delta.removed || []).forEach(path => {
+            let parent = this.marketState;
+            for (const key of path.slice(0, -1)) {
+                parent = parent?.[key];
+            }
+            if (parent && typeof parent === 'object') {
+                delete parent[path[path.length - 1]];
+            }
+        });
+        this.marketSeq = delta.seq;
+
+        // 只重绘有变化的部分
+        const changedSections = new Set(Object.keys(delta.changed || {}));
+        (delta.removed || []).forEach(path => changedSections.add(path[0]));
+        this.handleMarketUpdate(this.marketState, changedSections);
+    }
+
+    mergeDelta(target, changed) {
+        // 与服务端 apply_delta 一致：字典逐键合并，其它值整体替换
+        Object.entries(changed).forEach(([key, value]) => {
+            const isObject = value !== null && typeof value === 'object' && !Array.isArray(value);
+            const current = target[key];
+            if (isObject && current !== null && typeof current === 'object' && !Array.isArray(current)) {
+                this.mergeDelta(current, value);
+            } else {
+                target[key] = value;
+            }
+        });
+    }
+
+    handleMarketUpdate(data, changedSections = null) {
+        // changedSections 为空时重绘全部，否则只重绘其中的部分
+        const changed = (section) => changedSections === null || changedSections.has(section);
+
         try {
             // 更新时间戳
-            if (data.timestamp) {
+            if (data.timestamp && changed('timestamp')) {
                 document.getElementById('last-update').textContent = data.timestamp;
             }
 
             // 更新BTC数据
-            if (data.btc) {
+            if (data.btc && changed('btc')) {
                 this.updateBTCData(data.btc);
             }
 
             // 更新DOGE数据
-            if (data.doge) {
+            if (data.doge && changed('doge')) {
                 this.updateDOGEData(data.doge);
             }
 
             // 更新信号
-            if (data.signals) {
+            if (data.signals && changed('signals')) {
                 this.updateSignals(data.signals);
             }
 
@@ -9,16 +9,22 @@ import os
 import threading
 import time
 from datetime import datetime
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify
 from flask_socketio import SocketIO, emit
 
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 # 导入现有的监控模块
+from src.core.scheduler import SignalScheduler
+from src.core.state_store import StateStore, encode
 from src.data.binance_api import binance_api
+from src.data.journal import TICKS, journal
+from src.data.live_kline_book import live_kline_book
 from src.strategy.btc_monitor import btc_monitor
 from src.strategy.doge_signals import doge_signal_generator
+from src.indicators.modes import CONFIRMED, DUAL
+from src.strategy.market_snapshot import MarketSnapshot, default_kline_requests
 from src.utils.config import config
 from src.utils.logger import logger
 
@@ -27,57 +33,155 @@ app = Flask(__name__, template_folder='web/templates', static_folder='web/static
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# 全局变量
-monitoring_thread = None
-monitoring_active = False
+# 网页监控子系统的调试追踪，级别见配置 logging.subsystems.web
+web_trace = logger.tracer('web')
+
+# 首次请求等待生产者发布第一份数据的最长时间（秒）
+FIRST_DATA_TIMEOUT = 15
 
 
 class WebMonitor:
-    """网页监控器"""
+    """
+    网页监控器
+
+    唯一的数据生产者：后台线程按调度计算市场数据，发布到版本化的状态存储并广播；
+    所有HTTP接口和Socket.IO客户端只读取最新版本，不触发上游请求。
+    """
 
     def __init__(self):
         self.is_running = False
-        self.update_interval = config.get('monitoring.update_interval', 2)  # 改为2秒更新
-        self.last_data = {}
+        self.update_interval = config.get('monitoring.update_interval', 2)  # 实时推送的最小间隔（秒）
+        self.scheduler = None
+        self.store = StateStore()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._auto_started = False
+        self._active_signals = set()  # 上一次更新时成立的信号，用于只记录新出现的信号
+        self.tick_interval = config.get('data.journal.tick_interval', 60)  # 非收盘更新写入tick的最小间隔（秒）
+        self.tick_retention_days = config.get('data.journal.tick_retention_days', 30)
+        self._last_tick = 0.0
+        self._pruned_day = None
+
+    @property
+    def last_data(self):
+        """最新发布的市场数据，尚未发布时为空字典"""
+        return self.store.latest().data or {}
+
+    def start(self) -> bool:
+        """在后台线程启动生产者；已在运行时不重复启动，返回是否新启动"""
+        with self._lock:
+            if self.is_running:
+                return False
+            self.is_running = True
+            self._auto_started = True
+            self._thread = threading.Thread(target=self.start_monitoring, name='web-monitor', daemon=True)
+            self._thread.start()
+            return True
+
+    def ensure_started(self) -> bool:
+        """首个消费者到来时自动启动一次生产者，此后由开始/停止监控控制"""
+        with self._lock:
+            if self._auto_started:
+                return False
+        return self.start()
 
     def start_monitoring(self):
-        """开始监控"""
+        """开始监控（阻塞，由 start() 在后台线程中调用）"""
         self.is_running = True
         logger.info("🌐 Web监控启动")
 
-        while self.is_running:
-            try:
-                # 获取市场数据
-                market_data = self.get_market_data()
+        # API连接状态只在启动时检查一次，之后由每次更新的结果维护
+        if not self.store.status():
+            self.store.set_status(api_connected=binance_api.test_connection())
 
-                # 发送到所有连接的客户端
-                socketio.emit('market_update', market_data)
+        # 实时K线簿：之后的推送直接读取内存中的K线和ticker
+        if config.get('data.live_klines.enabled', True) and not live_kline_book.running:
+            live_kline_book.start(default_kline_requests(), config.get_symbols().values())
 
-                # 缓存数据
-                self.last_data = market_data
+        # K线收盘和形成中K线的推送（按 update_interval 节流）都触发一次更新
+        self.scheduler = SignalScheduler(default_kline_requests(), self.update_interval)
+        self.scheduler.on_confirmed(self.push_update)
+        self.scheduler.on_realtime(self.push_update)
 
-                time.sleep(self.update_interval)
+        self.push_update()
+        self.scheduler.run_forever()
 
-            except Exception as e:
-                logger.error(f"Web监控错误: {str(e)}")
-                time.sleep(self.update_interval)
+    def push_update(self, event=None):
+        """获取市场数据，发布为新版本并推送到所有连接的客户端"""
+        try:
+            # 获取市场数据
+            market_data = self.get_market_data()
+
+            # 发布新版本，并记录本次更新得到的API连接状态
+            latest = self.store.publish(market_data)
+            self.store.set_status(api_connected=market_data.get('status') == 'running',
+                                  last_error=market_data.get('error'))
+            self.record_journal(market_data, event)
+
+            # 发送到所有连接的客户端：有上一版本时只发送变化的字段
+            if latest.delta is not None:
+                socketio.emit('market_delta', delta_message(latest))
+            else:
+                socketio.emit('market_update', snapshot_message(latest))
+
+        except Exception as e:
+            logger.error(f"Web监控错误: {str(e)}")
+
+    def record_journal(self, market_data, event=None):
+        """
+        写入信号日志：信号只在开始成立时记录一次；
+        每个交易对的精简tick只在K线收盘或距上次写入超过 tick_interval 时记录，超过保留天数的tick分区每天清理一次
+        """
+        if market_data.get('status') != 'running':
+            return
+
+        symbols = config.get_symbols()
+        now = time.time()
+        if (event or {}).get('type') == CONFIRMED or now - self._last_tick >= self.tick_interval:
+            self._last_tick = now
+            for name, symbol in symbols.items():
+                journal.record_tick(symbol, tick_record(market_data.get(name, {})))
+
+            today = int(now // 86400)  # UTC日期序号
+            if self._pruned_day != today:
+                self._pruned_day = today
+                journal.prune(TICKS, self.tick_retention_days)
+
+        doge_symbol = symbols.get('doge', 'DOGEUSDT')
+        signals = market_data.get('signals', {}).get('list', [])
+        active = {(signal['type'], signal['signal_id']) for signal in signals}
+        for signal in signals:
+            if (signal['type'], signal['signal_id']) not in self._active_signals:
+                journal.record_signal(doge_symbol, signal['type'], signal['signal_id'], mode=signal.get('mode'),
+                                      verdicts=signal.get('verdicts'),
+                                      price=market_data.get('doge', {}).get('price'))
+        self._active_signals = active
 
     def stop_monitoring(self):
         """停止监控"""
-        self.is_running = False
+        with self._lock:
+            self.is_running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if live_kline_book.running:
+            live_kline_book.stop()
         logger.info("🌐 Web监控停止")
 
     def get_market_data(self):
         """获取完整的市场数据"""
         try:
+            # 本次更新的K线、ticker和指标只获取/计算一次
+            snapshot = MarketSnapshot.capture()
+
             # 获取BTC数据
-            btc_data = self.get_btc_data()
+            btc_data = self.get_btc_data(snapshot)
 
             # 获取DOGE数据
-            doge_data = self.get_doge_data()
+            doge_data = self.get_doge_data(snapshot)
 
             # 检查交易信号
-            signals = self.check_signals()
+            signals = self.check_signals(snapshot)
 
             return {
                 'timestamp': datetime.now().strftime('%H:%M:%S'),
@@ -95,11 +199,13 @@ class WebMonitor:
                 'error': str(e)
             }
 
-    def get_btc_data(self):
+    def get_btc_data(self, snapshot=None):
         """获取BTC监控数据"""
         try:
+            snapshot = snapshot or MarketSnapshot.capture()
+
             # 获取BTC价格
-            btc_ticker = binance_api.get_24hr_ticker('BTCUSDT')
+            btc_ticker = snapshot.ticker('BTCUSDT')
             if not btc_ticker:
                 return {'error': 'BTC数据获取失败'}
 
@@ -107,7 +213,7 @@ class WebMonitor:
             change_percent = float(btc_ticker['priceChangePercent'])
 
             # 获取BTC监控条件
-            btc_conditions = btc_monitor.check_all_conditions()
+            btc_conditions = btc_monitor.check_all_conditions(snapshot)
 
             # 转换为JSON可序列化的格式
             conditions_serializable = {}
@@ -125,7 +231,7 @@ class WebMonitor:
                     conditions_serializable[key] = str(value)
 
             # 获取详细的技术指标数据
-            detailed_indicators = self.get_btc_detailed_indicators()
+            detailed_indicators = self.get_btc_detailed_indicators(snapshot)
 
             return {
                 'price': price,
@@ -138,16 +244,18 @@ class WebMonitor:
         except Exception as e:
             return {'error': f'BTC数据处理失败: {str(e)}'}
 
-    def get_btc_detailed_indicators(self):
+    def get_btc_detailed_indicators(self, snapshot=None):
         """获取BTC详细技术指标"""
+        symbol = 'BTCUSDT'
         try:
-            print("🔍 开始计算BTC指标...")
+            snapshot = snapshot or MarketSnapshot.capture()
 
             indicators = {}
+            errors = []  # 本tick的异常，存入调试缓冲区而不是逐条输出
 
             # 首先尝试获取基本市场数据
             try:
-                ticker_24h = binance_api.get_24hr_ticker('BTCUSDT')
+                ticker_24h = snapshot.ticker('BTCUSDT')
                 if ticker_24h:
                     high_24h = float(ticker_24h['highPrice'])
                     low_24h = float(ticker_24h['lowPrice'])
@@ -160,57 +268,45 @@ class WebMonitor:
                         'low_24h': float(round(low_24h, 2)),
                         'volume_24h': float(round(float(ticker_24h['volume']), 0))
                     }
-                    print("✅ BTC市场统计数据计算成功")
             except Exception as e:
-                print(f"❌ BTC市场统计计算失败: {str(e)}")
+                errors.append(f'market_stats: {e}')
 
             # 尝试计算技术指标
             try:
-                from src.indicators.boll import BOLL
-                from src.indicators.kdj import KDJ
-                import pandas as pd
-                print("✅ BTC指标类导入成功")
-
                 # 获取4小时和1小时的BOLL和KDJ数据
                 for timeframe in ['4h', '1h']:
                     try:
-                        print(f"  📊 计算BTC {timeframe} 时间框架...")
-
-                        # 获取K线数据
-                        df = binance_api.get_klines('BTCUSDT', timeframe, limit=50)
+                        # 从快照获取K线数据
+                        df = snapshot.klines_for('BTCUSDT', timeframe)
+                        timeframe_indicators = snapshot.indicators_for('BTCUSDT', timeframe)
                         if df is None:
-                            print(f"  ❌ BTC {timeframe} API返回None")
+                            errors.append(f'{timeframe}: K线为None')
                             continue
                         if hasattr(df, 'empty') and df.empty:
-                            print(f"  ❌ BTC {timeframe} DataFrame为空")
+                            errors.append(f'{timeframe}: K线为空')
                             continue
 
-                        print(f"  ✅ BTC {timeframe} 数据获取成功，形状: {df.shape}")
+                        web_trace.debug("%s %s K线形状: %s", symbol, timeframe, df.shape)
 
-                        # 计算KDJ指标
+                        # 读取快照中已计算的KDJ指标
                         try:
-                            kdj = KDJ()
-                            kdj_df = kdj.calculate(df)
-                            if kdj_df is not None and not kdj_df.empty:
-                                latest_kdj = kdj_df.iloc[-1]
+                            latest_kdj = timeframe_indicators['kdj']
+                            if latest_kdj:
                                 indicators[f'kdj_{timeframe}'] = {
                                     'k': float(round(latest_kdj['K'], 2)),
                                     'd': float(round(latest_kdj['D'], 2)),
                                     'j': float(round(latest_kdj['J'], 2))
                                 }
-                                print(f"    ✅ BTC {timeframe} KDJ计算成功")
                             else:
-                                print(f"    ❌ BTC {timeframe} KDJ返回空数据")
+                                errors.append(f'{timeframe}: KDJ为空')
                         except Exception as e:
-                            print(f"    ❌ BTC {timeframe} KDJ计算异常: {str(e)}")
+                            errors.append(f'{timeframe} KDJ: {e}')
 
-                        # 计算BOLL指标
+                        # 读取快照中已计算的BOLL指标
                         try:
-                            boll = BOLL()
-                            boll_df = boll.calculate(df)
-                            if boll_df is not None and not boll_df.empty:
-                                latest_boll = boll_df.iloc[-1]
-                                current_price = float(df.iloc[-1]['close'])
+                            latest_boll = timeframe_indicators['boll']
+                            if latest_boll:
+                                current_price = float(latest_boll['close'])
                                 upper = float(latest_boll['UP'])
                                 lower = float(latest_boll['DN'])
 
@@ -227,57 +323,38 @@ class WebMonitor:
                                     'current_price': float(round(current_price, 2)),
                                     'position': position
                                 }
-                                print(f"    ✅ BTC {timeframe} BOLL计算成功")
                             else:
-                                print(f"    ❌ BTC {timeframe} BOLL返回空数据")
+                                errors.append(f'{timeframe}: BOLL为空')
                         except Exception as e:
-                            print(f"    ❌ BTC {timeframe} BOLL计算异常: {str(e)}")
+                            errors.append(f'{timeframe} BOLL: {e}')
 
                     except Exception as e:
-                        print(f"  ❌ BTC {timeframe} 整体计算失败: {str(e)}")
+                        errors.append(f'{timeframe}: {e}')
                         continue
 
-            except ImportError as e:
-                print(f"❌ BTC指标类导入失败: {str(e)}")
-                # 如果指标计算失败，至少返回一些示例数据以测试前端
-                indicators.update({
-                    'kdj_4h': {'k': 65.43, 'd': 62.18, 'j': 71.93},
-                    'boll_4h': {'upper': 118500.50, 'middle': 115500.04, 'lower': 112500.58, 'current_price': 115500.04, 'position': 'inside'},
-                    'kdj_1h': {'k': 58.92, 'd': 55.67, 'j': 65.42},
-                    'boll_1h': {'upper': 116800.75, 'middle': 115500.04, 'lower': 114200.33, 'current_price': 115500.04, 'position': 'inside'}
-                })
-                print("🔧 BTC使用测试数据")
             except Exception as e:
-                print(f"❌ BTC技术指标计算失败: {str(e)}")
+                errors.append(f'indicators: {e}')
 
-            print(f"🎯 BTC指标计算完成，返回数据: {list(indicators.keys())}")
-            for key, value in indicators.items():
-                print(f"  {key}: {value}")
+            if errors:
+                web_trace.debug("%s指标异常: %s", symbol, errors)
+            web_trace.debug("%s指标计算完成: %s", symbol, indicators)
+            web_trace.capture({'symbol': symbol, 'indicators': indicators, 'errors': errors})
 
             return indicators
 
         except Exception as e:
-            print(f"❌ BTC指标计算完全失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            # 返回基本测试数据确保前端有数据显示
-            return {
-                'market_stats': {
-                    'amplitude_24h': 3.456,
-                    'growth_24h': -0.54,
-                    'high_24h': 118000.00,
-                    'low_24h': 114000.00,
-                    'volume_24h': 987654321
-                },
-                'kdj_4h': {'k': 65.43, 'd': 62.18, 'j': 71.93},
-                'boll_4h': {'upper': 118500.50, 'middle': 115500.04, 'lower': 112500.58, 'current_price': 115500.04, 'position': 'inside'}
-            }
+            logger.error(f"BTC指标计算完全失败: {e}")
+            web_trace.capture({'symbol': symbol, 'indicators': {}, 'errors': [str(e)]})
+            # 不返回任何指标，由前端显示为无数据；错误已记录在追踪中
+            return {}
 
-    def get_doge_data(self):
+    def get_doge_data(self, snapshot=None):
         """获取DOGE数据"""
         try:
+            snapshot = snapshot or MarketSnapshot.capture()
+
             # 获取DOGE价格
-            doge_ticker = binance_api.get_24hr_ticker('DOGEUSDT')
+            doge_ticker = snapshot.ticker('DOGEUSDT')
             if not doge_ticker:
                 return {'error': 'DOGE数据获取失败'}
 
@@ -285,7 +362,7 @@ class WebMonitor:
             change_percent = float(doge_ticker['priceChangePercent'])
 
             # 获取详细的技术指标数据
-            detailed_indicators = self.get_doge_detailed_indicators()
+            detailed_indicators = self.get_doge_detailed_indicators(snapshot)
 
             return {
                 'price': price,
@@ -296,16 +373,18 @@ class WebMonitor:
         except Exception as e:
             return {'error': f'DOGE数据处理失败: {str(e)}'}
 
-    def get_doge_detailed_indicators(self):
+    def get_doge_detailed_indicators(self, snapshot=None):
         """获取DOGE详细技术指标"""
+        symbol = 'DOGEUSDT'
         try:
-            print("🔍 开始计算DOGE指标...")
+            snapshot = snapshot or MarketSnapshot.capture()
 
             indicators = {}
+            errors = []  # 本tick的异常，存入调试缓冲区而不是逐条输出
 
             # 首先尝试获取基本市场数据
             try:
-                ticker_24h = binance_api.get_24hr_ticker('DOGEUSDT')
+                ticker_24h = snapshot.ticker('DOGEUSDT')
                 if ticker_24h:
                     high_24h = float(ticker_24h['highPrice'])
                     low_24h = float(ticker_24h['lowPrice'])
@@ -318,57 +397,45 @@ class WebMonitor:
                         'low_24h': float(round(low_24h, 6)),
                         'volume_24h': float(round(float(ticker_24h['volume']), 0))
                     }
-                    print("✅ 市场统计数据计算成功")
             except Exception as e:
-                print(f"❌ 市场统计计算失败: {str(e)}")
+                errors.append(f'market_stats: {e}')
 
             # 尝试计算技术指标
             try:
-                from src.indicators.kdj import KDJ
-                from src.indicators.boll import BOLL
-                import pandas as pd
-                print("✅ 指标类导入成功")
-
                 # 获取多时间框架的BOLL和KDJ数据
                 for timeframe in ['1h', '15m', '1m']:
                     try:
-                        print(f"  📊 计算 {timeframe} 时间框架...")
-
-                        # 获取K线数据
-                        df = binance_api.get_klines('DOGEUSDT', timeframe, limit=50)
+                        # 从快照获取K线数据
+                        df = snapshot.klines_for('DOGEUSDT', timeframe)
+                        timeframe_indicators = snapshot.indicators_for('DOGEUSDT', timeframe)
                         if df is None:
-                            print(f"  ❌ {timeframe} API返回None")
+                            errors.append(f'{timeframe}: K线为None')
                             continue
                         if hasattr(df, 'empty') and df.empty:
-                            print(f"  ❌ {timeframe} DataFrame为空")
+                            errors.append(f'{timeframe}: K线为空')
                             continue
 
-                        print(f"  ✅ {timeframe} 数据获取成功，形状: {df.shape}")
+                        web_trace.debug("%s %s K线形状: %s", symbol, timeframe, df.shape)
 
-                        # 计算KDJ指标
+                        # 读取快照中已计算的KDJ指标
                         try:
-                            kdj = KDJ()
-                            kdj_df = kdj.calculate(df)
-                            if kdj_df is not None and not kdj_df.empty:
-                                latest_kdj = kdj_df.iloc[-1]
+                            latest_kdj = timeframe_indicators['kdj']
+                            if latest_kdj:
                                 indicators[f'kdj_{timeframe}'] = {
                                     'k': float(round(latest_kdj['K'], 2)),
                                     'd': float(round(latest_kdj['D'], 2)),
                                     'j': float(round(latest_kdj['J'], 2))
                                 }
-                                print(f"    ✅ {timeframe} KDJ计算成功")
                             else:
-                                print(f"    ❌ {timeframe} KDJ返回空数据")
+                                errors.append(f'{timeframe}: KDJ为空')
                         except Exception as e:
-                            print(f"    ❌ {timeframe} KDJ计算异常: {str(e)}")
+                            errors.append(f'{timeframe} KDJ: {e}')
 
-                        # 计算BOLL指标
+                        # 读取快照中已计算的BOLL指标
                         try:
-                            boll = BOLL()
-                            boll_df = boll.calculate(df)
-                            if boll_df is not None and not boll_df.empty:
-                                latest_boll = boll_df.iloc[-1]
-                                current_price = float(df.iloc[-1]['close'])
+                            latest_boll = timeframe_indicators['boll']
+                            if latest_boll:
+                                current_price = float(latest_boll['close'])
                                 upper = float(latest_boll['UP'])
                                 lower = float(latest_boll['DN'])
 
@@ -385,58 +452,36 @@ class WebMonitor:
                                     'current_price': float(round(current_price, 6)),
                                     'position': position
                                 }
-                                print(f"    ✅ {timeframe} BOLL计算成功")
                             else:
-                                print(f"    ❌ {timeframe} BOLL返回空数据")
+                                errors.append(f'{timeframe}: BOLL为空')
                         except Exception as e:
-                            print(f"    ❌ {timeframe} BOLL计算异常: {str(e)}")
+                            errors.append(f'{timeframe} BOLL: {e}')
 
                     except Exception as e:
-                        print(f"  ❌ {timeframe} 整体计算失败: {str(e)}")
+                        errors.append(f'{timeframe}: {e}')
                         continue
 
-            except ImportError as e:
-                print(f"❌ 指标类导入失败: {str(e)}")
-                # 如果指标计算失败，至少返回一些示例数据以测试前端
-                indicators.update({
-                    'kdj_1h': {'k': 45.67, 'd': 43.21, 'j': 50.59},
-                    'boll_1h': {'upper': 0.271234, 'middle': 0.266300, 'lower': 0.261366, 'current_price': 0.266300, 'position': 'inside'},
-                    'kdj_15m': {'k': 52.34, 'd': 49.12, 'j': 58.78},
-                    'boll_15m': {'upper': 0.270567, 'middle': 0.266300, 'lower': 0.262033, 'current_price': 0.266300, 'position': 'inside'},
-                    'kdj_1m': {'k': 38.91, 'd': 35.67, 'j': 45.39},
-                    'boll_1m': {'upper': 0.269123, 'middle': 0.266300, 'lower': 0.263477, 'current_price': 0.266300, 'position': 'inside'}
-                })
-                print("🔧 使用测试数据")
             except Exception as e:
-                print(f"❌ 技术指标计算失败: {str(e)}")
+                errors.append(f'indicators: {e}')
 
-            print(f"🎯 DOGE指标计算完成，返回数据: {list(indicators.keys())}")
-            for key, value in indicators.items():
-                print(f"  {key}: {value}")
+            if errors:
+                web_trace.debug("%s指标异常: %s", symbol, errors)
+            web_trace.debug("%s指标计算完成: %s", symbol, indicators)
+            web_trace.capture({'symbol': symbol, 'indicators': indicators, 'errors': errors})
 
             return indicators
 
         except Exception as e:
-            print(f"❌ DOGE指标计算完全失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            # 返回基本测试数据确保前端有数据显示
-            return {
-                'market_stats': {
-                    'amplitude_24h': 5.234,
-                    'growth_24h': -1.07,
-                    'high_24h': 0.270000,
-                    'low_24h': 0.262000,
-                    'volume_24h': 1234567890
-                },
-                'kdj_1h': {'k': 45.67, 'd': 43.21, 'j': 50.59},
-                'boll_1h': {'upper': 0.271234, 'middle': 0.266300, 'lower': 0.261366, 'current_price': 0.266300, 'position': 'inside'}
-            }
+            logger.error(f"DOGE指标计算完全失败: {e}")
+            web_trace.capture({'symbol': symbol, 'indicators': {}, 'errors': [str(e)]})
+            # 不返回任何指标，由前端显示为无数据；错误已记录在追踪中
+            return {}
 
-    def check_signals(self):
+    def check_signals(self, snapshot=None):
         """检查交易信号"""
         try:
-            signals = doge_signal_generator.check_all_signals()
+            # 预警（形成中的K线）和确认（已收盘的K线）两种口径
+            signals = doge_signal_generator.check_all_signals(snapshot, DUAL)
 
             return {
                 'count': len(signals),
@@ -453,6 +498,29 @@ class WebMonitor:
             }
 
 
+def tick_record(data):
+    """市场数据中写入日志的精简字段：价格、涨跌幅、BTC条件是否满足、各周期KDJ最大值"""
+    if 'price' not in data:
+        return {}
+    record = {'price': data['price'], 'change_percent': data.get('change_percent')}
+    if 'valid' in data:
+        record['valid'] = data['valid']
+    for name, value in data.get('indicators', {}).items():
+        if name.startswith('kdj_'):
+            record[name] = max(value['k'], value['d'], value['j'])
+    return record
+
+
+def snapshot_message(latest):
+    """全量推送：市场数据附带序号"""
+    return {**latest.data, 'seq': latest.version}
+
+
+def delta_message(latest):
+    """增量推送：base 为增量所基于的序号，客户端序号不一致时需请求全量"""
+    return {'seq': latest.version, 'base': latest.version - 1, **latest.delta}
+
+
 # 创建监控器实例
 web_monitor = WebMonitor()
 
@@ -465,15 +533,17 @@ def index():
 
 @app.route('/api/status')
 def api_status():
-    """API状态检查"""
+    """API状态检查（读取生产者维护的状态，不请求上游）"""
     try:
-        # 测试API连接
-        api_ok = binance_api.test_connection()
+        status = web_monitor.store.status()
+        latest = web_monitor.store.latest()
 
         return jsonify({
-            'api_connected': api_ok,
-            'monitoring_active': monitoring_active,
+            'api_connected': status.get('api_connected'),
+            'monitoring_active': web_monitor.is_running,
             'update_interval': web_monitor.update_interval,
+            'data_version': latest.version,
+            'data_age': round(time.time() - latest.published_at, 3) if latest.version else None,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -486,14 +556,73 @@ def api_status():
 
 @app.route('/api/data')
 def api_data():
-    """获取当前市场数据"""
+    """获取当前市场数据（最新版本的预编码JSON）"""
+    try:
+        latest = web_monitor.store.latest()
+        if not latest.version:
+            # 还没有数据：确保生产者已启动，等待它发布第一份数据
+            web_monitor.ensure_started()
+            latest = web_monitor.store.wait_for(1, FIRST_DATA_TIMEOUT)
+            if not latest.version:
+                return jsonify({'status': 'starting', 'timestamp': datetime.now().strftime('%H:%M:%S')}), 503
+
+        return Response(latest.payload, mimetype='application/json',
+                        headers={'X-Data-Version': str(latest.version)})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/debug/ticks')
+def api_debug_ticks():
+    """最近N个tick的调试数据（指标与异常），按需查看而不是持续输出"""
+    try:
+        from flask import request
+
+        limit = request.args.get('limit', type=int)
+        ticks = logger.ticks.recent(limit=limit, subsystem=request.args.get('subsystem'))
+        return Response(encode({'count': len(ticks), 'ticks': ticks}), mimetype='application/json')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/debug/rate_limit')
+def api_debug_rate_limit():
+    """Binance请求权重余量"""
+    try:
+        return jsonify(binance_api.governor.headroom())
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/journal/signals')
+def api_journal_signals():
+    """历史信号查询，start/end 为毫秒时间戳"""
     try:
-        if web_monitor.last_data:
-            return jsonify(web_monitor.last_data)
-        else:
-            # 如果没有缓存数据，获取一次
-            data = web_monitor.get_market_data()
-            return jsonify(data)
+        from flask import request
+
+        args = request.args
+        records = journal.query(symbol=args.get('symbol'), signal_id=args.get('signal_id', type=int),
+                                start=args.get('start', type=int), end=args.get('end', type=int),
+                                signal_type=args.get('type'), limit=args.get('limit', 100, type=int))
+        return Response(encode({'count': len(records), 'signals': records}), mimetype='application/json')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/journal/ticks')
+def api_journal_ticks():
+    """历史tick快照查询，参数同 /api/journal/signals"""
+    try:
+        from flask import request
+
+        args = request.args
+        records = journal.ticks(symbol=args.get('symbol'), start=args.get('start', type=int),
+                                end=args.get('end', type=int), limit=args.get('limit', 1000, type=int))
+        return Response(encode({'count': len(records), 'ticks': records}), mimetype='application/json')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -576,6 +705,8 @@ def update_settings():
             if 'update_interval' in monitoring_settings:
                 current_config['monitoring']['update_interval'] = int(monitoring_settings['update_interval'])
                 web_monitor.update_interval = int(monitoring_settings['update_interval'])
+                if web_monitor.scheduler is not None:
+                    web_monitor.scheduler.realtime_cooldown = web_monitor.update_interval
 
         # 保存配置文件
         with open('config.json', 'w', encoding='utf-8') as f:
@@ -583,6 +714,7 @@ def update_settings():
 
         # 重新加载配置
         config._config = config._load_config()
+        doge_signal_generator.reload_rules()
 
         return jsonify({'success': True, 'message': '设置已更新'})
 
@@ -593,37 +725,42 @@ def update_settings():
 @socketio.on('connect')
 def handle_connect():
     """客户端连接"""
-    print(f"客户端连接: {datetime.now()}")
+    web_trace.info("客户端连接")
+
+    # 首个客户端连接时启动生产者
+    web_monitor.ensure_started()
 
     # 发送当前状态
     emit('status', {
         'connected': True,
-        'monitoring_active': monitoring_active,
+        'monitoring_active': web_monitor.is_running,
         'timestamp': datetime.now().strftime('%H:%M:%S')
     })
 
-    # 如果有缓存数据，立即发送
-    if web_monitor.last_data:
-        emit('market_update', web_monitor.last_data)
+    # 如果已有数据，立即发送最新版本的全量
+    latest = web_monitor.store.latest()
+    if latest.version:
+        emit('market_update', snapshot_message(latest))
+
+
+@socketio.on('request_snapshot')
+def handle_request_snapshot():
+    """客户端发现序号缺口时请求全量"""
+    latest = web_monitor.store.latest()
+    if latest.version:
+        emit('market_update', snapshot_message(latest))
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """客户端断开"""
-    print(f"客户端断开: {datetime.now()}")
+    web_trace.info("客户端断开")
 
 
 @socketio.on('start_monitoring')
 def handle_start_monitoring():
-    """开始监控"""
-    global monitoring_thread, monitoring_active
-
-    if not monitoring_active:
-        monitoring_active = True
-        monitoring_thread = threading.Thread(target=web_monitor.start_monitoring)
-        monitoring_thread.daemon = True
-        monitoring_thread.start()
-
+    """开始监控（生产者已在运行时不重复启动）"""
+    if web_monitor.start():
         emit('status', {
             'monitoring_active': True,
             'message': '监控已启动',
@@ -634,10 +771,7 @@ def handle_start_monitoring():
 @socketio.on('stop_monitoring')
 def handle_stop_monitoring():
     """停止监控"""
-    global monitoring_active
-
-    if monitoring_active:
-        monitoring_active = False
+    if web_monitor.is_running:
         web_monitor.stop_monitoring()
 
         emit('status', {